@@ -0,0 +1,90 @@
+"""CPU seconds per GB served of a file to a socket: the green sendfile of os.sendfile,
+trampolined on EAGAIN, the mapped file sent with sendall as TLS sockets do,
+and the read/send loop of socket.sendfile without os.sendfile.
+The socket is drained by a forked process, the CPU of the sender only is measured."""
+from __future__ import print_function
+
+import os
+import resource
+import socket as _orig_socket
+import tempfile
+
+from eventlet.green import socket
+from eventlet.greenio.base import sendfile
+
+
+FILE_MEGABYTES = 256
+GIGABYTES = 2
+CHUNK = 64 << 10
+
+
+def drain(sock):
+    while sock.recv(1 << 20):
+        pass
+
+
+def cpu():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def read_send(sock, f):
+    """ socket.sendfile without os.sendfile, as on a green socket """
+    f.seek(0)
+    buff = bytearray(CHUNK)
+    view = memoryview(buff)
+    while True:
+        n = f.readinto(buff)
+        if not n:
+            break
+        sock.sendall(view[:n])
+
+
+def green_sendfile(sock, f):
+    sock.sendfile(f, 0)
+
+
+def mapped_sendfile(sock, f):
+    """ no os.sendfile without on_blocking, as of TLS sockets """
+    sendfile(sock, f, 0)
+
+
+def bench(send, f, times):
+    a, b = _orig_socket.socketpair()
+    pid = os.fork()
+    if not pid:
+        a.close()
+        drain(b)
+        os._exit(0)
+    b.close()
+    sock = socket.socket(fileno=a.detach()) if hasattr(a, 'detach') else socket.socket(_sock=a)
+    start = cpu()
+    for _ in range(times):
+        send(sock, f)
+    elapsed = cpu() - start
+    sock.close()
+    os.waitpid(pid, 0)
+    return elapsed
+
+
+if __name__ == "__main__":
+    import optparse
+    parser = optparse.OptionParser()
+    parser.add_option('-f', '--file-megabytes', type='int', dest='file_megabytes',
+                      default=FILE_MEGABYTES, help='megabytes of the file served')
+    parser.add_option('-g', '--gigabytes', type='int', dest='gigabytes', default=GIGABYTES,
+                      help='gigabytes served of each method')
+    opts, args = parser.parse_args()
+
+    size = opts.file_megabytes << 20
+    times = max(1, (opts.gigabytes << 30) // size)
+    gigabytes = float(size * times) / (1 << 30)
+    with tempfile.TemporaryFile() as f:
+        block = os.urandom(1 << 20)
+        for _ in range(opts.file_megabytes):
+            f.write(block)
+        f.flush()
+        for name, send in (('read/send', read_send), ('mapped', mapped_sendfile),
+                           ('sendfile', green_sendfile)):
+            elapsed = bench(send, f, times)
+            print("%-10s %.3f CPU s/GB" % (name, elapsed / gigabytes))
@@ -0,0 +1,94 @@
+"""Compare the throughput of GreenStreamReader against the makefile('rb') path,
+of SocketIO & BufferedReader over a green socket, on a socketpair fed by a writer
+greenthread: HTTP header lines of readline, length prefixed frames of readexactly
+(read of the file), and bulk reads of readinto."""
+from __future__ import print_function
+
+import struct
+import time
+
+import eventlet
+from eventlet.green import socket
+from eventlet.greenio import GreenStreamReader
+
+
+MEGABYTES = 32
+LINE = b'X-Header-Name: some header value of a request\r\n'
+FRAME = 200
+BULK = 64 << 10
+TRIES = 3
+
+
+def writer(sock, data):
+    sock.sendall(data)
+    sock.close()
+
+
+def lines(stream, total):
+    readline = stream.readline
+    n = 0
+    while n < total:
+        n += len(readline(65537))
+
+
+def frames_file(stream, total):
+    read = stream.read
+    n = 0
+    while n < total:
+        (size,) = struct.unpack('!H', read(2))
+        n += len(read(size)) + 2
+
+
+def frames_stream(stream, total):
+    readexactly = stream.readexactly
+    n = 0
+    while n < total:
+        (size,) = struct.unpack('!H', readexactly(2))
+        n += len(readexactly(size)) + 2
+
+
+def bulk(stream, total):
+    buff = bytearray(BULK)
+    readinto = stream.readinto
+    n = 0
+    while n < total:
+        n += readinto(buff)
+
+
+def bench(make_stream, consume, data):
+    best = None
+    for _ in range(TRIES):
+        a, b = socket.socketpair()
+        stream = make_stream(b)
+        eventlet.spawn(writer, a, data)
+        start = time.time()
+        consume(stream, len(data))
+        elapsed = time.time() - start
+        b.close()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def makefile(sock):
+    return sock.makefile('rb')
+
+
+if __name__ == "__main__":
+    import optparse
+    parser = optparse.OptionParser()
+    parser.add_option('-m', '--megabytes', type='int', dest='megabytes', default=MEGABYTES,
+                      help='megabytes read of each workload')
+    opts, args = parser.parse_args()
+
+    size = opts.megabytes << 20
+    frame = struct.pack('!H', FRAME) + b'f' * FRAME
+    workloads = (
+        ('lines', LINE * (size // len(LINE)), lines, lines),
+        ('frames', frame * (size // len(frame)), frames_file, frames_stream),
+        ('bulk', b'b' * size, bulk, bulk),
+    )
+    for name, data, consume_file, consume_stream in workloads:
+        for impl, make_stream, consume in (('makefile', makefile, consume_file),
+                                           ('GreenStreamReader', GreenStreamReader, consume_stream)):
+            elapsed = bench(make_stream, consume, data)
+            print("%-7s %-18s %.1f MB/s" % (name, impl, len(data) / elapsed / (1 << 20)))
@@ -0,0 +1,137 @@
+"""TLS of UltraGreenSocket: the SSLSocket driven by SSLWant*Error of each operation,
+against the SSLObject of memory BIOs (ssl_wrap(ctx, bio=True)).
+Throughput of bulk transfers and of small messages, and the handshake rate,
+client and server in a process over socket pairs."""
+from __future__ import print_function
+
+import os
+import time
+
+import eventlet
+from eventlet.greenio.ultra import UltraGreenSocket
+from eventlet.hubs import notify_opened
+
+ssl = eventlet.patcher.original('ssl')
+socket = eventlet.patcher.original('socket')
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CERT = os.path.join(HERE, '..', 'tests', 'test_server.crt')
+KEY = os.path.join(HERE, '..', 'tests', 'test_server.key')
+
+BULK_MEGABYTES = 256
+MESSAGES = 20000
+MESSAGE_SIZE = 512
+HANDSHAKES = 500
+TRIES = 3
+
+
+def contexts():
+    server_ctx = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+    server_ctx.load_cert_chain(CERT, KEY)
+    client_ctx = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+    return server_ctx, client_ctx
+
+
+def pair():
+    a, b = socket.socketpair()
+    notify_opened(a.fileno())
+    notify_opened(b.fileno())
+    return UltraGreenSocket(fd=a), UltraGreenSocket(fd=b)
+
+
+def wrapped(bio):
+    server_ctx, client_ctx = contexts()
+    a, b = pair()
+    server = eventlet.spawn(b.ssl_wrap, server_ctx, bio=bio, server_side=True)
+    a.ssl_wrap(client_ctx, bio=bio)
+    server.wait()
+    return a, b
+
+
+def bulk(bio, megabytes):
+    a, b = wrapped(bio)
+    block = os.urandom(1 << 20)
+
+    def sender():
+        for _ in range(megabytes):
+            a.sendall(block)
+    sending = eventlet.spawn(sender)
+    buff = bytearray(1 << 16)
+    total = megabytes << 20
+    start = time.time()
+    while total > 0:
+        total -= b.recv_into(buff)
+    elapsed = time.time() - start
+    sending.wait()
+    a.close()
+    b.close()
+    return (megabytes << 20) / elapsed / 1e6
+
+
+def messages(bio, count):
+    a, b = wrapped(bio)
+    message = b'm' * MESSAGE_SIZE
+
+    def echo():
+        buff = bytearray(MESSAGE_SIZE)
+        for _ in range(count):
+            got = 0
+            while got < MESSAGE_SIZE:
+                got += b.recv_into(memoryview(buff)[got:])
+            b.sendall(buff)
+    echoing = eventlet.spawn(echo)
+    buff = bytearray(MESSAGE_SIZE)
+    start = time.time()
+    for _ in range(count):
+        a.sendall(message)
+        got = 0
+        while got < MESSAGE_SIZE:
+            got += a.recv_into(memoryview(buff)[got:])
+    elapsed = time.time() - start
+    echoing.wait()
+    a.close()
+    b.close()
+    return count / elapsed
+
+
+def handshakes(bio, count, resume=False):
+    """ Handshakes of a server context, resuming the session of the previous one """
+    server_ctx, client_ctx = contexts()
+    session = None
+    start = time.time()
+    for _ in range(count):
+        a, b = pair()
+
+        def server():
+            b.ssl_wrap(server_ctx, bio=bio, server_side=True)
+            b.sendall(b'x')
+        serving = eventlet.spawn(server)
+        a.ssl_wrap(client_ctx, bio=bio, session=session)
+        # the TLS 1.3 tickets, after the handshake
+        a.recv(1)
+        serving.wait()
+        if resume:
+            session = a.session
+        a.close()
+        b.close()
+    return count / (time.time() - start)
+
+
+if __name__ == "__main__":
+    import optparse
+    parser = optparse.OptionParser()
+    parser.add_option('-m', '--megabytes', type='int', dest='megabytes', default=BULK_MEGABYTES,
+                      help='megabytes of the bulk transfer')
+    parser.add_option('-n', '--messages', type='int', dest='messages', default=MESSAGES,
+                      help='echoed messages of %d bytes' % MESSAGE_SIZE)
+    parser.add_option('-s', '--handshakes', type='int', dest='handshakes', default=HANDSHAKES,
+                      help='handshakes of each mode')
+    opts, args = parser.parse_args()
+
+    for name, bio in (('SSLSocket', False), ('memory BIO', True)):
+        print("%-11s bulk %.0f MB/s, echo %.0f messages/s, %.0f handshakes/s, %.0f resumed/s" % (
+            name,
+            max(bulk(bio, opts.megabytes) for _ in range(TRIES)),
+            max(messages(bio, opts.messages) for _ in range(TRIES)),
+            max(handshakes(bio, opts.handshakes) for _ in range(TRIES)),
+            max(handshakes(bio, opts.handshakes, True) for _ in range(TRIES))))
@@ -0,0 +1,85 @@
+"""Compare the busy-poll mode of the epoll hubs against the blocking wait,
+with ping-pong round trips to an echo server in a child process, so every
+response arrives while the client hub is idle.  Prints the latency percentiles
+and the spin CPU versus the wakeups saved, of BusyPoll.stats().
+Spinning is worth it with a CPU for the hub, on a single CPU the spin takes
+the time of the peer process."""
+from __future__ import print_function
+
+import os
+import time
+
+import eventlet
+from eventlet import hubs
+
+socket = eventlet.patcher.original('socket')
+
+
+ROUND_TRIPS = 20000
+BUDGETS = (0, 0.00005, 0.0002)
+HUBS = ('v1_epolls_linuxfd', 'standalone_epolls')
+
+
+def echo_process(server):
+    # plain blocking sockets, the child does not use the hub
+    sock, _ = server.accept()
+    buff = bytearray(4096)
+    while True:
+        n = sock.recv_into(buff)
+        if not n:
+            break
+        sock.sendall(buff[:n])
+    os._exit(0)
+
+
+def bench(hub, budget, round_trips):
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    addr = server.getsockname()
+    pid = os.fork()
+    if not pid:
+        echo_process(server)
+    server.close()
+
+    hubs.use_hub(hub, busy_poll=budget)
+    sock = eventlet.connect(addr)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    buff = bytearray(64)
+    clock = time.time
+    samples = []
+    for _ in range(round_trips):
+        start = clock()
+        sock.sendall(b'ping')
+        sock.recv_into(buff)
+        samples.append(clock() - start)
+    sock.close()
+    os.waitpid(pid, 0)
+
+    busy_poll = hubs.get_hub().busy_poll
+    return sorted(samples), busy_poll.stats() if busy_poll is not None else None
+
+
+if __name__ == "__main__":
+    import optparse
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--round-trips', dest='round_trips', type='int', default=ROUND_TRIPS,
+                      help='ping-pong round trips')
+    parser.add_option('-b', '--budgets', dest='budgets', default=','.join(map(str, BUDGETS)),
+                      help='comma separated max spin budgets, in seconds, 0 is the blocking wait')
+    parser.add_option('--hubs', dest='hubs', default=','.join(HUBS),
+                      help='comma separated hubs')
+    opts, args = parser.parse_args()
+
+    for hub in opts.hubs.split(','):
+        for budget in [float(b) for b in opts.budgets.split(',')]:
+            samples, stats = bench(hub, budget, opts.round_trips)
+            count = len(samples)
+            print("%-17s budget %6.0fus: p50 %.1fus p99 %.1fus mean %.1fus" % (
+                hub, budget * 1e6, samples[count // 2] * 1e6, samples[count * 99 // 100] * 1e6,
+                sum(samples) / count * 1e6))
+            if stats is not None:
+                print("    spins %(spins)d hits %(hits)d (%(hit_ratio).0f%%) spin %(spin_time).3fs"
+                      " (%(spin_per_hit_us).1fus/hit) blocks %(blocks)d, budget now %(budget_us).1fus" % dict(
+                          stats, hit_ratio=stats['hit_ratio'] * 100, spin_per_hit_us=stats['spin_per_hit'] * 1e6,
+                          budget_us=stats['budget'] * 1e6))
@@ -0,0 +1,79 @@
+"""Compare the v1_epolls_linuxfd hub epoll modes, level-triggered registration
+per wait against edge-triggered registration once per fd, with request/response
+round trips over localhost connections."""
+from __future__ import print_function
+
+import time
+
+import eventlet
+from eventlet import hubs
+from eventlet.hubs import v1_epolls_linuxfd
+
+
+CONNECTIONS = (1, 10, 100)
+ROUND_TRIPS = 20000
+MODES = v1_epolls_linuxfd.EPOLL_MODES
+
+
+def echo(sock):
+    recv = sock.recv
+    sendall = sock.sendall
+    while True:
+        data = recv(4096)
+        if not data:
+            break
+        sendall(data)
+    sock.close()
+
+
+def serve(server):
+    while True:
+        sock, _ = server.accept()
+        eventlet.spawn_n(echo, sock)
+
+
+def client(addr, round_trips):
+    sock = eventlet.connect(addr)
+    recv = sock.recv
+    sendall = sock.sendall
+    for _ in range(round_trips):
+        sendall(b'ping')
+        recv(4096)
+    sock.close()
+
+
+def bench(mode, connections, round_trips):
+    hubs.use_hub(v1_epolls_linuxfd, epoll_mode=mode)
+    server = eventlet.listen(('127.0.0.1', 0))
+    server_gt = eventlet.spawn(serve, server)
+    addr = server.getsockname()
+
+    per_client = max(1, round_trips // connections)
+    start = time.time()
+    pool = eventlet.GreenPool(connections)
+    for _ in range(connections):
+        pool.spawn(client, addr, per_client)
+    pool.waitall()
+    elapsed = time.time() - start
+
+    server_gt.kill()
+    server.close()
+    return elapsed, per_client * connections
+
+
+if __name__ == "__main__":
+    import optparse
+    parser = optparse.OptionParser()
+    parser.add_option('-c', '--connections', dest='connections', default=','.join(map(str, CONNECTIONS)),
+                      help='comma separated numbers of concurrent connections')
+    parser.add_option('-n', '--round-trips', dest='round_trips', type='int', default=ROUND_TRIPS,
+                      help='total request/response round trips')
+    parser.add_option('-m', '--modes', dest='modes', default=','.join(MODES),
+                      help='comma separated epoll modes')
+    opts, args = parser.parse_args()
+
+    for connections in [int(c) for c in opts.connections.split(',')]:
+        for mode in opts.modes.split(','):
+            elapsed, count = bench(mode, connections, opts.round_trips)
+            print("%-5s %4d connections: %d round trips %.3fs (%.2fus/round trip)" % (
+                mode, connections, count, elapsed, elapsed / count * 1e6))
@@ -0,0 +1,118 @@
+"""Compare the fd table of the linuxfd hubs, FdTable of lists indexed by fileno,
+against the former dict of HubFileDetails, at many connections: the memory
+of the structure with a reader per fileno, the add & remove of a listener,
+and the dispatch time per event, of the events loop of v1_epolls_linuxfd.
+The structures are measured without sockets, so any number of filenos is
+measured regardless of the open files limit."""
+from __future__ import print_function
+
+import time
+import tracemalloc
+
+import eventlet
+from eventlet.hubs.v1_skeleton import FdListener, FdTable, HubFileDetails
+
+select = eventlet.patcher.original('select')
+
+
+CONNECTIONS = (1000, 50000)
+ROUNDS = 20
+READ_MASK = select.EPOLLIN | select.EPOLLPRI | select.EPOLLHUP
+WRITE_MASK = select.EPOLLOUT
+
+
+def noop(fileno):
+    pass
+
+
+def listeners(count):
+    return [FdListener(0, fileno, noop, noop, None) for fileno in range(count)]
+
+
+def build_dict(readers):
+    fds = {}
+    for listener in readers:
+        fds[listener.fileno] = HubFileDetails(listener, True)
+    return fds
+
+
+def build_table(readers):
+    fds = FdTable()
+    for listener in readers:
+        fds.open(listener.fileno)
+        fds.add(listener.fileno, listener, True, True)
+    return fds
+
+
+def dispatch_dict(fds, events):
+    for f, ev, details in [(f, ev, fds.get(f)) for f, ev in events if f in fds]:
+        ev & READ_MASK and details.rs and details.rs[0]()
+        ev & WRITE_MASK and details.ws and details.ws[0]()
+
+
+def dispatch_table(fds, events):
+    rs = fds.rs
+    ws = fds.ws
+    stale = fds.stale
+    stale.clear()
+    for f, ev in events:
+        if stale and f in stale:
+            continue
+        if ev & READ_MASK:
+            l = rs[f]
+            if l is not None:
+                l()
+        if ev & WRITE_MASK:
+            l = ws[f]
+            if l is not None:
+                l()
+
+
+def readd_dict(fds, readers):
+    for listener in readers:
+        fd = fds[listener.fileno]
+        fd.remove(listener, True)
+        fd.add(listener, True, True)
+
+
+def readd_table(fds, readers):
+    for listener in readers:
+        fds.remove(listener.fileno, listener, True)
+        fds.add(listener.fileno, listener, True, True)
+
+
+def measure(build, dispatch, readd, count):
+    readers = listeners(count)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    fds = build(readers)
+    memory = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    events = [(fileno, select.EPOLLIN) for fileno in range(count)]
+    best = None
+    for _ in range(ROUNDS):
+        start = time.time()
+        dispatch(fds, events)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    start = time.time()
+    readd(fds, readers)
+    readd_time = time.time() - start
+    return memory, best, readd_time
+
+
+if __name__ == "__main__":
+    import optparse
+    parser = optparse.OptionParser()
+    parser.add_option('-c', '--connections', dest='connections', default=','.join(map(str, CONNECTIONS)),
+                      help='comma separated numbers of connections')
+    opts, args = parser.parse_args()
+
+    for count in [int(c) for c in opts.connections.split(',')]:
+        for name, build, dispatch, readd in (('dict', build_dict, dispatch_dict, readd_dict),
+                                             ('FdTable', build_table, dispatch_table, readd_table)):
+            memory, dispatch_time, readd_time = measure(build, dispatch, readd, count)
+            print("%-8s %6d connections: %.1f bytes/fileno, dispatch %.1fns/event, remove+add %.1fns/listener" % (
+                name, count, float(memory) / count, dispatch_time / count * 1e9, readd_time / count * 1e9))
@@ -0,0 +1,111 @@
+"""Compare the io_uring hub against the epoll hubs, with request/response
+round trips over localhost connections, of green sockets waiting on readiness
+and of ultra green sockets, which recv_into & sendall are io_uring operations
+on the iouring hub."""
+from __future__ import print_function
+
+import time
+
+import eventlet
+from eventlet import hubs
+from eventlet.greenio.ultra import UltraGreenSocket
+from eventlet.hubs import iouring
+
+socket = eventlet.patcher.original('socket')
+
+
+CONNECTIONS = (1, 10, 100)
+ROUND_TRIPS = 20000
+HUBS = ('v1_epolls_linuxfd', 'v1_epolls', 'iouring')
+SOCKETS = ('green', 'ultra')
+
+
+def echo(sock):
+    buff = bytearray(4096)
+    recv_into = sock.recv_into
+    sendall = sock.sendall
+    while True:
+        n = recv_into(buff)
+        if not n:
+            break
+        sendall(buff[:n])
+    sock.close()
+
+
+def serve(server):
+    while True:
+        sock, _ = server.accept()
+        eventlet.spawn_n(echo, sock)
+
+
+def connect(kind, addr):
+    if kind == 'green':
+        return eventlet.connect(addr)
+    sock = UltraGreenSocket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.connect(addr)
+    return sock
+
+
+def client(kind, addr, round_trips):
+    sock = connect(kind, addr)
+    buff = bytearray(4096)
+    recv_into = sock.recv_into
+    sendall = sock.sendall
+    for _ in range(round_trips):
+        sendall(b'ping')
+        recv_into(buff)
+    sock.close()
+
+
+def listen(kind):
+    if kind == 'green':
+        return eventlet.listen(('127.0.0.1', 0))
+    server = UltraGreenSocket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(128)
+    return server
+
+
+def bench(hub, kind, connections, round_trips):
+    hubs.use_hub(hub)
+    server = listen(kind)
+    server_gt = eventlet.spawn(serve, server)
+    addr = server.getsockname()
+
+    per_client = max(1, round_trips // connections)
+    start = time.time()
+    pool = eventlet.GreenPool(connections)
+    for _ in range(connections):
+        pool.spawn(client, kind, addr, per_client)
+    pool.waitall()
+    elapsed = time.time() - start
+
+    server_gt.kill()
+    server.close()
+    return elapsed, per_client * connections
+
+
+if __name__ == "__main__":
+    import optparse
+    parser = optparse.OptionParser()
+    parser.add_option('-c', '--connections', dest='connections', default=','.join(map(str, CONNECTIONS)),
+                      help='comma separated numbers of concurrent connections')
+    parser.add_option('-n', '--round-trips', dest='round_trips', type='int', default=ROUND_TRIPS,
+                      help='total request/response round trips')
+    parser.add_option('--hubs', dest='hubs', default=','.join(HUBS),
+                      help='comma separated hubs')
+    parser.add_option('-s', '--sockets', dest='sockets', default=','.join(SOCKETS),
+                      help='comma separated socket kinds, green or ultra')
+    opts, args = parser.parse_args()
+
+    hub_names = opts.hubs.split(',')
+    if 'iouring' in hub_names and not iouring.is_available():
+        print("io_uring is not available")
+        hub_names.remove('iouring')
+
+    for connections in [int(c) for c in opts.connections.split(',')]:
+        for kind in opts.sockets.split(','):
+            for hub in hub_names:
+                elapsed, count = bench(hub, kind, connections, opts.round_trips)
+                print("%-17s %-5s %4d connections: %d round trips %.3fs (%.2fus/round trip)" % (
+                    hub, kind, connections, count, elapsed, elapsed / count * 1e6))
@@ -0,0 +1,81 @@
+"""Benchmark the hub per OS thread mode, use_hub(per_thread=True).
+The single thread loop of spawns & switches, on the process hub and on the
+thread's hub, shows the cost of the thread-local lookup of the hub,
+then the same total work, of greenthreads hashing blocks (hashlib releases
+the GIL), spread on hub threads."""
+from __future__ import print_function
+
+import hashlib
+import time
+
+import eventlet
+from eventlet import hubs
+import six
+
+threading = eventlet.patcher.original('threading')
+
+
+SPAWNS = 100000
+THREADS = (1, 2, 4)
+BLOCKS = 2000
+BLOCK_SIZE = 1 << 20
+GREENTHREADS = 10
+
+
+def noop():
+    pass
+
+
+def spawn_loop(count):
+    start = time.time()
+    for _ in six.moves.range(count):
+        eventlet.spawn_n(noop)
+        eventlet.sleep(0)
+    return time.time() - start
+
+
+def hashing(blocks):
+    block = b'x' * BLOCK_SIZE
+
+    def work(n):
+        for _ in six.moves.range(n):
+            hashlib.sha256(block).digest()
+            eventlet.sleep(0)
+    pool = eventlet.GreenPool(GREENTHREADS)
+    for _ in six.moves.range(GREENTHREADS):
+        pool.spawn_n(work, blocks // GREENTHREADS)
+    pool.waitall()
+
+
+def threads_run(threads, blocks):
+    hubs.use_hub(per_thread=True)
+    workers = [threading.Thread(target=hashing, args=(blocks // threads,)) for _ in six.moves.range(threads)]
+    start = time.time()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return time.time() - start
+
+
+if __name__ == "__main__":
+    import optparse
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--spawns', dest='spawns', type='int', default=SPAWNS,
+                      help='spawns & switches of the single thread loop')
+    parser.add_option('-t', '--threads', dest='threads', default=','.join(map(str, THREADS)),
+                      help='comma separated numbers of hub threads')
+    parser.add_option('-b', '--blocks', dest='blocks', type='int', default=BLOCKS,
+                      help='total blocks of 1MB to hash')
+    opts, args = parser.parse_args()
+
+    for per_thread in (False, True):
+        hubs.use_hub(per_thread=per_thread)
+        best = min(spawn_loop(opts.spawns) for _ in range(3))
+        print("single thread, %-10s hub: %d spawns %.3fs (%.2fus/spawn)" % (
+            'per_thread' if per_thread else 'process', opts.spawns, best, best / opts.spawns * 1e6))
+
+    for threads in [int(t) for t in opts.threads.split(',')]:
+        elapsed = threads_run(threads, opts.blocks)
+        print("%d hub threads: %d blocks hashed %.3fs (%.1f MB/s)" % (
+            threads, opts.blocks, elapsed, opts.blocks * BLOCK_SIZE / elapsed / 1e6))
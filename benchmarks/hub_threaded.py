@@ -0,0 +1,69 @@
+"""Compare the threaded hubs, of which a waiter thread polls and hands over the
+events batches, against the non-threaded hubs, with many active sockets:
+every pair of connected sockets has an echo greenthread and a client greenthread
+doing round trips at the same time."""
+from __future__ import print_function
+
+import resource
+import time
+
+import eventlet
+from eventlet import hubs
+from eventlet.green import socket
+
+
+SOCKETS = (1000, 10000)
+ROUND_TRIPS = 10
+HUBS = ('v1_epolls_threaded', 'v1_epolls', 'v1_epolls_linuxfd')
+
+
+def echo(sock):
+    buff = bytearray(64)
+    while True:
+        n = sock.recv_into(buff)
+        if not n:
+            break
+        sock.sendall(buff[:n])
+    sock.close()
+
+
+def client(sock, round_trips):
+    buff = bytearray(64)
+    for _ in range(round_trips):
+        sock.sendall(b'ping')
+        sock.recv_into(buff)
+    sock.close()
+
+
+def bench(hub, sockets, round_trips):
+    hubs.use_hub(hub)
+    pairs = [socket.socketpair() for _ in range(sockets // 2)]
+    pool = eventlet.GreenPool(sockets)
+    start = time.time()
+    for a, b in pairs:
+        pool.spawn(echo, b)
+        pool.spawn(client, a, round_trips)
+    pool.waitall()
+    return time.time() - start, len(pairs) * round_trips
+
+
+if __name__ == "__main__":
+    import optparse
+    parser = optparse.OptionParser()
+    parser.add_option('-s', '--sockets', dest='sockets', default=','.join(map(str, SOCKETS)),
+                      help='comma separated numbers of active sockets')
+    parser.add_option('-n', '--round-trips', dest='round_trips', type='int', default=ROUND_TRIPS,
+                      help='round trips of each pair of sockets')
+    parser.add_option('--hubs', dest='hubs', default=','.join(HUBS),
+                      help='comma separated hubs')
+    opts, args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    for sockets in [int(s) for s in opts.sockets.split(',')]:
+        if sockets + 100 > soft:
+            print("%d sockets: over the open files limit %d" % (sockets, soft))
+            continue
+        for hub in opts.hubs.split(','):
+            elapsed, count = bench(hub, sockets, opts.round_trips)
+            print("%-18s %6d sockets: %d round trips %.3fs (%.2fus/round trip)" % (
+                hub, sockets, count, elapsed, elapsed / count * 1e6))
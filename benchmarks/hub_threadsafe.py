@@ -0,0 +1,87 @@
+"""Benchmark the cross-thread calls to the hub, hub.call_soon_threadsafe.
+A burst of calls from an OS thread, with the wakeups counted to show the
+coalescing, and the round trips of tpool.execute, of which the results are
+delivered with call_soon_threadsafe."""
+from __future__ import print_function
+
+import time
+
+import eventlet
+from eventlet import hubs, tpool
+
+threading = eventlet.patcher.original('threading')
+
+
+CALLS = 100000
+EXECUTES = 10000
+GREENTHREADS = (1, 10)
+
+
+def burst(count):
+    hub = hubs.get_hub()
+    hub_class = type(hub)
+    wakeup = hub_class.wakeup
+    wakeups = [0]
+
+    def counted_wakeup(self):
+        wakeups[0] += 1
+        wakeup(self)
+    hub_class.wakeup = counted_wakeup
+
+    done = [0]
+    finished = eventlet.event.Event()
+
+    def call():
+        done[0] += 1
+
+    def producer():
+        for _ in range(count):
+            hub.call_soon_threadsafe(call)
+        hub.call_soon_threadsafe(finished.send)
+
+    eventlet.sleep(0)
+    start = time.time()
+    t = threading.Thread(target=producer)
+    t.start()
+    finished.wait()
+    elapsed = time.time() - start
+    t.join()
+    hub_class.wakeup = wakeup
+    assert done[0] == count
+    return elapsed, wakeups[0]
+
+
+def noop(n):
+    return n
+
+
+def executes(count, greenthreads):
+    def loop(n):
+        for i in range(n):
+            tpool.execute(noop, i)
+    pool = eventlet.GreenPool(greenthreads)
+    start = time.time()
+    for _ in range(greenthreads):
+        pool.spawn(loop, count // greenthreads)
+    pool.waitall()
+    return time.time() - start
+
+
+if __name__ == "__main__":
+    import optparse
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--calls', dest='calls', type='int', default=CALLS,
+                      help='calls of the burst from an OS thread')
+    parser.add_option('-e', '--executes', dest='executes', type='int', default=EXECUTES,
+                      help='tpool.execute round trips')
+    opts, args = parser.parse_args()
+
+    print("hub: %s" % hubs.get_hub().__module__)
+    elapsed, wakeups = burst(opts.calls)
+    print("burst: %d calls %.3fs (%.2fus/call), %d wakeups" % (
+        opts.calls, elapsed, elapsed / opts.calls * 1e6, wakeups))
+    for greenthreads in GREENTHREADS:
+        best = min(executes(opts.executes, greenthreads) for _ in range(3))
+        print("tpool.execute, %d greenthreads: %d calls %.3fs (%.2fus/call)" % (
+            greenthreads, opts.executes, best, best / opts.executes * 1e6))
+    tpool.killall()
@@ -0,0 +1,93 @@
+"""Compare the v1_epolls_linuxfd hub timerfd modes, a timerfd per timer against
+timers multiplexed onto a single timerfd, at a number of pending timers."""
+from __future__ import print_function
+
+import random
+import time
+
+import eventlet
+from eventlet import hubs
+from eventlet.hubs import v1_epolls_linuxfd
+import six
+
+
+COUNTS = (10000, 100000, 1000000)
+MODES = (v1_epolls_linuxfd.TIMERFD_PER_TIMER, v1_epolls_linuxfd.TIMERFD_SINGLE)
+
+
+def noop():
+    pass
+
+
+def raise_fd_limit():
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def schedule(hub, count, low, high, cb):
+    timers = []
+    try:
+        for i in six.moves.range(count):
+            timers.append(hub.schedule_call_global(random.uniform(low, high), cb))
+    except EnvironmentError as e:
+        for t in timers:
+            t.cancel()
+        raise RuntimeError('failed at %d pending timers: %s' % (len(timers), e))
+    return timers
+
+
+def bench(mode, count):
+    hubs.use_hub(v1_epolls_linuxfd, timerfd_mode=mode)
+    hub = hubs.get_hub()
+    eventlet.sleep(0)  # start the hub
+
+    # schedule & cancel, the socket timeouts case
+    start = time.time()
+    timers = schedule(hub, count, 60, 120, noop)
+    added = time.time() - start
+    start = time.time()
+    for t in timers:
+        t.cancel()
+    canceled = time.time() - start
+    del timers[:]
+
+    # schedule & expire
+    fired = []
+
+    def fire():
+        fired.append(None)
+    start = time.time()
+    schedule(hub, count, 0, 0.1, fire)
+    while len(fired) < count:
+        eventlet.sleep(0.01)
+    expired = time.time() - start
+    return added, canceled, expired
+
+
+if __name__ == "__main__":
+    import optparse
+    parser = optparse.OptionParser()
+    parser.add_option('-c', '--counts', dest='counts', default=','.join(map(str, COUNTS)),
+                      help='comma separated numbers of pending timers')
+    parser.add_option('-m', '--modes', dest='modes', default=','.join(MODES),
+                      help='comma separated timerfd modes')
+    opts, args = parser.parse_args()
+
+    raise_fd_limit()
+    for count in [int(c) for c in opts.counts.split(',')]:
+        for mode in opts.modes.split(','):
+            try:
+                added, canceled, expired = bench(mode, count)
+            except RuntimeError as e:
+                print("%-10s %8d: %s" % (mode, count, e))
+                continue
+            print("%-10s %8d: add %.3fs (%.2fus/timer) cancel %.3fs (%.2fus/timer) expire %.3fs (%.2fus/timer)" % (
+                mode, count,
+                added, added / count * 1e6,
+                canceled, canceled / count * 1e6,
+                expired, expired / count * 1e6))
@@ -1,38 +1,91 @@
-'''Benchmark timer adds & expires on hubs.hub.BaseHub
-'''
-import contextlib
+"""Benchmark timer adds, cancels & expires on the hubs timer backends,
+the heap of timers against the timing wheel, with most of the timers canceled
+before expiring, the socket timeouts case.
+The hub runs between batches of adds and cancels, the expire time includes
+the wait for the timers to be due."""
+from __future__ import print_function
+
 import random
+import time
 
 import eventlet
-import benchmarks
-from eventlet.hubs import active_hub
+from eventlet import hubs
+from eventlet.hubs import v1_base
 import six
 
 
-l = []
-hub = active_hub.inst
+COUNTS = (10000, 100000, 1000000)
+BACKENDS = v1_base.TIMER_BACKENDS
+CANCEL_RATIO = 0.99
+BATCH = 100  # timers per hub loop iteration
+
+
+def noop():
+    pass
+
+
+def bench(hub_name, backend, count, cancel_ratio):
+    hubs.use_hub(hub_name, timer_backend=backend)
+    hub = hubs.get_hub()
+    eventlet.sleep(0)  # start the hub
 
+    # schedule & cancel most, the socket timeouts case
+    keep = int(count * (1 - cancel_ratio))
+    timers = []
+    add = timers.append
+    start = time.time()
+    for i in six.moves.range(count):
+        add(hub.schedule_call_global(random.uniform(60, 120), noop))
+        if not i % BATCH:
+            eventlet.sleep(0)  # let the hub take in the timers
+    added = time.time() - start
 
-def work(n):
-    l.append(n)
+    random.shuffle(timers)
+    start = time.time()
+    for i, t in enumerate(timers[keep:]):
+        t.cancel()
+        if not i % BATCH:
+            eventlet.sleep(0)
+    canceled = time.time() - start
+    eventlet.sleep(0)
+    held = hub.get_timers_count()  # the canceled timers the backend still holds
+    del timers[keep:]
 
+    # schedule & expire, with the timers left pending
+    fired = []
 
-@contextlib.contextmanager
-def setup(iters):
-    l[:] = []
-    timeouts = [random.uniform(0, 10) for x in six.moves.range(iters)]
-    yield timeouts
+    def fire():
+        fired.append(None)
+    start = time.time()
+    for i in six.moves.range(keep):
+        hub.schedule_call_global(random.uniform(0, 0.1), fire)
+    while len(fired) < keep:
+        eventlet.sleep(0.01)
+    expired = time.time() - start
 
+    for t in timers:
+        t.cancel()
+    return added, canceled, held, expired
 
-@benchmarks.configure(manager=setup, scale_factor=3)
-def benchmark_hub_timers(timeouts):
-    scheduled = []
 
-    for timeout in timeouts:
-        t = eventlet.Timer(timeout, work, timeout)
-        t.schedule()
-        scheduled.append(t)
+if __name__ == "__main__":
+    import optparse
+    parser = optparse.OptionParser()
+    parser.add_option('-c', '--counts', dest='counts', default=','.join(map(str, COUNTS)),
+                      help='comma separated numbers of timers')
+    parser.add_option('-b', '--backends', dest='backends', default=','.join(BACKENDS),
+                      help='comma separated timer backends')
+    parser.add_option('-r', '--cancel-ratio', dest='cancel_ratio', type='float', default=CANCEL_RATIO,
+                      help='ratio of the timers canceled before expiring')
+    parser.add_option('--hub', dest='hub', default='v1_epolls',
+                      help='hub to benchmark')
+    opts, args = parser.parse_args()
 
-    hub.prepare_timers()
-    hub.fire_timers(hub.clock() + 11)
-    hub.prepare_timers()
+    for count in [int(c) for c in opts.counts.split(',')]:
+        for backend in opts.backends.split(','):
+            added, canceled, held, expired = bench(opts.hub, backend, count, opts.cancel_ratio)
+            print("%-5s %8d: add %.3fs (%.2fus/timer) cancel %.3fs (%.2fus/timer) held %d expire %.3fs" % (
+                backend, count,
+                added, added / count * 1e6,
+                canceled, canceled / count * 1e6,
+                held, expired))
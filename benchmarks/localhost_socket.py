@@ -1,4 +1,8 @@
-"""Benchmark evaluating eventlet's performance at speaking to itself over a localhost socket."""
+"""Benchmark evaluating eventlet's performance at speaking to itself over a localhost socket.
+
+With --ultra, the request/response loop of UltraGreenSocket servers, of pipelined requests,
+counts the greenlet switches, recv syscalls & trampolines per request of the optimistic read,
+the recv tried first, against the read trampolined before every recv."""
 from __future__ import print_function
 
 import time
@@ -85,6 +89,105 @@ def launch_heavy_threads():
         t.join()
 
 
+REQUEST = b'x' * 64
+RESPONSE = b'y' * 16
+PIPELINE = 8
+REQUESTS = 20000
+
+
+def ultra_counting_socket(trampoline_first):
+    from eventlet.greenio.ultra import UltraGreenSocket
+
+    class CountingSocket(UltraGreenSocket):
+        __slots__ = []
+        counts = {'recv': 0, 'trampoline': 0}
+
+        def _recv_loop(self, recv_meth, empty_val, *args):
+            counts = self.counts
+
+            def counted(*args):
+                counts['recv'] += 1
+                return recv_meth(*args)
+            if trampoline_first:
+                # the read waited before any recv, as of a socket not known to be readable
+                self._trampoline(read=True, timeout=self._timeout)
+            return UltraGreenSocket._recv_loop(self, counted, empty_val, *args)
+
+        def _trampoline(self, **kw):
+            self.counts['trampoline'] += 1
+            return UltraGreenSocket._trampoline(self, **kw)
+
+    return CountingSocket
+
+
+def ultra_server(server_sock, socket_impl):
+    client, addr = server_sock.accept()
+    # as UltraGreenSocket.accept, a fileno of a closed socket can be reused
+    eventlet.hubs.notify_opened(client.fileno())
+    sock = socket_impl(fd=client)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    size = len(REQUEST)
+    with sock:
+        while True:
+            got = 0
+            while got < size:
+                d = sock.recv(size - got)
+                if not d:
+                    return
+                got += len(d)
+            sock.sendall(RESPONSE)
+
+
+def ultra_client(addr, requests):
+    from eventlet.greenio.ultra import UltraGreenSocket
+    sock = UltraGreenSocket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.connect(addr)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    size = len(RESPONSE) * PIPELINE
+    buff = bytearray(size)
+    for _ in six.moves.range(requests // PIPELINE):
+        sock.sendall(REQUEST * PIPELINE)
+        got = 0
+        while got < size:
+            got += sock.recv_into(memoryview(buff)[got:])
+    sock.close()
+
+
+def launch_ultra_requests(trampoline_first, requests):
+    import greenlet
+    socket_impl = ultra_counting_socket(trampoline_first)
+    server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server_sock.bind(('localhost', 0))
+    server_sock.listen(50)
+    addr = server_sock.getsockname()
+    server = eventlet.spawn(ultra_server, server_sock, socket_impl)
+
+    switches = [0]
+
+    def trace(event, args):
+        if event == 'switch':
+            switches[0] += 1
+    start = time.time()
+    greenlet.settrace(trace)
+    try:
+        ultra_client(addr, requests)
+        server.wait()
+    finally:
+        greenlet.settrace(None)
+    elapsed = time.time() - start
+    server_sock.close()
+    return elapsed, switches[0], dict(socket_impl.counts)
+
+
+def report_ultra_requests(requests):
+    for name, trampoline_first in (('trampoline first', True), ('optimistic', False)):
+        elapsed, switches, counts = launch_ultra_requests(trampoline_first, requests)
+        print("%-16s %d requests, pipeline %d: %.2fus/request, %.2f switches/request,"
+              " %.2f recv/request, %.2f trampolines/request" % (
+                  name, requests, PIPELINE, elapsed / requests * 1e6, float(switches) / requests,
+                  float(counts['recv']) / requests, float(counts['trampoline']) / requests))
+
+
 if __name__ == "__main__":
     import optparse
     parser = optparse.OptionParser()
@@ -97,12 +200,23 @@ if __name__ == "__main__":
                       default=CONCURRENCY)
     parser.add_option('-t', '--tries', type='int', dest='tries',
                       default=TRIES)
+    parser.add_option('--ultra', action='store_true', dest='ultra', default=False,
+                      help='UltraGreenSocket requests: optimistic read against trampoline first')
+    parser.add_option('-p', '--pipeline', type='int', dest='pipeline', default=PIPELINE,
+                      help='pipelined requests per client write, of --ultra')
+    parser.add_option('-r', '--requests', type='int', dest='requests', default=REQUESTS,
+                      help='requests of --ultra')
 
     opts, args = parser.parse_args()
     BYTES = opts.bytes
     SIZE = opts.size
     CONCURRENCY = opts.concurrency
     TRIES = opts.tries
+    PIPELINE = opts.pipeline
+
+    if opts.ultra:
+        report_ultra_requests(opts.requests)
+        raise SystemExit
 
     funcs = [launch_green_threads]
     if opts.threading:
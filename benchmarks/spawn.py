@@ -84,3 +84,28 @@ best = benchmarks.measure_best(
 print("eventlet.GreenPool.spawn", best[run_pool_spawn])
 print("eventlet.GreenPool.spawn_n", best[run_pool_spawn_n])
 print("%% %0.1f" % ((best[run_pool_spawn] - best[run_pool_spawn_n]) / best[run_pool_spawn_n] * 100))
+
+
+# the run-queue against the zero seconds timer it replaced
+hub = eventlet.hubs.get_hub()
+
+
+def run_call_soon():
+    g = eventlet.greenthread.GreenThread(hub.greenlet)
+    hub.call_soon(g.switch, dummy, (1,), {})
+
+
+def run_timer_zero():
+    g = eventlet.greenthread.GreenThread(hub.greenlet)
+    hub.schedule_call_global(0, g.switch, dummy, (1,), {})
+
+
+best = benchmarks.measure_best(
+    5, iters,
+    'pass',
+    cleanup,
+    run_call_soon,
+    run_timer_zero)
+print("hub.call_soon", best[run_call_soon])
+print("hub.schedule_call_global(0)", best[run_timer_zero])
+print("%% %0.1f" % ((best[run_timer_zero] - best[run_call_soon]) / best[run_call_soon] * 100))
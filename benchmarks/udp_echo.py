@@ -0,0 +1,111 @@
+"""UDP echo of green datagram sockets: the server of recvfrom & sendto per datagram,
+against recv_many & send_many, of recvmmsg & sendmmsg or of their loops until EAGAIN
+(EVENTLET_NO_MMSG=1).  Clients of a child process send windows of datagrams and wait for
+their echo, the throughput and the CPU of the server are measured."""
+from __future__ import print_function
+
+import resource
+import subprocess
+import sys
+import time
+
+import eventlet
+from eventlet.green import socket
+from eventlet.greenio import mmsg
+
+
+DATAGRAMS = 100000
+SIZE = 64
+WINDOW = 32
+CLIENTS = 4
+BATCH = 64
+TRIES = 3
+
+
+def serve_single(sock):
+    recvfrom = sock.recvfrom
+    sendto = sock.sendto
+    while True:
+        data, addr = recvfrom(2048)
+        sendto(data, addr)
+
+
+batches = [0, 0]  # recv_many calls & datagrams of the server
+
+
+def serve_many(sock):
+    recv_many = sock.recv_many
+    send_many = sock.send_many
+    while True:
+        msgs = recv_many(BATCH, 2048)
+        batches[0] += 1
+        batches[1] += len(msgs)
+        send_many(msgs)
+
+
+def client(addr, count, window):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    payload = b'x' * SIZE
+    burst = [(payload, addr)] * window
+    done = 0
+    while done < count:
+        sock.send_many(burst)
+        received = 0
+        while received < window:
+            received += len(sock.recv_many(window, 2048))
+        done += window
+    sock.close()
+
+
+def cpu():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def clients(addr, datagrams):
+    threads = [eventlet.spawn(client, addr, datagrams // CLIENTS, WINDOW) for _ in range(CLIENTS)]
+    for thread in threads:
+        thread.wait()
+
+
+def bench(serve, datagrams):
+    best = None
+    for _ in range(TRIES):
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(('127.0.0.1', 0))
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        server_thread = eventlet.spawn(serve, server)
+        start = time.time()
+        start_cpu = cpu()
+        child = subprocess.Popen([sys.executable, __file__, '-n', str(datagrams),
+                                  '--clients', str(server.getsockname()[1])])
+        while child.poll() is None:
+            eventlet.sleep(0.01)
+        result = time.time() - start, cpu() - start_cpu
+        server_thread.kill()
+        server.close()
+        best = result if best is None else min(best, result)
+    return best
+
+
+if __name__ == "__main__":
+    import optparse
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--datagrams', type='int', dest='datagrams', default=DATAGRAMS,
+                      help='datagrams echoed of each run')
+    parser.add_option('--clients', type='int', dest='port',
+                      help='run the clients of the server of this port')
+    opts, args = parser.parse_args()
+
+    if opts.port:
+        clients(('127.0.0.1', opts.port), opts.datagrams)
+        sys.exit(0)
+
+    for name, serve in (('recvfrom/sendto', serve_single), ('recv_many/send_many', serve_many)):
+        elapsed, server_cpu = bench(serve, opts.datagrams)
+        print("%-20s %s %.0f datagrams/s, server CPU %.2f us/datagram" % (
+            name, 'mmsg' if mmsg.MMSG else 'loop', opts.datagrams / elapsed,
+            server_cpu / opts.datagrams * 1e6))
+    print("%.1f datagrams per recv_many" % (float(batches[1]) / batches[0]))
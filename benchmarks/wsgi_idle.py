@@ -0,0 +1,90 @@
+"""Memory of idle keepalive connections of eventlet.wsgi.server, of a green thread blocked in
+the read of the next request each, against parked connections (wsgi.server(park_idle=True)).
+A child process opens the connections, makes a request on each and keeps them open,
+the growth of the Python allocations and of the resident memory of the server is measured."""
+from __future__ import print_function
+
+import os
+import subprocess
+import sys
+import tracemalloc
+
+import eventlet
+from eventlet import wsgi
+from eventlet.hubs import notify_opened, trampoline
+
+
+CONNECTIONS = 5000
+PAGE = os.sysconf('SC_PAGE_SIZE')
+
+
+def app(environ, start_response):
+    start_response('200 OK', [('Content-Length', '2')])
+    return [b'ok']
+
+
+def rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * PAGE
+
+
+def clients(addr, count, ready_fd):
+    socks = []
+    for _ in range(count):
+        sock = eventlet.connect(addr)
+        sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        socks.append(sock)
+    for sock in socks:
+        got = b''
+        while not got.endswith(b'ok'):
+            got += sock.recv(1024)
+    os.write(ready_fd, b'x')
+    # idle until the server is measured
+    sys.stdin.read()
+
+
+def bench(park_idle, count):
+    sock = eventlet.listen(('127.0.0.1', 0), backlog=1024)
+    server = eventlet.spawn(wsgi.server, sock, app, park_idle=park_idle, log_output=False,
+                            max_size=count + 10)
+    eventlet.sleep(0.1)
+    ready_r, ready_w = os.pipe()
+    notify_opened(ready_r)
+    base_rss = rss()
+    tracemalloc.start()
+    child = subprocess.Popen([sys.executable, __file__, '-n', str(count), '--clients',
+                              str(sock.getsockname()[1]), '--ready', str(ready_w)],
+                             stdin=subprocess.PIPE, pass_fds=(ready_w,))
+    trampoline(ready_r, read=True)
+    os.read(ready_r, 1)
+    eventlet.sleep(0.5)
+    traced = tracemalloc.get_traced_memory()[0]
+    grown = rss() - base_rss
+    tracemalloc.stop()
+    child.stdin.close()
+    child.wait()
+    server.kill()
+    os.close(ready_r)
+    os.close(ready_w)
+    return traced / count, grown / count
+
+
+if __name__ == "__main__":
+    import optparse
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--connections', type='int', dest='connections', default=CONNECTIONS,
+                      help='idle connections')
+    parser.add_option('--clients', type='int', dest='port',
+                      help='run the clients of the server of this port')
+    parser.add_option('--ready', type='int', dest='ready')
+    opts, args = parser.parse_args()
+
+    if opts.port:
+        clients(('127.0.0.1', opts.port), opts.connections, opts.ready)
+        sys.exit(0)
+
+    # parked first, the RSS of the other run reuses the memory freed
+    for park_idle in (True, False):
+        traced, grown = bench(park_idle, opts.connections)
+        print("park_idle=%-5s %6.0f bytes of Python allocations, %6.0f bytes of RSS per idle connection" % (
+            park_idle, traced, grown))
@@ -0,0 +1,96 @@
+"""Requests per second of eventlet.wsgi.server of the stdlib parser, of BaseHTTPRequestHandler,
+against the fast parser of the receive buffer (wsgi.server(parser='fast')),
+optionally of the keepalive and header timeouts (-t).
+Keepalive clients of a child process send requests of browser-like headers to a small
+application, the rate and the CPU of the server are measured."""
+from __future__ import print_function
+
+import resource
+import subprocess
+import sys
+import time
+
+import eventlet
+from eventlet import wsgi
+from eventlet.greenio import GreenStreamReader
+
+
+REQUESTS = 20000
+CLIENTS = 8
+TRIES = 3
+REQUEST = (b'GET /api/items?page=2&sort=name HTTP/1.1\r\n'
+           b'Host: localhost:8080\r\n'
+           b'User-Agent: Mozilla/5.0 (X11; Linux x86_64) Gecko/20100101 Firefox/115.0\r\n'
+           b'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8\r\n'
+           b'Accept-Language: en-US,en;q=0.5\r\n'
+           b'Accept-Encoding: gzip, deflate\r\n'
+           b'Cookie: session=0123456789abcdef; theme=dark\r\n'
+           b'X-Forwarded-For: 10.0.0.1\r\n'
+           b'Connection: keep-alive\r\n\r\n')
+BODY = b'hello world'
+
+
+def app(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain'), ('Content-Length', str(len(BODY)))])
+    return [BODY]
+
+
+def client(addr, count):
+    sock = eventlet.connect(addr)
+    reader = GreenStreamReader(sock)
+    for _ in range(count):
+        sock.sendall(REQUEST)
+        head = reader.readhead()
+        length = int(head.split(b'Content-Length: ', 1)[1].split(b'\r\n', 1)[0])
+        reader.readexactly(length)
+    sock.close()
+
+
+def clients(addr, requests):
+    threads = [eventlet.spawn(client, addr, requests // CLIENTS) for _ in range(CLIENTS)]
+    for thread in threads:
+        thread.wait()
+
+
+def cpu():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def bench(parser, requests, timeouts=None):
+    best = None
+    for _ in range(TRIES):
+        sock = eventlet.listen(('127.0.0.1', 0))
+        server = eventlet.spawn(wsgi.server, sock, app, parser=parser, log_output=False,
+                                keepalive_timeout=timeouts, header_timeout=timeouts)
+        start = time.time()
+        start_cpu = cpu()
+        child = subprocess.Popen([sys.executable, __file__, '-n', str(requests),
+                                  '--clients', str(sock.getsockname()[1])])
+        while child.poll() is None:
+            eventlet.sleep(0.01)
+        result = time.time() - start, cpu() - start_cpu
+        server.kill()
+        best = result if best is None else min(best, result)
+    return best
+
+
+if __name__ == "__main__":
+    import optparse
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--requests', type='int', dest='requests', default=REQUESTS,
+                      help='requests of each run')
+    parser.add_option('-t', '--timeouts', type='float', dest='timeouts',
+                      help='keepalive_timeout and header_timeout of the server')
+    parser.add_option('--clients', type='int', dest='port',
+                      help='run the clients of the server of this port')
+    opts, args = parser.parse_args()
+
+    if opts.port:
+        clients(('127.0.0.1', opts.port), opts.requests)
+        sys.exit(0)
+
+    for name in wsgi.PARSERS:
+        elapsed, server_cpu = bench(name, opts.requests, opts.timeouts)
+        print("%-6s %.0f requests/s, server CPU %.1f us/request" % (
+            name, opts.requests / elapsed, server_cpu / opts.requests * 1e6))
@@ -1,4 +1,5 @@
 import sys
+import time
 import warnings
 
 from eventlet import greenpool
@@ -97,7 +98,67 @@ def _stop_checker(t, server_gt, conn):
         greenthread.kill(server_gt, *sys.exc_info())
 
 
-def serve(sock, handle, concurrency=1000):
+ACCEPT_BATCH = 64
+
+
+class AcceptStats(object):
+    """Counters of an accept loop, of :func:`serve` or
+    :func:`eventlet.wsgi.server`, for monitoring.  Each wakeup of the loop
+    accepts a batch of connections, draining the listen backlog up to the
+    batch size.  :meth:`stats` returns:
+
+    * ``accepted``: connections accepted, ``batches``: wakeups of the loop
+    * ``mean_depth``, ``max_depth``: connections drained of a wakeup
+    * ``full_batches``: wakeups limited by the batch size, the backlog was
+      possibly deeper
+    * ``rate``: connections accepted per second since the previous
+      :meth:`stats`, ``mean_rate`` since the start
+    """
+
+    def __init__(self):
+        self.started = self._last_time = time.time()
+        self.accepted = self.batches = self.max_depth = self.full_batches = 0
+        self._last_accepted = 0
+
+    def record(self, depth, limit):
+        self.accepted += depth
+        self.batches += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if depth >= limit:
+            self.full_batches += 1
+
+    def stats(self):
+        now = time.time()
+        rate = (self.accepted - self._last_accepted) / max(now - self._last_time, 1e-9)
+        self._last_time, self._last_accepted = now, self.accepted
+        return {
+            'accepted': self.accepted,
+            'batches': self.batches,
+            'mean_depth': float(self.accepted) / self.batches if self.batches else 0.0,
+            'max_depth': self.max_depth,
+            'full_batches': self.full_batches,
+            'rate': rate,
+            'mean_rate': self.accepted / max(now - self.started, 1e-9),
+        }
+
+
+def accept_batch(sock, batch=ACCEPT_BATCH, stats=None):
+    """Accept a connection of *sock*, waiting for it, then the connections
+    already in its backlog up to *batch*.  Returns a list of
+    ``(socket, address)``; sockets without ``accept_many`` accept one.
+    *stats* is an :class:`AcceptStats` to record the batch in.
+    """
+    if batch > 1 and hasattr(sock, 'accept_many'):
+        accepted = sock.accept_many(batch)
+    else:
+        accepted = [sock.accept()]
+    if stats is not None:
+        stats.record(len(accepted), batch)
+    return accepted
+
+
+def serve(sock, handle, concurrency=1000, accept_batch_size=ACCEPT_BATCH, accept_stats=None):
     """Runs a server on the supplied socket.  Calls the function *handle* in a
     separate greenthread for every incoming client connection.  *handle* takes
     two arguments: the client socket object, and the client address::
@@ -126,15 +187,19 @@ def serve(sock, handle, concurrency=1000):
     greenthreads that will be open at any time handling requests.  When
     the server hits the concurrency limit, it stops accepting new
     connections until the existing ones complete.
+
+    Each wakeup accepts the connections of the listen backlog up to
+    *accept_batch_size*, then spawns their handlers, see :func:`accept_batch`.
+    Pass an :class:`AcceptStats` as *accept_stats* to monitor the accepts.
     """
     pool = greenpool.GreenPool(concurrency)
     server_gt = greenthread.getcurrent()
 
     while True:
         try:
-            conn, addr = sock.accept()
-            gt = pool.spawn(handle, conn, addr)
-            gt.link(_stop_checker, server_gt, conn)
+            for conn, addr in accept_batch(sock, accept_batch_size, accept_stats):
+                gt = pool.spawn(handle, conn, addr)
+                gt.link(_stop_checker, server_gt, conn)
             conn, addr, gt = None, None, None
         except StopServe:
             return
@@ -153,10 +218,69 @@ def wrap_ssl(sock, *a, **kw):
     no "naked" socket sitting around to accidentally corrupt the SSL
     session.
 
+    Server sockets may pass ``session_cache=True``: the socket is then
+    wrapped with the :func:`server_ssl_context` of its *certfile*, *keyfile*,
+    *ca_certs*, *cert_reqs* and *ciphers*, shared by the calls of the same
+    arguments, so the session cache and the tickets of the context resume
+    the handshakes of returning clients.  *session_tickets* and
+    *num_tickets* configure the tickets of the context.
+
     :return Green SSL object.
     """
+    if kw.pop('session_cache', False):
+        return _wrap_ssl_cached(sock, *a, **kw)
     return wrap_ssl_impl(sock, *a, **kw)
 
+
+def _wrap_ssl_cached(sock, keyfile=None, certfile=None, server_side=False,
+                     cert_reqs=None, ssl_version=None, ca_certs=None,
+                     do_handshake_on_connect=True,
+                     suppress_ragged_eofs=True, ciphers=None,
+                     session_tickets=True, num_tickets=None):
+    context = server_ssl_context(certfile, keyfile, ca_certs=ca_certs, cert_reqs=cert_reqs,
+                                 ciphers=ciphers, session_tickets=session_tickets,
+                                 num_tickets=num_tickets)
+    return context.wrap_socket(sock, server_side=server_side,
+                               do_handshake_on_connect=do_handshake_on_connect,
+                               suppress_ragged_eofs=suppress_ragged_eofs)
+
+
+_server_contexts = {}
+
+
+def server_ssl_context(certfile, keyfile=None, ca_certs=None, cert_reqs=None,
+                       ciphers=None, session_tickets=True, num_tickets=None):
+    """Return the SSL context of a TLS server, the same context for the same
+    arguments.  OpenSSL caches the sessions of a context, handshakes resume
+    only among the sockets of one context, e.g. wrapped with this context or
+    accepted from a listening socket of it.
+
+    :param session_tickets: Issue session tickets, the client keeps the state
+        of its session.  If false, sessions resume by their ID, of the server
+        cache of the context.
+    :param num_tickets: Tickets issued by a TLS 1.3 handshake, of Python 3.8
+        or later.
+    :return: A green :class:`ssl.SSLContext`, also accepted by
+        :meth:`~eventlet.greenio.ultra.UltraGreenSocket.ssl_wrap`.
+    """
+    key = (certfile, keyfile, ca_certs, cert_reqs, ciphers, session_tickets, num_tickets)
+    context = _server_contexts.get(key)
+    if context is None:
+        context = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+        context.load_cert_chain(certfile, keyfile)
+        if ca_certs is not None:
+            context.load_verify_locations(ca_certs)
+        if cert_reqs is not None:
+            context.verify_mode = cert_reqs
+        if ciphers is not None:
+            context.set_ciphers(ciphers)
+        if not session_tickets:
+            context.options |= ssl.OP_NO_TICKET
+        if num_tickets is not None and hasattr(context, 'num_tickets'):
+            context.num_tickets = num_tickets
+        _server_contexts[key] = context
+    return context
+
 try:
     from eventlet.green import ssl
     wrap_ssl_impl = ssl.wrap_socket
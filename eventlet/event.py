@@ -164,9 +164,9 @@ class Event(object):
         if exc is not None:
             self._exc = (exc,) if not isinstance(exc, tuple) else exc
 
-        schedule_call_global = active_hub.inst.schedule_call_global
+        call_soon = active_hub.inst.call_soon
         while self._waiters:
-            schedule_call_global(0, do_send, result, exc, self._waiters.pop())
+            call_soon(do_send, result, exc, self._waiters.pop())
         #
 
     def send_exception(self, *args):
@@ -32,6 +32,18 @@ class EventFd(object):
         return int(eventfd_read(self._fd))
         #
 
+    def send(self, count=1):
+        eventfd_write(self._fd, count)
+        #
+
+    def drain(self):
+        """ Read the count without waiting, 0 if not signaled """
+        try:
+            return int(eventfd_read(self._fd))
+        except (IOError, OSError):
+            return 0
+        #
+
     def close(self):
         notify_close(self._fd)
         try:
@@ -8,7 +8,7 @@ eventlet.patcher.slurp_properties(__socket, globals(), ignore=__patched__, srcke
 
 os = __import__('os')
 import sys
-from eventlet import greenio
+from eventlet import greenio, hubs
 
 
 socket = greenio.GreenSocket
@@ -28,6 +28,9 @@ try:
 
     def socketpair(*args):
         one, two = __original_socketpair__(*args)
+        # Notify the hub of the newly-opened sockets, their filenos can be reused.
+        hubs.notify_opened(one.fileno())
+        hubs.notify_opened(two.fileno())
         return socket(one), socket(two)
 except AttributeError:
     pass
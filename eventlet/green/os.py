@@ -9,7 +9,7 @@ from eventlet import hubs
 from eventlet.patcher import slurp_properties
 
 __all__ = os_orig.__all__
-__patched__ = ['fdopen', 'read', 'write', 'wait', 'waitpid', 'open']
+__patched__ = ['fdopen', 'read', 'write', 'wait', 'waitpid', 'open', 'sendfile']
 
 slurp_properties(
     os_orig,
@@ -71,6 +71,23 @@ def write(fd, st):
         hubs.trampoline(fd, write=True)
 
 
+if hasattr(os_orig, 'sendfile'):
+    __original_sendfile__ = os_orig.sendfile
+
+    def sendfile(out_fd, in_fd, offset, count):
+        """sendfile(out_fd, in_fd, offset, count) -> byteswritten
+
+        Copy count bytes of in_fd from offset to out_fd, waiting for out_fd on EAGAIN.
+        """
+        while True:
+            try:
+                return __original_sendfile__(out_fd, in_fd, offset, count)
+            except (OSError, IOError) as e:
+                if get_errno(e) != errno.EAGAIN:
+                    raise
+            hubs.trampoline(out_fd, write=True)
+
+
 def wait():
     """wait() -> (pid, status)
 
@@ -49,6 +49,22 @@ def select(read_list, write_list, error_list, timeout=None):
     #    elif l.evtype == hub.WRITE:
     #        ds_write[get_fileno(l)] = l
 
+    if hub.edge_triggered:
+        # the hub wakes only on new readiness, the current is checked first
+        # poll() rather than select(), a fileno may be above FD_SETSIZE
+        poll = __select.poll()
+        for fileno in set(ds_read) | set(ds_write):
+            poll.register(fileno, (__select.POLLIN if fileno in ds_read else 0) |
+                          (__select.POLLOUT if fileno in ds_write else 0))
+        rs, ws = [], []
+        for fileno, mask in poll.poll(0):
+            if fileno in ds_read and mask & (__select.POLLIN | __select.POLLHUP | __select.POLLERR):
+                rs.append(ds_read[fileno])
+            if fileno in ds_write and mask & (__select.POLLOUT | __select.POLLHUP | __select.POLLERR):
+                ws.append(ds_write[fileno])
+        if rs or ws:
+            return rs, ws, []
+
     current_switch = current.switch
     timers = []
 
@@ -11,6 +11,8 @@ from eventlet import greenio
 from eventlet.greenio import (
     set_nonblocking, GreenSocket, CONNECT_ERR, CONNECT_SUCCESS,
 )
+from eventlet.greenio.base import byte_view, coalesce_buffers
+from eventlet.greenio.base import sendfile as green_sendfile
 from eventlet.hubs import trampoline, IOClosed, active_hub
 from eventlet.support import get_errno, PY33
 import six
@@ -159,6 +161,7 @@ class GreenSSLSocket(_original_sslsocket):
                     self.__class__)
             timeout = timeout_exc('timed out')
             send = super(GreenSSLSocket, self).send
+            data = byte_view(data)
             while data:
                 offset = self._call_trampolining(send, data, flags)
                 if offset > 0:
@@ -182,6 +185,23 @@ class GreenSSLSocket(_original_sslsocket):
                         return ''
                     raise
 
+    def sendmsg_all(self, buffers, flags=0):
+        """ TLS has no vectored write, the small buffers are coalesced up to a record """
+        for buf in coalesce_buffers(buffers):
+            self.sendall(buf, flags)
+    writev = sendmsg_all
+
+    def _sendfile_blocking(self, e):
+        if self.act_non_blocking:
+            raise e
+        trampoline(self, write=True, timeout=self.gettimeout(), timeout_exc=timeout_exc('timed out'))
+
+    def sendfile(self, file, offset=0, count=None):
+        """ TLS sends the file read with sendall, see greenio.base.sendfile """
+        if self._sslobj:
+            return green_sendfile(self, file, offset, count)
+        return green_sendfile(self, file, offset, count, self._sendfile_blocking)
+
     def recv(self, buflen=1024, flags=0):
         return self._base_recv(buflen, flags, into=False)
 
@@ -342,6 +362,10 @@ class GreenSSLSocket(_original_sslsocket):
                     trampoline(self, read=True, timeout=self.gettimeout(),
                                timeout_exc=timeout_exc('timed out'))
 
+        kw = {}
+        if getattr(self, '_context', None) is not None:
+            # the context of the listening socket, its session cache resumes handshakes
+            kw['_context'] = self._context
         new_ssl = type(self)(
             newsock,
             keyfile=self.keyfile,
@@ -351,7 +375,8 @@ class GreenSSLSocket(_original_sslsocket):
             ssl_version=self.ssl_version,
             ca_certs=self.ca_certs,
             do_handshake_on_connect=False,
-            suppress_ragged_eofs=self.suppress_ragged_eofs)
+            suppress_ragged_eofs=self.suppress_ragged_eofs,
+            **kw)
         return new_ssl, addr
 
     def dup(self):
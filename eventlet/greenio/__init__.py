@@ -1,6 +1,8 @@
 import six
 
 from eventlet.greenio.base import *  # noqa
+from eventlet.greenio.bufpool import *  # noqa
+from eventlet.greenio.stream import *  # noqa
 
 if six.PY2:
     from eventlet.greenio.py2 import *  # noqa
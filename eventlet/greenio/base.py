@@ -1,11 +1,16 @@
 import errno
+import io
+import mmap
 import os
 import socket
+import stat
 import sys
 import time
 import warnings
 
 import eventlet
+from eventlet.greenio.bufpool import recv_lease
+from eventlet.greenio import mmsg
 from eventlet.hubs import trampoline, notify_opened, IOClosed, active_hub
 from eventlet.support import get_errno
 import six
@@ -111,6 +116,218 @@ def set_nonblocking(fd):
         setblocking(0)
 
 
+try:
+    IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = 1024
+if IOV_MAX <= 0:
+    IOV_MAX = 1024
+
+
+def byte_view(data):
+    """
+    A memoryview of the data in bytes, the rest of a partial send is sliced
+    from it without copying the data.
+    """
+    try:
+        view = memoryview(data)
+    except TypeError:
+        return data  # not a buffer, Python 2 unicode
+    if six.PY3 and (view.itemsize != 1 or view.ndim != 1):
+        view = view.cast('B')
+    return view
+
+
+def advance_buffers(buffers, sent):
+    """
+    The buffers left to send after a vectored write of sent bytes,
+    the partially sent buffer is replaced by a view of its rest.
+    """
+    i = 0
+    for buf in buffers:
+        size = len(buf)
+        if sent < size:
+            break
+        sent -= size
+        i += 1
+    buffers = buffers[i:]
+    if sent and buffers:
+        buffers[0] = buffers[0][sent:]
+    return buffers
+
+
+def coalesce_buffers(buffers, size=16384):
+    """
+    Yield the buffers, of a write without vectored I/O, the consecutive small
+    buffers joined up to size bytes, by default of a TLS record, the large
+    buffers as they are.
+    """
+    small = []
+    total = 0
+    for buf in buffers:
+        n = len(buf)
+        if not n:
+            continue
+        if total + n > size and small:
+            yield small[0] if len(small) == 1 else b''.join(small)
+            small = []
+            total = 0
+        if n >= size:
+            yield buf
+            continue
+        small.append(buf)
+        total += n
+    if small:
+        yield small[0] if len(small) == 1 else b''.join(small)
+
+
+SENDFILE_BLOCK = 1 << 30   # the bytes of an os.sendfile call at most, as socket.sendfile
+SENDFILE_WINDOW = 64 << 20  # the bytes of a mapping of the file sent without os.sendfile
+SENDFILE_CHUNK = 1 << 20    # the bytes of a read of the file neither sent nor mapped
+
+_os_sendfile = getattr(os, 'sendfile', None)
+
+
+class _GiveupOnSendfile(Exception):
+    pass
+
+
+def _sendfile_kernel(sock, file, offset, count, on_blocking):
+    """
+    The loop of os.sendfile() of the file to the socket, on_blocking(e) waits
+    for the socket on EAGAIN.  Returns the bytes sent and raises _GiveupOnSendfile
+    when nothing was sent, as the file is not a regular file.
+    """
+    if _os_sendfile is None:
+        raise _GiveupOnSendfile()
+    try:
+        fileno = file.fileno()
+        fsize = os.fstat(fileno).st_size
+    except (AttributeError, io.UnsupportedOperation, OSError) as e:
+        raise _GiveupOnSendfile(e)
+    if not fsize:
+        raise _GiveupOnSendfile()  # empty, or not a regular file
+    sockno = sock.fileno()
+    blocksize = min(count or fsize, SENDFILE_BLOCK)
+    total = 0
+    while True:
+        if count:
+            blocksize = min(count - total, blocksize)
+            if blocksize <= 0:
+                break
+        try:
+            sent = _os_sendfile(sockno, fileno, offset + total, blocksize)
+        except (OSError, IOError) as e:
+            if get_errno(e) in SOCKET_BLOCKING:
+                on_blocking(e)
+                continue
+            if not total:
+                raise _GiveupOnSendfile(e)
+            raise
+        if not sent:
+            break  # EOF
+        total += sent
+    return total
+
+
+def _sendfile_mapped(sock, file, offset, count):
+    """
+    The file mapped in windows sent with sendall(), no copy of the file in
+    Python buffers.  A file truncated while it is sent raises SIGBUS, see
+    sendfile().  Raises _GiveupOnSendfile when the file can not be mapped.
+    """
+    try:
+        fileno = file.fileno()
+        st = os.fstat(fileno)
+    except (AttributeError, io.UnsupportedOperation, OSError) as e:
+        raise _GiveupOnSendfile(e)
+    if not stat.S_ISREG(st.st_mode):
+        raise _GiveupOnSendfile()
+    size = st.st_size - offset
+    if count:
+        size = min(size, count)
+    total = 0
+    while total < size:
+        start = offset + total
+        aligned = start - start % mmap.ALLOCATIONGRANULARITY
+        length = min(size - total, SENDFILE_WINDOW)
+        try:
+            window = mmap.mmap(fileno, length + start - aligned, access=mmap.ACCESS_READ, offset=aligned)
+        except (ValueError, EnvironmentError) as e:
+            if not total:
+                raise _GiveupOnSendfile(e)
+            raise
+        try:
+            if six.PY3:
+                view = memoryview(window)
+                try:
+                    sock.sendall(view[start - aligned:])
+                finally:
+                    view.release()
+            else:
+                sock.sendall(window[start - aligned:])
+        finally:
+            window.close()
+        total += length
+    return total
+
+
+def _sendfile_read(sock, file, offset, count):
+    """ The read & sendall loop of the file, of what is neither sent nor mapped """
+    if offset and hasattr(file, 'seek'):
+        file.seek(offset)
+    buf = bytearray(min(count, SENDFILE_CHUNK) if count else SENDFILE_CHUNK)
+    view = memoryview(buf)
+    total = 0
+    while not count or total < count:
+        want = min(count - total, len(buf)) if count else len(buf)
+        if hasattr(file, 'readinto'):
+            n = file.readinto(view[:want])
+            data = view[:n]
+        else:
+            data = file.read(want)
+            n = len(data)
+        if not n:
+            break
+        sock.sendall(data)
+        total += n
+    return total
+
+
+def sendfile(sock, file, offset=0, count=None, on_blocking=None, mapped=False):
+    """
+    Send the file as socket.sendfile(), with os.sendfile() when on_blocking(e)
+    is given to wait for the socket on EAGAIN, a socket of no TLS.
+    Otherwise the file is read and sent with sendall(), or with mapped, sent
+    of a mapping of the file with no copy: the process gets SIGBUS when the
+    file is truncated meanwhile, for files that are never truncated.
+    The file position is left at the end of the bytes sent, returns their number.
+    """
+    if 'b' not in getattr(file, 'mode', 'b'):
+        raise ValueError("file should be opened in binary mode")
+    if count is not None and count <= 0:
+        raise ValueError("count must be a positive integer (got {0!r})".format(count))
+    total = 0
+    try:
+        if on_blocking is not None:
+            try:
+                total = _sendfile_kernel(sock, file, offset, count, on_blocking)
+                return total
+            except _GiveupOnSendfile:
+                pass
+        if mapped:
+            try:
+                total = _sendfile_mapped(sock, file, offset, count)
+                return total
+            except _GiveupOnSendfile:
+                pass
+        total = _sendfile_read(sock, file, offset, count)
+        return total
+    finally:
+        if total > 0 and hasattr(file, 'seek'):
+            file.seek(offset + total)
+
+
 try:
     from socket import _GLOBAL_DEFAULT_TIMEOUT
 except ImportError:
@@ -228,6 +445,30 @@ class GreenSocket(object):
                 return type(self)(client), addr
             self._trampoline(fd, read=True, timeout=self.gettimeout(), timeout_exc=_timeout_exc)
 
+    def accept_many(self, max_count):
+        """Accept a connection, waiting for it as :meth:`accept` does, then
+        the connections already in the backlog, up to *max_count*, without
+        waiting.  Returns a list of ``(socket, address)``.
+        """
+        accepted = [self.accept()]
+        if self.act_non_blocking:
+            return accepted
+        fd = self.fd
+        cls = type(self)
+        while len(accepted) < max_count:
+            try:
+                res = socket_accept(fd)
+            except socket.error:
+                # raised again by the next accept, if it lasts
+                break
+            if res is None:
+                break
+            client, addr = res
+            notify_opened(client.fileno())
+            set_nonblocking(client)
+            accepted.append((cls(client), addr))
+        return accepted
+
     def _mark_as_closed(self):
         """ Mark this socket as being closed """
         self._closed = True
@@ -373,6 +614,40 @@ class GreenSocket(object):
     def recvfrom_into(self, buffer, nbytes=0, flags=0):
         return self._recv_loop(self.fd.recvfrom_into, 0, buffer, nbytes, flags)
 
+    def _wait_readable(self):
+        try:
+            self._read_trampoline()
+        except IOClosed:
+            raise EOFError()
+
+    def _wait_writable(self):
+        try:
+            self._trampoline(self.fd, write=True, timeout=self.gettimeout(),
+                             timeout_exc=socket_timeout('timed out'))
+        except IOClosed:
+            raise socket.error(errno.ECONNRESET, 'Connection closed by another thread')
+
+    def recv_many(self, max_msgs, bufsize=65535, flags=0):
+        """
+        Receive up to max_msgs datagrams, [(data, address), ...], all those queued
+        in a single recvmmsg() where available, the socket is waited for only when
+        there is none, see eventlet.greenio.mmsg.
+        """
+        return mmsg.recv_many(self.fd, max_msgs, bufsize, flags, self._wait_readable)
+
+    def send_many(self, msgs, flags=0):
+        """
+        Send all the datagrams of msgs, [(data, address), ...], in sendmmsg() calls
+        where available, returns the number of datagrams sent.
+        """
+        return mmsg.send_many(self.fd, msgs, flags, self._wait_writable)
+
+    def recv_lease(self, bufsize, flags=0, pool=None):
+        """ Context manager of a recv in a buffer leased of the buffer pool,
+            gives a memoryview of the bytes received, valid within the with block
+        """
+        return recv_lease(self, bufsize, flags, pool)
+
     def _send_loop(self, send_method, data, *args):
         if self.act_non_blocking:
             return send_method(data, *args)
@@ -397,11 +672,49 @@ class GreenSocket(object):
         return self._send_loop(self.fd.sendto, data, *args)
 
     def sendall(self, data, flags=0):
+        data = byte_view(data)
         while data:
             offset = self._send_loop(self.fd.send, data, flags)
             if offset > 0:
                 data = data[offset:]
 
+    if hasattr(_original_socket, 'sendmsg'):
+        def sendmsg(self, buffers, *args):
+            return self._send_loop(self.fd.sendmsg, buffers, *args)
+
+    def sendmsg_all(self, buffers, flags=0):
+        """
+        Send all the buffers in order, as sendall() of their concatenation, with
+        vectored writes of sendmsg() that are resumed after a partial write,
+        without joining the buffers.  Where sendmsg() is not available the
+        small buffers are coalesced, see coalesce_buffers().
+        """
+        if not hasattr(self.fd, 'sendmsg'):
+            for buf in coalesce_buffers(buffers):
+                self.sendall(buf, flags)
+            return
+        buffers = [byte_view(buf) for buf in buffers if len(buf)]
+        while buffers:
+            sent = self._send_loop(self.fd.sendmsg, buffers[:IOV_MAX], (), flags)
+            buffers = advance_buffers(buffers, sent)
+    writev = sendmsg_all
+
+    def _sendfile_blocking(self, e):
+        if self.act_non_blocking:
+            raise e
+        try:
+            self._trampoline(self.fd, write=True, timeout=self.gettimeout(),
+                             timeout_exc=socket_timeout('timed out'))
+        except IOClosed:
+            raise socket.error(errno.ECONNRESET, 'Connection closed by another thread')
+
+    def sendfile(self, file, offset=0, count=None):
+        """
+        Send the file with os.sendfile(), the socket trampolined on EAGAIN,
+        the file is copied by the kernel, see sendfile().
+        """
+        return sendfile(self, file, offset, count, self._sendfile_blocking)
+
     def setblocking(self, flag):
         if flag:
             self.act_non_blocking = False
@@ -0,0 +1,168 @@
+import os
+from contextlib import contextmanager
+
+import six
+
+__all__ = ['BufferPool', 'buffer_pool', 'recv_lease']
+
+MIN_CLASS = 4 << 10     # the smallest size class
+MAX_CLASS = 256 << 10   # the largest size class, larger buffers are not pooled
+
+# the max bytes resident in the free lists of the default pool
+HIGH_WATER = int(os.environ.get('EVENTLET_BUFFER_POOL_HIGH_WATER', 32 << 20))
+
+
+class BufferPool(object):
+    """ Pool of receive buffers, bytearrays of power of two size classes
+        from min_class to max_class.  A buffer is leased at the size class
+        fitting the size asked, and released back to the free list of its class.
+        Released buffers are dropped once the free lists hold high_water bytes,
+        the resident bytes are bounded whatever the peak of the leases.
+        Larger sizes than max_class are allocated and dropped, not pooled.
+        The free lists are plain lists, their pop & append are atomic under the GIL,
+        the pool is shared by the hubs of threads, the counters are approximate then.
+    """
+
+    __slots__ = ['min_class', 'max_class', 'high_water', 'resident', '_free',
+                 'leases', 'hits', 'misses', 'oversize', 'releases', 'drops', 'leased']
+
+    def __init__(self, min_class=MIN_CLASS, max_class=MAX_CLASS, high_water=HIGH_WATER):
+        if min_class <= 0 or min_class & (min_class - 1):
+            raise ValueError("Size class must be a power of two, %r" % (min_class,))
+        if max_class < min_class:
+            raise ValueError("Max size class below the min size class, %r" % (max_class,))
+        if high_water < 0:
+            raise ValueError("High-water mark must not be negative, %r" % (high_water,))
+        self.min_class = min_class
+        self.max_class = max_class
+        self.high_water = high_water
+        self.resident = 0   # bytes in the free lists
+        self._free = {}
+        size = min_class
+        while size <= max_class:
+            self._free[size] = []
+            size <<= 1
+        self.max_class = size >> 1
+        self.reset_stats()
+        #
+
+    def reset_stats(self):
+        self.leases = 0     # buffers leased
+        self.hits = 0       # leases served from a free list
+        self.misses = 0     # leases allocated
+        self.oversize = 0   # leases above max_class, not pooled
+        self.releases = 0   # buffers released to a free list
+        self.drops = 0      # buffers released above the high-water mark, dropped
+        self.leased = 0     # bytes leased and not released yet
+        #
+
+    def size_class(self, size):
+        """ The size class fitting size bytes, None above max_class """
+        if size <= self.min_class:
+            return self.min_class
+        if size > self.max_class:
+            return None
+        return 1 << (size - 1).bit_length()
+        #
+
+    def acquire(self, size):
+        """ A bytearray of size bytes at least, to be given back with release """
+        self.leases += 1
+        cls = self.size_class(size)
+        if cls is None:
+            self.oversize += 1
+            buf = bytearray(size)
+        else:
+            try:
+                buf = self._free[cls].pop()
+                self.resident -= cls
+                self.hits += 1
+            except IndexError:
+                self.misses += 1
+                buf = bytearray(cls)
+        self.leased += len(buf)
+        return buf
+        #
+
+    def release(self, buf):
+        """ Give back a buffer of acquire, its bytes are left as is """
+        size = len(buf)
+        self.leased -= size
+        free = self._free.get(size)
+        if free is None:
+            return
+        if self.resident + size > self.high_water:
+            self.drops += 1
+            return
+        self.resident += size
+        self.releases += 1
+        free.append(buf)
+        #
+
+    @contextmanager
+    def lease(self, size):
+        """ A buffer of acquire, released at the exit of the with block """
+        buf = self.acquire(size)
+        try:
+            yield buf
+        finally:
+            self.release(buf)
+        #
+
+    def clear(self):
+        """ Drop the buffers of the free lists """
+        for free in self._free.values():
+            del free[:]
+        self.resident = 0
+        #
+
+    def stats(self):
+        """ The hit rate of the leases and the bytes resident """
+        return {
+            'leases': self.leases,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': float(self.hits) / self.leases if self.leases else 0.0,
+            'oversize': self.oversize,
+            'releases': self.releases,
+            'drops': self.drops,
+            'leased_bytes': self.leased,
+            'resident_bytes': self.resident,
+            'high_water': self.high_water,
+            'free': dict((cls, len(free)) for cls, free in self._free.items() if free),
+        }
+        #
+
+
+buffer_pool = BufferPool()
+
+
+@contextmanager
+def recv_lease(sock, bufsize, flags=0, pool=None):
+    """ Receive up to bufsize bytes of sock in a leased buffer,
+        yields a memoryview of the bytes received, empty at the end of the stream.
+        The buffer is released at the exit of the with block, the view is released
+        with it on Python 3, the bytes are to be consumed or copied within the block.
+    """
+    if pool is None:
+        pool = buffer_pool
+    buf = pool.acquire(bufsize)
+    view = memoryview(buf)
+    data = None
+    try:
+        n = sock.recv_into(view, bufsize, flags)
+        data = view[:n]
+        yield data
+    finally:
+        if six.PY3:
+            try:
+                if data is not None:
+                    data.release()
+                view.release()
+            except BufferError:
+                # the view is exported still, the buffer is not reused
+                pool.leased -= len(buf)
+                buf = None
+        if buf is not None:
+            pool.release(buf)
+    #
@@ -0,0 +1,332 @@
+""" Batched datagram I/O: recvmmsg & sendmmsg of libc through ctypes,
+    a readiness of the socket drains its queue in one syscall.
+    Where they are not available, recvfrom & sendto loop until EAGAIN.
+"""
+from array import array
+import ctypes
+import errno
+import itertools
+import os
+import struct
+import sys
+
+from eventlet import patcher
+from eventlet.support import get_errno
+import six
+
+socket = patcher.original('socket')
+threading = patcher.original('threading')
+
+__all__ = ['recv_many', 'send_many', 'MMSG']
+
+UIO_MAXIOV = 1024       # the messages of a syscall at most
+SOCKADDR_SIZE = 128     # sizeof(struct sockaddr_storage)
+ADDR_CACHE = 1024       # the addresses encoded & decoded kept, the peers of a socket mostly repeat
+
+SOCKET_BLOCKING = set((errno.EAGAIN, errno.EWOULDBLOCK))
+MSG_DONTWAIT = int(getattr(socket, 'MSG_DONTWAIT', 0x40))  # an int, an IntFlag is slow to or
+
+
+class iovec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+
+class msghdr(ctypes.Structure):
+    _fields_ = [('msg_name', ctypes.c_void_p), ('msg_namelen', ctypes.c_uint32),
+                ('msg_iov', ctypes.c_void_p), ('msg_iovlen', ctypes.c_size_t),
+                ('msg_control', ctypes.c_void_p), ('msg_controllen', ctypes.c_size_t),
+                ('msg_flags', ctypes.c_int)]
+
+
+class mmsghdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', msghdr), ('msg_len', ctypes.c_uint)]
+
+
+# The headers are arrays of 64-bit words, a field of all the messages written by
+# a slice assignment of an array, not a field at a time of ctypes.
+# The 32-bit fields are the low half of their padded word, on 64-bit little-endian.
+IOVEC_WORDS = 2
+MMSGHDR_WORDS = 8
+W_NAME, W_NAMELEN, W_IOV, W_IOVLEN, W_LEN = (
+    msghdr.msg_name.offset // 8, msghdr.msg_namelen.offset // 8, msghdr.msg_iov.offset // 8,
+    msghdr.msg_iovlen.offset // 8, mmsghdr.msg_len.offset // 8)
+LAYOUT = (ctypes.sizeof(iovec) == IOVEC_WORDS * 8 and ctypes.sizeof(mmsghdr) == MMSGHDR_WORDS * 8 and
+          array('L').itemsize == 8 and sys.byteorder == 'little')
+
+try:
+    _libc = ctypes.CDLL(None, use_errno=True)
+    _recvmmsg = _libc.recvmmsg
+    _recvmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+    _recvmmsg.restype = ctypes.c_int
+    _sendmmsg = _libc.sendmmsg
+    _sendmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+    _sendmmsg.restype = ctypes.c_int
+except (OSError, AttributeError):
+    _recvmmsg = _sendmmsg = None
+
+# recvmmsg & sendmmsg are used, can be turned off to compare with the loops
+MMSG = (_recvmmsg is not None and LAYOUT and six.PY3 and
+        os.environ.get('EVENTLET_NO_MMSG', '') == '')
+
+
+def _raise_errno():
+    e = ctypes.get_errno()
+    raise socket.error(e, os.strerror(e))
+
+
+def _address(buf):
+    """ The address of a bytearray, not to be resized, or of bytes """
+    if isinstance(buf, bytearray):
+        return ctypes.addressof((ctypes.c_char * len(buf)).from_buffer(buf)) if buf else 0
+    return ctypes.cast(ctypes.c_char_p(buf), ctypes.c_void_p).value
+
+
+def _words(values):
+    return array('L', values)
+
+
+def _zero_words(count):
+    return array('L', bytes(8 * count))
+
+
+def _offsets(base, sizes):
+    """ The addresses of the items of sizes packed from base """
+    return _words(itertools.accumulate(itertools.chain((base,), sizes[:-1])))
+
+
+_decoded = {}
+_encoded = {}
+
+
+def decode_sockaddr(raw):
+    """ The address of a struct sockaddr, as recvfrom returns it """
+    addr = _decoded.get(raw)
+    if addr is not None:
+        return addr
+    family = struct.unpack_from('H', raw)[0]
+    if family == socket.AF_INET:
+        port, = struct.unpack_from('!H', raw, 2)
+        addr = (socket.inet_ntop(socket.AF_INET, raw[4:8]), port)
+    elif family == socket.AF_INET6:
+        port, flowinfo = struct.unpack_from('!HI', raw, 2)
+        scope_id, = struct.unpack_from('I', raw, 24)
+        addr = (socket.inet_ntop(socket.AF_INET6, raw[8:24]), port, flowinfo, scope_id)
+    elif family == getattr(socket, 'AF_UNIX', None):
+        addr = raw[2:]
+        if addr[:1] != b'\0':  # a path, the abstract namespace is kept in bytes
+            addr = addr.split(b'\0', 1)[0].decode(sys.getfilesystemencoding(), 'surrogateescape')
+    else:
+        addr = raw
+    if len(_decoded) >= ADDR_CACHE:
+        _decoded.clear()
+    _decoded[raw] = addr
+    return addr
+
+
+def encode_sockaddr(family, addr):
+    """ The struct sockaddr of a numeric address, None when it is not numeric,
+        its name is to be resolved by sendto
+    """
+    key = (family, addr)
+    raw = _encoded.get(key)
+    if raw is not None:
+        return raw
+    try:
+        if family == socket.AF_INET:
+            host, port = addr
+            raw = struct.pack('H', family) + struct.pack('!H', port) + \
+                socket.inet_pton(family, host) + b'\0' * 8
+        elif family == socket.AF_INET6:
+            host, port = addr[:2]
+            flowinfo = addr[2] if len(addr) > 2 else 0
+            scope_id = addr[3] if len(addr) > 3 else 0
+            raw = struct.pack('H', family) + struct.pack('!HI', port, flowinfo) + \
+                socket.inet_pton(family, host) + struct.pack('I', scope_id)
+        else:
+            return None
+    except (socket.error, ValueError, TypeError, struct.error):
+        return None
+    if len(_encoded) >= ADDR_CACHE:
+        _encoded.clear()
+    _encoded[key] = raw
+    return raw
+
+
+class RecvBatch(object):
+    """ The headers, buffers & address buffers of a recvmmsg of count messages
+        of bufsize bytes, set up once and reused by the calls of the thread.
+    """
+
+    __slots__ = ['count', 'bufsize', 'buf', 'names', 'iovs', 'hdrs', 'hdrs_addr', 'namelens']
+
+    def __init__(self, count, bufsize):
+        self.count = count
+        self.bufsize = bufsize
+        self.buf = bytearray(count * bufsize)
+        self.names = bytearray(count * SOCKADDR_SIZE)
+        self.iovs = _zero_words(count * IOVEC_WORDS)
+        self.hdrs = _zero_words(count * MMSGHDR_WORDS)
+        base = _address(self.buf)
+        self.iovs[0::IOVEC_WORDS] = _words(range(base, base + count * bufsize, bufsize))
+        self.iovs[1::IOVEC_WORDS] = _words([bufsize]) * count
+        names = _address(self.names)
+        iovs = self.iovs.buffer_info()[0]
+        self.namelens = _words([SOCKADDR_SIZE]) * count
+        hdrs = self.hdrs
+        hdrs[W_NAME::MMSGHDR_WORDS] = _words(range(names, names + count * SOCKADDR_SIZE, SOCKADDR_SIZE))
+        hdrs[W_NAMELEN::MMSGHDR_WORDS] = self.namelens
+        hdrs[W_IOV::MMSGHDR_WORDS] = _words(range(iovs, iovs + count * IOVEC_WORDS * 8, IOVEC_WORDS * 8))
+        hdrs[W_IOVLEN::MMSGHDR_WORDS] = _words([1]) * count
+        self.hdrs_addr = hdrs.buffer_info()[0]
+        #
+
+    def recv(self, fileno, count, flags):
+        """ Up to count datagrams [(data, address)], empty on EAGAIN """
+        n = _recvmmsg(fileno, self.hdrs_addr, count, flags | MSG_DONTWAIT, None)
+        if n < 0:
+            if ctypes.get_errno() in SOCKET_BLOCKING:
+                return []
+            _raise_errno()
+        hdrs = self.hdrs
+        end = n * MMSGHDR_WORDS
+        namelens = hdrs[W_NAMELEN:end:MMSGHDR_WORDS]
+        sizes = hdrs[W_LEN:end:MMSGHDR_WORDS]
+        hdrs[W_NAMELEN:end:MMSGHDR_WORDS] = self.namelens[:n]  # written by the call
+        buf = memoryview(self.buf)
+        names = memoryview(self.names)
+        bufsize = self.bufsize
+        msgs = []
+        start = offset = 0
+        for i in range(n):
+            namelen = namelens[i]
+            addr = decode_sockaddr(names[offset:offset + namelen].tobytes()) if namelen else None
+            msgs.append((buf[start:start + sizes[i]].tobytes(), addr))
+            start += bufsize
+            offset += SOCKADDR_SIZE
+        return msgs
+        #
+
+
+_batches = threading.local()
+
+
+def _recv_batch(count, bufsize):
+    batches = getattr(_batches, 'batches', None)
+    if batches is None:
+        batches = _batches.batches = {}
+    batch = batches.get((count, bufsize))
+    if batch is None:
+        if len(batches) >= 8:
+            batches.clear()
+        batch = batches[(count, bufsize)] = RecvBatch(count, bufsize)
+    return batch
+
+
+def _recv_mmsg(sock, max_msgs, bufsize, flags):
+    return _recv_batch(max_msgs, bufsize).recv(sock.fileno(), max_msgs, flags)
+
+
+def _recv_loop(sock, max_msgs, bufsize, flags):
+    msgs = []
+    recvfrom = sock.recvfrom
+    flags |= MSG_DONTWAIT
+    while len(msgs) < max_msgs:
+        try:
+            msgs.append(recvfrom(bufsize, flags))
+        except socket.error as e:
+            if get_errno(e) not in SOCKET_BLOCKING and not msgs:
+                raise
+            break  # an error after datagrams is raised by the next call
+    return msgs
+
+
+def _send_mmsg(sock, msgs, flags):
+    count = len(msgs)
+    family = sock.family
+    datas = []
+    names = []
+    for i, (data, addr) in enumerate(msgs):
+        if addr is not None:
+            raw = encode_sockaddr(family, addr)
+            if raw is None:
+                # a name to resolve, sendto does, the datagrams before are sent first
+                if not i:
+                    return _send_loop(sock, msgs[:1], flags)
+                count = i
+                break
+            names.append(raw)
+        else:
+            names.append(b'')
+        datas.append(data)
+    # the datagrams & the addresses joined in a buffer each, its address taken once,
+    # the name of no namelen is not read
+    data = b''.join(datas)
+    name = b''.join(names)
+    sizes = _words(map(len, datas))
+    namelens = _words(map(len, names))
+    iovs = _zero_words(count * IOVEC_WORDS)
+    iovs[0::IOVEC_WORDS] = _offsets(_address(data), sizes)
+    iovs[1::IOVEC_WORDS] = sizes
+    iovs_addr = iovs.buffer_info()[0]
+    hdrs = _zero_words(count * MMSGHDR_WORDS)
+    hdrs[W_NAME::MMSGHDR_WORDS] = _offsets(_address(name), namelens)
+    hdrs[W_NAMELEN::MMSGHDR_WORDS] = namelens
+    hdrs[W_IOV::MMSGHDR_WORDS] = _words(range(iovs_addr, iovs_addr + count * IOVEC_WORDS * 8, IOVEC_WORDS * 8))
+    hdrs[W_IOVLEN::MMSGHDR_WORDS] = _words([1]) * count
+    n = _sendmmsg(sock.fileno(), hdrs.buffer_info()[0], count, flags | MSG_DONTWAIT)
+    if n < 0:
+        if ctypes.get_errno() in SOCKET_BLOCKING:
+            return 0
+        _raise_errno()
+    return n
+
+
+def _send_loop(sock, msgs, flags):
+    sent = 0
+    flags |= MSG_DONTWAIT
+    for data, addr in msgs:
+        try:
+            if addr is None:
+                sock.send(data, flags)
+            else:
+                sock.sendto(data, flags, addr)
+        except socket.error as e:
+            if get_errno(e) not in SOCKET_BLOCKING and not sent:
+                raise
+            break
+        sent += 1
+    return sent
+
+
+def recv_many(sock, max_msgs, bufsize, flags, wait_read):
+    """ Receive up to max_msgs datagrams of the non-blocking sock, each of up to
+        bufsize bytes, as a list of (data, address), the address is None on
+        a connected socket of no address.  The datagrams queued are taken without
+        waiting, wait_read() is called only when there is none.
+    """
+    if max_msgs <= 0:
+        raise ValueError("max_msgs must be positive, %r" % (max_msgs,))
+    max_msgs = min(max_msgs, UIO_MAXIOV)
+    recv = _recv_mmsg if MMSG else _recv_loop
+    while True:
+        msgs = recv(sock, max_msgs, bufsize, flags)
+        if msgs:
+            return msgs
+        wait_read()
+
+
+def send_many(sock, msgs, flags, wait_write):
+    """ Send all the datagrams of msgs, (data, address) pairs, address None on
+        a connected socket, wait_write() is called when the socket buffer is full.
+        Returns the number of datagrams sent.
+    """
+    msgs = list(msgs)
+    send = _send_mmsg if MMSG else _send_loop
+    sent = 0
+    while sent < len(msgs):
+        n = send(sock, msgs[sent:sent + UIO_MAXIOV], flags)
+        if n:
+            sent += n
+        else:
+            wait_write()
+    return sent
@@ -0,0 +1,308 @@
+import sys
+
+import six
+
+__all__ = ['GreenStreamReader', 'IncompleteReadError', 'LimitOverrunError']
+
+DEFAULT_BUFFER_SIZE = 16 << 10
+DEFAULT_LIMIT = 64 << 10
+
+
+class IncompleteReadError(EOFError):
+    """ The end of the stream came before the expected bytes,
+        partial is the bytes read, expected is None for a separator
+    """
+
+    def __init__(self, partial, expected):
+        super(IncompleteReadError, self).__init__(
+            '%d bytes read on a total of %r expected bytes' % (len(partial), expected))
+        self.partial = partial
+        self.expected = expected
+
+
+class LimitOverrunError(ValueError):
+    """ The separator was not found within the limit,
+        consumed is the number of bytes to skip, the bytes are kept buffered
+    """
+
+    def __init__(self, message, consumed):
+        super(LimitOverrunError, self).__init__(message)
+        self.consumed = consumed
+
+
+class GreenStreamReader(object):
+    """ Buffered reading of a green socket, in place of the io stack of
+        makefile('rb'): a reusable bytearray refilled with recv_into.
+        The file methods read, read1, readline, readlines, readinto & peek,
+        and the stream methods readexactly, readuntil & readhead.
+        Bytes are consumed at the success of a read, a timeout raised
+        while waiting keeps the buffered bytes for the next read.
+        Large reads are received in the free space of the buffer, grown as needed,
+        or with readinto & read1 straight in the caller's buffer.
+    """
+
+    __slots__ = ['sock', 'bufsize', 'closed', '_buf', '_view', '_pos', '_end']
+
+    def __init__(self, sock, bufsize=DEFAULT_BUFFER_SIZE):
+        if bufsize is None or bufsize <= 0:
+            bufsize = DEFAULT_BUFFER_SIZE
+        self.sock = sock
+        self.bufsize = bufsize
+        self.closed = False
+        self._buf = bytearray(bufsize)
+        self._view = memoryview(self._buf)
+        self._pos = 0  # the buffered bytes are _buf[_pos:_end]
+        self._end = 0
+        #
+
+    @property
+    def buffered(self):
+        """ The number of bytes buffered, read without a recv """
+        return self._end - self._pos
+
+    def _resize(self, size):
+        n = self._end - self._pos
+        buf = bytearray(size)
+        buf[:n] = self._view[self._pos:self._end]
+        self._buf = buf
+        self._view = memoryview(buf)
+        self._pos = 0
+        self._end = n
+        #
+
+    def _fill(self, need=1):
+        """ Receive in the free space of the buffer, made for need more bytes,
+            returns the number of bytes received, 0 at the end of the stream
+        """
+        pos = self._pos
+        end = self._end
+        size = len(self._buf)
+        if pos == end:
+            self._pos = self._end = pos = end = 0
+            if size > self.bufsize and need <= self.bufsize:
+                self._resize(self.bufsize)  # back from a large read
+                size = self.bufsize
+        if size - end < need or (pos and size - end < size >> 2):
+            # the buffered bytes are moved to the start, or the buffer grows
+            n = end - pos
+            if n + need <= size:
+                self._view[:n] = self._view[pos:end]  # memmove
+                self._pos = 0
+                self._end = end = n
+            else:
+                self._resize(max(n + need, size * 2))
+                end = self._end
+        n = self.sock.recv_into(self._view[end:])
+        self._end = end + n
+        return n
+        #
+
+    def _take(self, n):
+        pos = self._pos
+        self._pos = pos + n
+        return self._view[pos:pos + n].tobytes()
+        #
+
+    def feed_data(self, data):
+        """ Buffer bytes received elsewhere, they are read before those of the socket """
+        n = len(data)
+        if len(self._buf) - self._end < n:
+            self._resize(max(self._end - self._pos + n, len(self._buf)))
+        end = self._end
+        self._view[end:end + n] = data
+        self._end = end + n
+        #
+
+    def readexactly(self, n):
+        """ Read exactly n bytes, raises IncompleteReadError at the end of the stream """
+        pos = self._pos
+        if self._end - pos >= n:
+            self._pos = pos + n
+            return self._view[pos:pos + n].tobytes()
+        while self._end - self._pos < n:
+            if not self._fill(n - (self._end - self._pos)):
+                raise IncompleteReadError(self._take(self._end - self._pos), n)
+        return self._take(n)
+        #
+
+    def readuntil(self, separator=b'\n', limit=DEFAULT_LIMIT):
+        """ Read up to and including the separator,
+            raises LimitOverrunError when it is not within limit bytes,
+            and IncompleteReadError at the end of the stream
+        """
+        seplen = len(separator)
+        if not seplen:
+            raise ValueError('Separator should be at least one-byte string')
+        offset = 0  # of the buffered bytes searched already
+        while True:
+            pos = self._pos
+            i = self._buf.find(separator, pos + offset, self._end)
+            if i >= 0:
+                n = i + seplen - pos
+                if n > limit:
+                    raise LimitOverrunError('Separator is found, but chunk is longer than limit', n)
+                return self._take(n)
+            offset = max(0, self._end - pos - seplen + 1)
+            if offset > limit:
+                raise LimitOverrunError('Separator is not found, and chunk exceed the limit', offset)
+            if not self._fill():
+                raise IncompleteReadError(self._take(self._end - self._pos), None)
+        #
+
+    def readhead(self, limit=DEFAULT_LIMIT):
+        """ Read up to and including the first empty line, of CRLF or LF line ends,
+            the head of an HTTP message, raises as readuntil
+        """
+        offset = 0
+        while True:
+            pos = self._pos
+            end = self._end
+            buf = self._buf
+            start = pos + offset
+            i = buf.find(b'\n\r\n', start, end)
+            # a LF empty line before it
+            j = buf.find(b'\n\n', start, end if i < 0 else i + 2)
+            if j >= 0:
+                n = j + 2 - pos
+            elif i >= 0:
+                n = i + 3 - pos
+            else:
+                n = 0
+            if n:
+                if n > limit:
+                    raise LimitOverrunError('Separator is found, but chunk is longer than limit', n)
+                return self._take(n)
+            offset = max(0, end - pos - 2)
+            if offset > limit:
+                raise LimitOverrunError('Separator is not found, and chunk exceed the limit', offset)
+            if not self._fill():
+                raise IncompleteReadError(self._take(self._end - self._pos), None)
+        #
+
+    def readline(self, limit=-1):
+        """ Read a line, up to limit bytes, the line is partial at the end of the stream """
+        pos = self._pos
+        i = self._buf.find(b'\n', pos, self._end) + 1
+        if i and (limit is None or limit < 0 or i - pos <= limit):
+            self._pos = i
+            return self._view[pos:i].tobytes()
+        return self._readline(limit)
+        #
+
+    def _readline(self, limit):
+        if limit is None or limit < 0:
+            limit = sys.maxsize
+        offset = 0
+        while True:
+            pos = self._pos
+            end = self._end
+            stop = min(end, pos + limit)
+            i = self._buf.find(b'\n', pos + offset, stop)
+            if i >= 0:
+                return self._take(i + 1 - pos)
+            if stop - pos >= limit:
+                return self._take(limit)
+            offset = end - pos
+            if not self._fill():
+                return self._take(self._end - self._pos)
+        #
+
+    def readlines(self, hint=-1):
+        lines = []
+        total = 0
+        while True:
+            line = self.readline()
+            if not line:
+                break
+            lines.append(line)
+            total += len(line)
+            if 0 < hint <= total:
+                break
+        return lines
+        #
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+    next = __next__
+
+    def read(self, n=-1):
+        """ Read n bytes, fewer at the end of the stream, all the stream if n is negative """
+        if n is None or n < 0:
+            chunks = [self._take(self._end - self._pos)]
+            while True:
+                data = self.sock.recv(self.bufsize)
+                if not data:
+                    break
+                chunks.append(data)
+            return b''.join(chunks)
+        while self._end - self._pos < n:
+            if not self._fill(n - (self._end - self._pos)):
+                break
+        return self._take(min(n, self._end - self._pos))
+        #
+
+    def read1(self, n=-1):
+        """ Read up to n bytes, with at most one recv """
+        if n is None or n < 0:
+            n = self.bufsize
+        buffered = self._end - self._pos
+        if buffered:
+            return self._take(min(n, buffered))
+        if n >= self.bufsize:
+            return self.sock.recv(n)
+        self._fill()
+        return self._take(min(n, self._end - self._pos))
+        #
+
+    def readinto(self, b):
+        """ Read into b until it is full or the stream ends, returns the number of bytes read """
+        view = memoryview(b)
+        if six.PY3 and (view.itemsize != 1 or view.ndim != 1):
+            view = view.cast('B')
+        total = len(view)
+        got = min(total, self._end - self._pos)
+        view[:got] = self._view[self._pos:self._pos + got]
+        self._pos += got
+        while got < total:
+            left = total - got
+            if left >= self.bufsize:
+                # large, in the caller's buffer
+                n = self.sock.recv_into(view[got:])
+                if not n:
+                    break
+                got += n
+                continue
+            if not self._fill():
+                break
+            n = min(left, self._end - self._pos)
+            view[got:got + n] = self._view[self._pos:self._pos + n]
+            self._pos += n
+            got += n
+        return got
+        #
+
+    def peek(self, n=0):
+        """ The buffered bytes, without consuming them, received if none """
+        if self._pos == self._end:
+            self._fill()
+        return self._view[self._pos:self._end].tobytes()
+        #
+
+    def close(self):
+        """ Drop the buffer, the socket is not closed """
+        self.closed = True
+        self._pos = self._end = 0
+        #
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+#
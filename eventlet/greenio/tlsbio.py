@@ -0,0 +1,216 @@
+"""
+TLS of memory BIOs for UltraGreenSocket: an SSLObject encrypts to and decrypts
+from memory, the ciphertext moves with plain non-blocking recv/send of the
+socket into a reusable buffer.
+
+The record boundaries of the ciphertext received are tracked, the SSLObject is
+read only when a whole record is buffered or plaintext is pending, so the
+common path raises no SSLWantReadError; sendall encrypts many records of data
+before a send of them all.
+"""
+import errno
+
+import eventlet
+from eventlet.greenio.base import byte_view, coalesce_buffers
+
+ssl = eventlet.patcher.original('ssl')
+socket = eventlet.patcher.original('socket')
+
+__all__ = ['TLSBio', 'MEMORY_BIO']
+#
+
+# MemoryBIO and SSLObject are of Python 3.5
+MEMORY_BIO = hasattr(ssl, 'MemoryBIO')
+
+RECV_BUFFER = 65536     # ciphertext received at most by a recv
+SEND_BATCH = 262144     # plaintext encrypted before a send, 16 records of 16KiB
+HEADER = 5              # content type, version, length of a TLS record
+#
+
+
+class TLSBio(object):
+
+    """
+    The TLS state of a socket, of an SSLObject of memory BIOs.
+    The methods take the UltraGreenSocket, of its non-blocking socket and its waits
+    """
+
+    __slots__ = ['sslobj', 'incoming', 'outgoing', 'rbuf', 'rview',
+                 'fed', 'complete', 'rec_end', 'tail', 'suppress_ragged_eofs']
+
+    def __init__(self, ctx, server_side=False, server_hostname=None, session=None,
+                 suppress_ragged_eofs=True):
+        self.incoming = ssl.MemoryBIO()
+        self.outgoing = ssl.MemoryBIO()
+        self.sslobj = ctx.wrap_bio(self.incoming, self.outgoing, server_side=server_side,
+                                   server_hostname=server_hostname, session=session)
+        self.rbuf = bytearray(RECV_BUFFER)
+        self.rview = memoryview(self.rbuf)
+        # bytes of ciphertext fed, the end of the last whole record of them,
+        # the end of the record of the next header, the bytes of a partial header
+        self.fed = 0
+        self.complete = 0
+        self.rec_end = 0
+        self.tail = b''
+        self.suppress_ragged_eofs = suppress_ragged_eofs
+        #
+
+    def _feed(self, n):
+        """ Write the n bytes received to the incoming BIO, advance the record boundaries """
+        self.incoming.write(self.rview[:n])
+        rbuf = self.rbuf
+        base = self.fed
+        fed = self.fed = base + n
+        end = self.rec_end
+        while True:
+            if end <= fed:
+                self.complete = end
+            if end + HEADER > fed:
+                break
+            pos = end - base
+            if pos >= 0:
+                length = (rbuf[pos + 3] << 8) | rbuf[pos + 4]
+            else:
+                # the header began in the previous recv
+                header = self.tail + bytes(rbuf[:pos + HEADER])
+                length = (header[3] << 8) | header[4]
+            end += HEADER + length
+        self.rec_end = end
+        if end < fed:
+            start = end - base
+            self.tail = self.tail + bytes(rbuf[:n]) if start < 0 else bytes(rbuf[start:n])
+        else:
+            self.tail = b''
+        #
+
+    def _fill(self, sock):
+        """ Receive ciphertext, 0 at EOF, a reset is raised as of an SSLSocket """
+        recv_into = sock.fd.recv_into
+        while True:
+            try:
+                n = recv_into(self.rbuf)
+                break
+            except socket.error as e:
+                if e.args[0] not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    raise
+                sock._wait_readable()
+        if n:
+            self._feed(n)
+        return n
+        #
+
+    def _flush(self, sock):
+        """ Send all the ciphertext of the outgoing BIO """
+        if not self.outgoing.pending:
+            return
+        data = self.outgoing.read()
+        send = sock.fd.send
+        try:
+            n = send(data)
+            if n == len(data):
+                return
+            data = memoryview(data)[n:]
+        except socket.error as e:
+            if e.args[0] not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                raise
+            data = memoryview(data)
+        while data:
+            try:
+                data = data[send(data):]
+            except socket.error as e:
+                if e.args[0] not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    raise
+                sock._wait_writable()
+        #
+
+    def do_handshake(self, sock):
+        sslobj = self.sslobj
+        while True:
+            try:
+                sslobj.do_handshake()
+                self._flush(sock)
+                return
+            except ssl.SSLWantReadError:
+                self._flush(sock)
+                if not self._fill(sock):
+                    raise ssl.SSLEOFError(ssl.SSL_ERROR_EOF, 'EOF occurred in violation of protocol')
+        #
+
+    def read(self, sock, nbytes, buff=None):
+        """ Up to nbytes of plaintext, into buff when given, empty at EOF """
+        sslobj = self.sslobj
+        incoming = self.incoming
+        while True:
+            # plaintext pending, or a whole record unread by the SSLObject
+            if self.fed - incoming.pending < self.complete or sslobj.pending():
+                try:
+                    if buff is None:
+                        data = sslobj.read(nbytes)
+                    else:
+                        data = sslobj.read(nbytes, buff)
+                except ssl.SSLWantReadError:
+                    # whole records of no data, as session tickets
+                    pass
+                except ssl.SSLZeroReturnError:
+                    return b'' if buff is None else 0
+                else:
+                    if self.outgoing.pending:
+                        # a post-handshake reply, as of a key update
+                        self._flush(sock)
+                    return data
+            if not self._fill(sock):
+                if self.suppress_ragged_eofs:
+                    return b'' if buff is None else 0
+                raise ssl.SSLEOFError(ssl.SSL_ERROR_EOF, 'EOF occurred in violation of protocol')
+        #
+
+    def send(self, sock, data):
+        """ Encrypt up to a batch of data, sent before it returns """
+        data = byte_view(data)[:SEND_BATCH]
+        n = self.sslobj.write(data)
+        self._flush(sock)
+        return n
+        #
+
+    def sendall(self, sock, data):
+        """ Encrypt the records of a batch of data, then send them all """
+        write = self.sslobj.write
+        if len(data) <= SEND_BATCH:
+            write(data)
+            self._flush(sock)
+            return
+        data = byte_view(data)
+        while data:
+            data = data[write(data[:SEND_BATCH]):]
+            self._flush(sock)
+        #
+
+    def sendmsg_all(self, sock, buffers):
+        """ The small buffers coalesced to records, a send of a batch of records """
+        write = self.sslobj.write
+        pending = 0
+        for buf in coalesce_buffers(buffers):
+            buf = byte_view(buf)
+            while buf:
+                n = write(buf[:SEND_BATCH])
+                buf = buf[n:]
+                pending += n
+                if pending >= SEND_BATCH:
+                    self._flush(sock)
+                    pending = 0
+        self._flush(sock)
+        #
+
+    def unwrap(self, sock):
+        """ Exchange close_notify, the socket is plain afterwards """
+        sslobj = self.sslobj
+        while True:
+            try:
+                sslobj.unwrap()
+                self._flush(sock)
+                return
+            except ssl.SSLWantReadError:
+                self._flush(sock)
+                if not self._fill(sock):
+                    return
+        #
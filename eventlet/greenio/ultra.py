@@ -3,6 +3,11 @@ import sys
 
 import eventlet
 from eventlet.hubs import trampoline, notify_opened, notify_close, IOClosed, active_hub
+from eventlet.greenio.base import IOV_MAX, byte_view, advance_buffers, coalesce_buffers
+from eventlet.greenio.base import sendfile as green_sendfile
+from eventlet.greenio.bufpool import recv_lease
+from eventlet.greenio import mmsg
+from eventlet.greenio.tlsbio import TLSBio, MEMORY_BIO
 from eventlet.support import get_errno
 import six
 import io
@@ -65,13 +70,16 @@ def socket_checkerr(descriptor):
     #
 
 
-def socket_accept(descriptor):
+def socket_accept(descriptor, plain=False):
     """
     Attempts to accept() on the descriptor, returns a client,address tuple
     if it succeeds; returns None if it needs to trampoline, and raises
     any exceptions.
+    plain: the TCP accept of an ssl socket, the client wrapped by the caller
     """
     try:
+        if plain:
+            return socket.socket.accept(descriptor)
         return descriptor.accept()
     except socket.error as e:
         if get_errno(e) == errno.EWOULDBLOCK:
@@ -86,17 +94,26 @@ class UltraGreenSocket(object):
     """
     UltraGreen version of socket.socket + ssl.SSLSocket + SSL.SSLConnection classes,
     performance optimal intend
+
+    lazy_handshake: accept of a TLS listening socket returns without the handshake,
+    done by the first I/O of the socket, or its do_handshake, in the greenthread of the
+    connection, within handshake_timeout seconds (by default the socket timeout)
     """
 
     __slots__ = ['fd', '_timeout',
                  'fileno', 'getsockname',
                  'getsockopt', 'setsockopt',
                  'bind', 'listen', 'shutdown',
-                 'is_ssl', '_closed']
+                 'is_ssl', '_closed', '_tls',
+                 'lazy_handshake', 'handshake_timeout', '_handshake']
 
     def __init__(self, family=socket.AF_INET, *args, **kwargs):
         self._closed = True
+        self._tls = None
+        self._handshake = False
         self._timeout = kwargs.pop('timeout', None)
+        self.lazy_handshake = kwargs.pop('lazy_handshake', False)
+        self.handshake_timeout = kwargs.pop('handshake_timeout', None)
 
         fd = kwargs.pop('fd', None)
         if fd is None:
@@ -125,7 +142,8 @@ class UltraGreenSocket(object):
 
         self.fd = fd
         self._closed = False
-        self.is_ssl = hasattr(fd, 'ssl_version')
+        # ssl_version is set on the SSLSocket of Python 2 only, the TLS sockets handshake
+        self.is_ssl = hasattr(fd, 'ssl_version') or hasattr(fd, 'do_handshake')
         # self._timeout_exc = timeout_ssl_exc if self.is_ssl else timeout_exc
         #
 
@@ -159,6 +177,9 @@ class UltraGreenSocket(object):
     def __getattr__(self, name):
         if self.fd is None:
             raise AttributeError(name)
+        if self._tls is not None and hasattr(self._tls.sslobj, name):
+            # getpeercert, cipher, version, session... of the SSLObject
+            return getattr(self._tls.sslobj, name)
         return getattr(self.fd, name)
 
     if "__pypy__" in sys.builtin_module_names:
@@ -192,7 +213,15 @@ class UltraGreenSocket(object):
     def _mark_as_closed(self):
         """ Mark this socket as being closed """
         self._closed = True
-        notify_close(self.fileno)
+        #
+
+    def _close(self):
+        """ Close the socket and notify the hub, its fileno can be reused """
+        fileno = self.fd.fileno()
+        self.fd.close()
+        self._mark_as_closed()
+        if fileno >= 0:
+            notify_close(fileno)
         #
 
     def connect(self, address):
@@ -225,34 +254,78 @@ class UltraGreenSocket(object):
             return get_errno(e)
         #
 
+    def _accepted(self, client, lazy=False):
+        """ The socket of a client accepted, wrapped as the listening socket,
+            the TLS handshake is done now unless lazy or lazy_handshake
+        """
+        notify_opened(client.fileno())
+        if not self.is_ssl:
+            return UltraGreenSocket(fd=client)
+
+        fd = self.fd
+        if getattr(fd, 'context', None) is not None:
+            # the context of the listening socket, of its session cache
+            new_ssl = ssl.SSLContext.wrap_socket(
+                fd.context, client, server_side=True,
+                do_handshake_on_connect=False,
+                suppress_ragged_eofs=fd.suppress_ragged_eofs)
+        else:
+            new_ssl = ssl.SSLSocket(
+                client,
+                keyfile=fd.keyfile,
+                certfile=fd.certfile,
+                server_side=True,
+                cert_reqs=fd.cert_reqs,
+                ssl_version=fd.ssl_version,
+                ca_certs=fd.ca_certs,
+                do_handshake_on_connect=False,
+                suppress_ragged_eofs=fd.suppress_ragged_eofs)
+        sock = UltraGreenSocket(fd=new_ssl, handshake_timeout=self.handshake_timeout)
+        sock._handshake = True
+        if not (lazy or self.lazy_handshake):
+            try:
+                sock.do_handshake()
+            except:
+                sock.close()
+                raise
+        return sock
+        #
+
     def accept(self):
         fd = self.fd
         while True:
-            res = socket_accept(fd)
+            res = socket_accept(fd, self.is_ssl)
             if res is not None:
                 client, addr = res
-                notify_opened(client.fileno())
-
-                if not self.is_ssl:
-                    return UltraGreenSocket(fd=client), addr
-
-                new_ssl = ssl.SSLSocket(
-                    client,
-                    keyfile=fd.keyfile,
-                    certfile=fd.certfile,
-                    server_side=True,
-                    cert_reqs=fd.cert_reqs,
-                    ssl_version=fd.ssl_version,
-                    ca_certs=fd.ca_certs,
-                    do_handshake_on_connect=False,
-                    suppress_ragged_eofs=fd.suppress_ragged_eofs)
-                fd = UltraGreenSocket(fd=new_ssl)
-                fd.do_handshake()
-                return fd, addr
+                return self._accepted(client), addr
 
             self._trampoline(read=True, timeout=self._timeout, timeout_exc=timeout_exc)
         #
 
+    def accept_many(self, max_count):
+        """ A connection accepted, waited for as accept does, then the connections
+            of the backlog up to max_count, without waiting: [(socket, address)]
+            The TLS connections of the backlog handshake lazily, at their first use.
+        """
+        accepted = [self.accept()]
+        fd = self.fd
+        while len(accepted) < max_count:
+            try:
+                res = socket_accept(fd, self.is_ssl)
+            except socket.error:
+                # raised again by the next accept, if it lasts
+                break
+            if res is None:
+                break
+            client, addr = res
+            try:
+                accepted.append((self._accepted(client, lazy=True), addr))
+            except Exception:
+                # the connections accepted already are served
+                client.close()
+        return accepted
+        #
+
     if six.PY3:
         def makefile(self, *args, **kwargs):
             if self.is_ssl:
@@ -274,6 +347,11 @@ class UltraGreenSocket(object):
             return res
 
     def recv(self, bufsize, flags=0):
+        if self.is_ssl:
+            if self._handshake:
+                self._lazy_handshake()
+            if self._tls is not None:
+                return self._tls.read(self, bufsize)
         return self._recv_loop(self.fd.recv, b'', bufsize, flags)
     read = recv
 
@@ -281,16 +359,63 @@ class UltraGreenSocket(object):
         return self._recv_loop(self.fd.recvfrom, b'', bufsize, flags)
 
     def recv_into(self, buff, nbytes=0, flags=0):
-        if self.is_ssl:
+        if not self.is_ssl:
+            hub = active_hub.inst
+            if hub.completion_io and self._timeout != 0.0:
+                try:
+                    return self._completion_recv_into(hub, buff, nbytes, flags)
+                except socket.error as e:
+                    if get_errno(e) in SOCKET_CLOSED:
+                        return 0
+                    raise
+        else:
             if buff and nbytes is None:
                 nbytes = len(buff)
             elif nbytes is None:
                 nbytes = 1024
+            if self._handshake:
+                self._lazy_handshake()
+            if self._tls is not None:
+                return self._tls.read(self, nbytes or len(buff), buff)
         return self._recv_loop(self.fd.recv_into, 0, buff, nbytes, flags)
 
     def recvfrom_into(self, buff, nbytes=0, flags=0):
         return self._recv_loop(self.fd.recvfrom_into, 0, buff, nbytes, flags)
 
+    def _wait_readable(self):
+        try:
+            self._trampoline(read=True, timeout=self._timeout, timeout_exc=timeout_exc)
+        except IOClosed:
+            raise socket.error(errno.ECONNRESET, 'Connection closed by another thread')
+        #
+
+    def _wait_writable(self):
+        try:
+            self._trampoline(write=True, timeout=self._timeout, timeout_exc=timeout_exc)
+        except IOClosed:
+            raise socket.error(errno.ECONNRESET, 'Connection closed by another thread')
+        #
+
+    def recv_many(self, max_msgs, bufsize=65535, flags=0):
+        """ Up to max_msgs datagrams [(data, address)], the queue of the socket drained
+            by a recvmmsg, the socket trampolined only when it is empty
+        """
+        return mmsg.recv_many(self.fd, max_msgs, bufsize, flags, self._wait_readable)
+        #
+
+    def send_many(self, msgs, flags=0):
+        """ All the datagrams of msgs [(data, address)] sent by sendmmsg,
+            returns the number of datagrams sent
+        """
+        return mmsg.send_many(self.fd, msgs, flags, self._wait_writable)
+        #
+
+    def recv_lease(self, bufsize, flags=0, pool=None):
+        """ Context manager of a recv in a buffer leased of the buffer pool,
+            gives a memoryview of the bytes received, valid within the with block
+        """
+        return recv_lease(self, bufsize, flags, pool)
+
     def _trampoline_on_possible(self, e, read=False, write=False):
         type_e = type(e)
 
@@ -334,16 +459,35 @@ class UltraGreenSocket(object):
         #
 
     def _recv_loop(self, recv_meth, empty_val, *args):
+        """ The non-blocking syscall is tried first and the socket is trampolined only
+            on EAGAIN, data already received is read without a switch to the hub.
+            Zero bytes to read never raise EAGAIN, so the readability is waited first,
+            as a blocking socket would, for the timeout.
+        """
+        if not args[0] and not self.is_ssl:
+            return self._recv_zero_loop(recv_meth, empty_val, *args)
         while True:
             try:
-                if not self.is_ssl and not args[0]:  # no timeout on Zero bytes to read
+                return recv_meth(*args)
+            except ex_blocking:
+                try:
                     self._trampoline(read=True, timeout=self._timeout, timeout_exc=timeout_exc)
+                except IOClosed:
+                    raise socket.error(errno.ECONNRESET, 'Connection closed by another thread')
+            except Exception as e:
+                if self._trampoline_on_possible(e, read=True):
+                    return empty_val
+        #
 
+    def _recv_zero_loop(self, recv_meth, empty_val, *args):
+        while True:
+            try:
+                self._trampoline(read=True, timeout=self._timeout, timeout_exc=timeout_exc)
                 return recv_meth(*args)
             except Exception as e:
                 if self._trampoline_on_possible(e, read=True):
                     return empty_val
-                    #
+        #
 
     def _send_loop(self, send_method, data, *args):
         while True:
@@ -353,7 +497,45 @@ class UltraGreenSocket(object):
                 self._trampoline_on_possible(e, write=True)
         #
 
+    def _completion_io(self, io_meth, data, nbytes, flags):
+        """ A transfer completed by the hub, not on the non-blocking sockets,
+            see completion_io
+        """
+        if self._closed:
+            raise socket.error(errno.ECONNRESET, 'Connection closed by another thread')
+        return io_meth(self.fd.fileno(), data, nbytes, flags, self._timeout, timeout_exc)
+        #
+
+    def _completion_recv_into(self, hub, buff, nbytes, flags):
+        """ Data already received is read by the syscall, the hub's operation
+            is submitted on EAGAIN only
+        """
+        if self._closed:
+            raise socket.error(errno.ECONNRESET, 'Connection closed by another thread')
+        return hub.io_recv_into(self.fd.fileno(), buff, nbytes, flags, self._timeout, timeout_exc,
+                                attempt=self.fd.recv_into)
+        #
+
+    def _completion_send(self, hub, data, flags):
+        """ Sockets are mostly writable, try the send first """
+        try:
+            return self.fd.send(data, flags)
+        except socket.error as e:
+            if get_errno(e) not in SOCKET_BLOCKING:
+                raise
+        return self._completion_io(hub.io_send, data, 0, flags)
+        #
+
     def send(self, data, flags=0):
+        if not self.is_ssl:
+            hub = active_hub.inst
+            if hub.completion_io and self._timeout != 0.0:
+                return self._completion_send(hub, data, flags)
+        else:
+            if self._handshake:
+                self._lazy_handshake()
+            if self._tls is not None:
+                return self._tls.send(self, data)
         return self._send_loop(self.fd.send, data, flags)
     write = send
 
@@ -361,26 +543,103 @@ class UltraGreenSocket(object):
         return self._send_loop(self.fd.sendto, data, *args)
 
     def sendall(self, data, flags=0):
+        if not self.is_ssl:
+            hub = active_hub.inst
+            if hub.completion_io and self._timeout != 0.0:
+                data = byte_view(data)
+                while data:
+                    data = data[self._completion_send(hub, data, flags):]
+                return
+        else:
+            if self._handshake:
+                self._lazy_handshake()
+            if self._tls is not None:
+                return self._tls.sendall(self, data)
+        data = byte_view(data)
         while data:
             offset = self._send_loop(self.fd.send, data, flags)
             if offset > 0:
                 data = data[offset:]
         #
 
-    def ssl_wrap(self, ctx, **kw):
+    if hasattr(socket.socket, 'sendmsg'):
+        def sendmsg(self, buffers, *args):
+            return self._send_loop(self.fd.sendmsg, buffers, *args)
+
+    def sendmsg_all(self, buffers, flags=0):
+        """ Send all the buffers in order, with vectored writes of sendmsg resumed
+            after a partial write, without joining the buffers.
+            TLS has no vectored write, the small buffers are coalesced up to a record
+        """
+        if self._handshake:
+            self._lazy_handshake()
+        if self._tls is not None:
+            return self._tls.sendmsg_all(self, buffers)
+        if self.is_ssl or not hasattr(self.fd, 'sendmsg'):
+            for buf in coalesce_buffers(buffers):
+                self.sendall(buf, flags)
+            return
+        buffers = [byte_view(buf) for buf in buffers if len(buf)]
+        while buffers:
+            sent = self._send_loop(self.fd.sendmsg, buffers[:IOV_MAX], (), flags)
+            buffers = advance_buffers(buffers, sent)
+        #
+    writev = sendmsg_all
+
+    def _sendfile_blocking(self, e):
+        self._trampoline_on_possible(e, write=True)
+        #
+
+    def sendfile(self, file, offset=0, count=None):
+        """ The file sent with os.sendfile, trampolined on EAGAIN,
+            TLS sends the file read, see greenio.base.sendfile
+        """
+        if self.is_ssl:
+            return green_sendfile(self, file, offset, count)
+        return green_sendfile(self, file, offset, count, self._sendfile_blocking)
+        #
+
+    def ssl_wrap(self, ctx, bio=False, **kw):
+        """ TLS of ctx on the socket, the handshake done.
+            bio: TLS of an SSLObject of memory BIOs, the ciphertext of plain
+            non-blocking recv/send, see greenio.tlsbio
+        """
         if isinstance(ctx, SSL.Context):
             self._setup(SSL.Connection(ctx, self.fd), self._timeout)
 
-        elif isinstance(ctx, ssl.SSLContext):
-            kw['do_handshake_on_connect'] = False
-            self._setup(ctx.wrap_socket(self.fd, **kw), self._timeout)
+        elif bio and MEMORY_BIO and hasattr(ctx, 'wrap_bio'):
+            kw.pop('do_handshake_on_connect', None)
+            self._tls = TLSBio(ctx, **kw)
+            self.is_ssl = True
             self.do_handshake()
 
+        elif hasattr(ctx, 'load_cert_chain'):
+            # an SSLContext of any copy of the ssl module, as of eventlet.green.ssl,
+            # wrapping a socket of the original ssl
+            kw['do_handshake_on_connect'] = False
+            listening = self._listening()
+            self._setup(ssl.SSLContext.wrap_socket(ctx, self.fd, **kw), self._timeout)
+            if not listening:
+                self.do_handshake()
+
         # else Additional ssl-context types
 
         #
 
+    def _listening(self):
+        """ A listening socket, whose sockets of accept handshake """
+        try:
+            return bool(self.fd.getsockopt(socket.SOL_SOCKET, socket.SO_ACCEPTCONN))
+        except (AttributeError, socket.error):
+            return False
+        #
+
     def ssl_unwrap(self):
+        if self._tls is not None:
+            self._tls.unwrap(self)
+            self._tls = None
+            self.is_ssl = False
+            return self.fd
         while True:
             try:
                 self._setup(self.fd.unwrap(), self._timeout)
@@ -391,6 +650,10 @@ class UltraGreenSocket(object):
 
     def do_handshake(self):
         """Perform a TLS/SSL handshake."""
+        if self._handshake:
+            return self._lazy_handshake()
+        if self._tls is not None:
+            return self._tls.do_handshake(self)
         while True:
             try:
                 return self.fd.do_handshake()
@@ -398,11 +661,22 @@ class UltraGreenSocket(object):
                 self._trampoline_on_possible(e)
         #
 
+    def _lazy_handshake(self):
+        """ The handshake of a socket of a lazy_handshake accept, of handshake_timeout """
+        self._handshake = False
+        timeout = self._timeout
+        if self.handshake_timeout is not None:
+            self._timeout = self.handshake_timeout
+        try:
+            self.do_handshake()
+        finally:
+            self._timeout = timeout
+        #
+
     def close(self):
         if self.fd is None:
             return
-        self.fd.close()
-        self._mark_as_closed()
+        self._close()
         #
 
     def __enter__(self):
@@ -414,8 +688,7 @@ class UltraGreenSocket(object):
     def __del__(self):
         if self.fd is None:
             return
-        self.fd.close()
-        self._mark_as_closed()
+        self._close()
         #
 #
 
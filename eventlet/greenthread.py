@@ -29,7 +29,10 @@ def sleep(seconds=0):
     hub = active_hub.inst
     current = getcurrent()
     assert hub.greenlet is not current, 'do not call blocking functions from the mainloop'
-    timer = hub.schedule_call_global(seconds, current.switch)
+    if seconds:
+        timer = hub.schedule_call_global(seconds, current.switch)
+    else:
+        timer = hub.call_soon(current.switch)
     try:
         hub.switch()
     finally:
@@ -47,7 +50,7 @@ def spawn(func, *args, **kwargs):
     after a finite delay.
     """
     g = GreenThread(active_hub.inst.greenlet)
-    active_hub.inst.schedule_call_global(0, g.switch, func, args, kwargs)
+    active_hub.inst.call_soon(g.switch, func, args, kwargs)
     return g
 
 
@@ -141,6 +144,8 @@ def exc_after(seconds, *throw_args):
 
 def _spawn_n(seconds, func, args, kwargs):
     g = greenlet(func, parent=active_hub.inst.greenlet)
+    if not seconds and not kwargs:
+        return active_hub.inst.call_soon(g.switch, *args), g
     return active_hub.inst.schedule_call_global(seconds, g.switch, *args, **kwargs), g
 
 
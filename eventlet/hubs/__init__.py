@@ -43,7 +43,8 @@ def get_default_hub(mod=None):
 
     selected_mod = None
     if mod is not None and not isinstance(mod, six.string_types):
-        selected_mod = mod
+        # a hub module or the hub class itself
+        selected_mod = getattr(mod, 'Hub', mod)
     else:
         for m in (mod,) + hub_name_priority:
             if not m:
@@ -71,8 +72,26 @@ def get_default_hub(mod=None):
     return selected_mod
 
 
+class ThreadHubs(threading.local):
+    """ The hubs of the threads, at per_thread mode, a thread's hub is created
+        at its first use, or is the hub given by use_hub in the thread.
+    """
+
+    def __init__(self, hub_class, kwargs):
+        hub = getattr(_threadlocal, 'hub', None)
+        self.hub = hub_class(**kwargs) if hub is None else hub
+        #
+
+
+def _thread_hub(holder):
+    """ The inst of HubHolder at per_thread mode, the hub of the current thread """
+    return HubHolder.thread_hubs.hub
+
+
 class HubHolder:
-    inst = None  # active hub instance
+    inst = None  # active hub instance, a property of the thread's hub at per_thread mode
+    per_thread = False
+    thread_hubs = None
 
     @classmethod
     def __init__(cls):
@@ -85,21 +104,46 @@ class HubHolder:
         """Get the current event hub singleton object.
                     .. note :: |internal|
                     """
+        if cls.per_thread:
+            return cls.thread_hubs.hub
         if cls.inst is None:
             cls.__init__()
         return cls.inst
         #
 
     @classmethod
-    def use_hub(cls, mod=None):
+    def use_hub(cls, mod=None, per_thread=None, **kwargs):
         """Use the module *mod*, containing a class called Hub, as the
         event hub. Usually not required; the default hub is usually fine.
         If *mod* is None, use_hub uses the default hub.  Only call use_hub during application
         initialization,  because it resets the hub's state and any existing
         timers or listeners will never be resumed.
+        Keyword arguments are passed to the Hub class, for the hub's specific modes.
+
+        With *per_thread* True, every OS thread gets its own hub, loop and greenthreads,
+        the hub of a thread is created from *mod* and the keyword arguments at its
+        first use, a later use_hub in a thread replaces only that thread's hub.
+        *per_thread* False goes back to one hub of the process, None keeps the mode.
         """
         _threadlocal.Hub = get_default_hub(mod)
-        cls.inst = _threadlocal.Hub()
+        if per_thread is None:
+            per_thread = cls.per_thread
+        if not per_thread:
+            cls.per_thread = False
+            cls.thread_hubs = None
+            cls.inst = _threadlocal.Hub(**kwargs)
+            return
+
+        _threadlocal.hub = _threadlocal.Hub(**kwargs)
+        try:
+            if not cls.per_thread:
+                cls.thread_hubs = ThreadHubs(_threadlocal.Hub, kwargs)
+                cls.inst = property(_thread_hub)
+                cls.per_thread = True
+            else:
+                cls.thread_hubs.hub = _threadlocal.hub
+        finally:
+            del _threadlocal.hub
         #
 
 active_hub = HubHolder()
@@ -132,17 +176,21 @@ def trampoline(fd, read=None, write=None, timeout=None, timeout_exc=Timeout, mar
     current = greenlet.getcurrent()
     assert hub.greenlet is not current, 'do not call blocking functions from the mainloop'
 
-    # def _timeout(exc):
-    #   This is only useful to insert debugging
-    #    current.throw(exc)
-    t = None if timeout is None else hub.schedule_call_global(timeout, current.throw, timeout_exc)
     try:
         fileno = fd.fileno()
     except AttributeError:
         fileno = fd
 
-    listener = hub.add(hub.WRITE if write else hub.READ,
-                       fileno, current.switch, current.throw, mark_as_closed)
+    evtype = hub.WRITE if write else hub.READ
+    if hub.take_readiness(evtype, fileno):
+        return  # known ready since the last try, at an edge-triggered hub
+
+    # def _timeout(exc):
+    #   This is only useful to insert debugging
+    #    current.throw(exc)
+    t = None if timeout is None else hub.schedule_call_global(timeout, current.throw, timeout_exc)
+
+    listener = hub.add(evtype, fileno, current.switch, current.throw, mark_as_closed)
     try:
         try:
             return hub.switch()
@@ -0,0 +1,99 @@
+import os
+
+import eventlet
+from eventlet.hubs.v1_skeleton import new_waker
+
+select = eventlet.patcher.original('select')
+
+
+def set_blocking(fd, blocking):
+    if hasattr(os, 'set_blocking'):
+        os.set_blocking(fd, blocking)
+        return
+    import fcntl
+    flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+    fcntl.fcntl(fd, fcntl.F_SETFL, flags & ~os.O_NONBLOCK if blocking else flags | os.O_NONBLOCK)
+
+
+class BatchHandoff(object):
+    """ The handoff of the poll results batches of a waiter thread to a threaded hub.
+        The waiter posts a batch, signaling the ready eventfd, and blocks reading the
+        consumed eventfd, the waiter does not re-poll until the hub has consumed the batch.
+        The hub waits polling the ready eventfd, which is the wakeup channel of the hub too,
+        and releases the waiter once the batch's events are processed.
+        Made by the hub at each run, as the eventfds are notified opened at the hub,
+        and stopped at the end of the run, the waiter thread exits and closes it.
+    """
+
+    __slots__ = ['ready', 'consumed', 'consumed_fileno', 'poll', 'pending', 'stopping']
+
+    def __init__(self):
+        self.ready = new_waker()
+        self.consumed = new_waker()
+        self.consumed_fileno = self.consumed.fileno()
+        set_blocking(self.consumed_fileno, True)
+        self.poll = select.epoll()
+        self.poll.register(self.ready.fileno(), select.EPOLLIN)
+        self.pending = False  # a batch is posted and not yet released
+        self.stopping = False  # the run of the hub ended
+        #
+
+    def post(self):
+        """ Post the batch at the hub's events, from the waiter thread, returns once consumed,
+            at once when the hub stopped
+        """
+        self.pending = True
+        if self.stopping:
+            self.pending = False
+            return
+        self.ready.send()
+        try:
+            os.read(self.consumed_fileno, 8)
+        except (IOError, OSError):
+            pass  # closed
+        #
+
+    def wakeup(self):
+        """ Wake the hub from its wait, from any OS thread """
+        self.ready.send()
+        #
+
+    def wait(self, seconds):
+        """ Wait for a batch or a wakeup, up to seconds """
+        try:
+            if self.poll.poll(seconds):
+                self.ready.drain()
+        except (IOError, OSError):
+            pass  # EINTR
+        #
+
+    def release(self):
+        """ The posted batch is consumed, the waiter may poll again """
+        self.pending = False
+        self.consumed.send()
+        #
+
+    def stop(self):
+        """ The run of the hub ended, a waiter blocked at post is released,
+            the waiter exits at its next poll result
+        """
+        self.stopping = True
+        if self.pending:
+            self.release()
+        #
+
+    def close(self):
+        """ Close the eventfds and the epoll, by the waiter thread as it exits,
+            no listener of the hub is on them to notify
+        """
+        self.poll.close()
+        for waker in (self.ready, self.consumed):
+            # the write end of a pipe waker
+            for fd in (waker.fileno(), getattr(waker, 'w', None)):
+                if fd is None:
+                    continue
+                try:
+                    os.close(fd)
+                except (IOError, OSError):
+                    pass
+        #
@@ -0,0 +1,106 @@
+import os
+
+
+MIN_BUDGET = 0.000002   # a spin budget below is dropped to no spinning
+GROW_BUDGET = 0.00001   # the budget a grow starts from
+
+# the max spin budget, in seconds, of the hubs with a busy-poll mode, 0 disables
+BUSY_POLL = float(os.environ.get('EVENTLET_BUSY_POLL', 0))
+
+
+class BusyPoll(object):
+    """ Adaptive busy-poll of a hub's wait.
+        When the hub is idle the poll is spun without waiting, poll(0), for the spin
+        budget, only then the hub waits blocking.  The budget adapts to the idle time
+        until the next events, in the way of the halt polling of KVM:
+        a blocking wait that returned within the max budget doubles the budget,
+        spinning a little longer would have caught its events, and a blocking wait
+        longer than the max budget halves it, spinning is only a waste of CPU then.
+        The events caught while spinning are the wakeups, and their latency, saved.
+    """
+
+    __slots__ = ['clock', 'max_budget', 'budget',
+                 'spins', 'hits', 'spin_time', 'blocks', 'block_time']
+
+    def __init__(self, clock, max_budget):
+        if max_budget < 0:
+            raise ValueError("Busy-poll budget must not be negative, %r" % (max_budget,))
+        self.clock = clock
+        self.max_budget = max_budget
+        self.budget = max_budget
+        self.reset_stats()
+        #
+
+    def reset_stats(self):
+        self.spins = 0          # idle waits spun
+        self.hits = 0           # spins that got events, the wakeups saved
+        self.spin_time = 0.0    # seconds spinning, the CPU consumed
+        self.blocks = 0         # blocking waits
+        self.block_time = 0.0   # seconds waiting blocking
+        #
+
+    def poll(self, poll, timeout=-1):
+        """ poll(timeout) with spinning first, timeout is in seconds, -1 waits without limit """
+        if timeout == 0:
+            return poll(0)
+        clock = self.clock
+        start = clock()
+        budget = self.budget
+        if budget:
+            self.spins += 1
+            capped = 0 < timeout <= budget
+            if capped:
+                budget = timeout
+            deadline = start + budget
+            while True:
+                events = poll(0)
+                now = clock()
+                if events:
+                    self.hits += 1
+                    self.spin_time += now - start
+                    return events
+                if now >= deadline:
+                    break
+            self.spin_time += now - start
+            if capped:
+                timeout = 0  # spun the whole timeout
+            elif timeout > 0:
+                timeout -= now - start
+            start = now
+
+        events = poll(timeout)
+        waited = clock() - start
+        self.blocks += 1
+        self.block_time += waited
+        if events or waited > self.max_budget:  # ended by events, or long, as by a timer
+            self.adapt(waited + budget)
+        return events
+        #
+
+    def adapt(self, idle):
+        """ Adapt the budget to the idle time of a blocking wait """
+        max_budget = self.max_budget
+        budget = self.budget
+        if idle <= max_budget:
+            if budget < max_budget:
+                budget = budget * 2 if budget >= GROW_BUDGET else GROW_BUDGET
+                self.budget = budget if budget < max_budget else max_budget
+        elif budget:
+            budget /= 2
+            self.budget = budget if budget >= MIN_BUDGET else 0
+        #
+
+    def stats(self):
+        """ The spin CPU versus the wakeups saved """
+        return {
+            'budget': self.budget,
+            'max_budget': self.max_budget,
+            'spins': self.spins,
+            'hits': self.hits,
+            'hit_ratio': float(self.hits) / self.spins if self.spins else 0.0,
+            'spin_time': self.spin_time,
+            'spin_per_hit': self.spin_time / self.hits if self.hits else 0.0,
+            'blocks': self.blocks,
+            'block_time': self.block_time,
+        }
+        #
@@ -10,6 +10,7 @@ from eventlet.support import greenlets as greenlet, clear_sys_exc_info
 from eventlet import support
 from eventlet.hubs.v1_skeleton import (FdListener, DebugListener,
                                        alarm_handler, default_clock, arm_alarm, HubSkeleton)
+from eventlet.hubs.batch_handoff import BatchHandoff
 
 select = eventlet.patcher.original('select')
 orig_threading = eventlet.patcher.original('threading')
@@ -56,7 +57,7 @@ class Hub(object):
         self.timers = []
         self.next_timers = []
         self.listeners_events = deque()
-        self.event_notifier = orig_threading.Event()
+        self.handoff = None  # BatchHandoff, made at run
 
         self.greenlet = greenlet.greenlet(self.run)
         self.stopping = False
@@ -289,15 +290,14 @@ class Hub(object):
             sys.stderr.flush()
         #
 
-    def waiting_thread(self):
+    def waiting_thread(self, handoff):
 
         poll = self.poll.poll
+        listeners_events = self.listeners_events
         add_events = self.listeners_events.append
+        post = handoff.post
 
-        no_one_waiting = self.event_notifier.is_set
-        notify = self.event_notifier.set
-
-        while not self.stopping:
+        while not handoff.stopping:
             presult = None
             try:
                 presult = poll(DEFAULT_SLEEP)
@@ -325,8 +325,9 @@ class Hub(object):
                 if event & WRITE_MASK:
                     add_events((WRITE, fileno))
 
-            if not no_one_waiting():
-                notify()
+            if listeners_events:
+                post()  # no re-poll until the batch is consumed
+        handoff.close()
         #
 
     def run(self, *a, **kw):
@@ -351,12 +352,14 @@ class Hub(object):
 
             delay = 0
 
-            events_waiter = orig_threading.Thread(target=self.waiting_thread)
-            events_waiter.start()
+            # the waiter of a previous run exits at its next poll result
+            handoff = self.handoff = BatchHandoff()
+            wait = handoff.wait
+            release = handoff.release
 
-            self.event_notifier.set()
-            event_notifier_wait = self.event_notifier.wait
-            event_notifier_clear = self.event_notifier.clear
+            events_waiter = orig_threading.Thread(target=self.waiting_thread, args=(handoff,))
+            events_waiter.setDaemon(True)
+            events_waiter.start()
 
             while not self.stopping:
                 debug_blocking = self.debug_blocking
@@ -390,6 +393,8 @@ class Hub(object):
                         clear_sys_exc_info()
                     if debug_blocking:
                         self.block_detect_post()
+                if handoff.pending and not listeners_events:
+                    release()
 
                 # Assign new timers
                 while next_timers:
@@ -399,9 +404,8 @@ class Hub(object):
 
                 if not timers:
                     if not listeners_events:
-                        # wait for fd signals
-                        event_notifier_wait(DEFAULT_SLEEP)
-                        event_notifier_clear()
+                        # wait for a batch of fd events
+                        wait(DEFAULT_SLEEP)
                     continue
 
                 # current evaluated timer
@@ -417,9 +421,8 @@ class Hub(object):
                     if sleep_time <= 0:
                         continue
                     if not listeners_events and not next_timers:
-                        # wait for fd signals
-                        event_notifier_wait(sleep_time)
-                        event_notifier_clear()
+                        # wait for a batch of fd events
+                        wait(sleep_time)
                     continue
                 delay = (sleep_time+delay)/2  # delay is negative value
 
@@ -443,8 +446,11 @@ class Hub(object):
             else:
                 del self.timers[:]
                 del self.next_timers[:]
-                del self.listeners_events[:]
+                self.listeners_events.clear()
         finally:
+            handoff, self.handoff = self.handoff, None
+            if handoff is not None:
+                handoff.stop()
             self.running = False
             self.stopping = False
         #
@@ -485,6 +491,28 @@ class Hub(object):
         self.next_timers.append(timer)
         return timer
 
+    edge_triggered = False
+    completion_io = False
+
+    @staticmethod
+    def take_readiness(evtype, fileno):
+        return False
+
+    def call_soon(self, cb, *args):
+        """Schedule a callable to be called at the next run of the hub loop,
+        as a timer of zero seconds at this hub.
+        """
+        return self.add_timer(eventlet.Timer(0, cb, *args))
+
+    def call_soon_threadsafe(self, cb, *args):
+        """call_soon from any OS thread, the hub is woken if it waits.
+        """
+        timer = self.add_timer(eventlet.Timer(0, cb, *args))
+        handoff = self.handoff
+        if handoff is not None:
+            handoff.wakeup()
+        return timer
+
     def schedule_call_local(self, seconds, cb, *args, **kw):
         """Schedule a callable to be called after 'seconds' seconds have
         elapsed. Cancel the timer if greenlet has exited.
@@ -0,0 +1,543 @@
+import ctypes
+import errno
+import mmap
+import os
+import platform
+import sys
+import weakref
+
+from eventlet import patcher
+from eventlet.support import greenlets as greenlet, clear_sys_exc_info, get_errno
+from eventlet.hubs.v1_hub import BaseHub
+import six
+
+select = patcher.original('select')
+socket = patcher.original('socket')
+
+
+# SYSCALLS, x86_64, the rings are shared memory read & written without barriers,
+# that relies on the total store order of x86
+SYS_IO_URING_SETUP = 425
+SYS_IO_URING_ENTER = 426
+
+IORING_OFF_SQ_RING = 0
+IORING_OFF_CQ_RING = 0x8000000
+IORING_OFF_SQES = 0x10000000
+
+IORING_ENTER_GETEVENTS = 1 << 0
+IORING_ENTER_EXT_ARG = 1 << 3
+
+IORING_FEAT_SINGLE_MMAP = 1 << 0
+IORING_FEAT_NODROP = 1 << 1
+IORING_FEAT_EXT_ARG = 1 << 8
+REQUIRED_FEATURES = IORING_FEAT_SINGLE_MMAP | IORING_FEAT_NODROP | IORING_FEAT_EXT_ARG
+
+# OPCODES:
+IORING_OP_POLL_ADD = 6
+IORING_OP_ASYNC_CANCEL = 14
+IORING_OP_SEND = 26
+IORING_OP_RECV = 27
+
+READ_MASK = select.POLLIN | select.POLLPRI | select.POLLERR | select.POLLHUP
+WRITE_MASK = select.POLLOUT | select.POLLERR | select.POLLHUP
+
+RING_ENTRIES = int(os.environ.get('EVENTLET_IOURING_ENTRIES', 1024))
+NSIG_BYTES = 8
+
+# user_data of the operations which completions are not waited for, e.g. the cancels
+UD_IGNORE = 0
+
+
+class io_sqring_offsets(ctypes.Structure):
+    _fields_ = [('head', ctypes.c_uint32), ('tail', ctypes.c_uint32),
+                ('ring_mask', ctypes.c_uint32), ('ring_entries', ctypes.c_uint32),
+                ('flags', ctypes.c_uint32), ('dropped', ctypes.c_uint32),
+                ('array', ctypes.c_uint32), ('resv1', ctypes.c_uint32),
+                ('user_addr', ctypes.c_uint64)]
+
+
+class io_cqring_offsets(ctypes.Structure):
+    _fields_ = [('head', ctypes.c_uint32), ('tail', ctypes.c_uint32),
+                ('ring_mask', ctypes.c_uint32), ('ring_entries', ctypes.c_uint32),
+                ('overflow', ctypes.c_uint32), ('cqes', ctypes.c_uint32),
+                ('flags', ctypes.c_uint32), ('resv1', ctypes.c_uint32),
+                ('user_addr', ctypes.c_uint64)]
+
+
+class io_uring_params(ctypes.Structure):
+    _fields_ = [('sq_entries', ctypes.c_uint32), ('cq_entries', ctypes.c_uint32),
+                ('flags', ctypes.c_uint32), ('sq_thread_cpu', ctypes.c_uint32),
+                ('sq_thread_idle', ctypes.c_uint32), ('features', ctypes.c_uint32),
+                ('wq_fd', ctypes.c_uint32), ('resv', ctypes.c_uint32 * 3),
+                ('sq_off', io_sqring_offsets), ('cq_off', io_cqring_offsets)]
+
+
+class io_uring_sqe(ctypes.Structure):
+    _fields_ = [('opcode', ctypes.c_uint8), ('flags', ctypes.c_uint8),
+                ('ioprio', ctypes.c_uint16), ('fd', ctypes.c_int32),
+                ('off', ctypes.c_uint64), ('addr', ctypes.c_uint64),
+                ('len', ctypes.c_uint32), ('op_flags', ctypes.c_uint32),
+                ('user_data', ctypes.c_uint64), ('buf_index', ctypes.c_uint16),
+                ('personality', ctypes.c_uint16), ('splice_fd_in', ctypes.c_int32),
+                ('addr3', ctypes.c_uint64), ('pad', ctypes.c_uint64)]
+
+
+class io_uring_cqe(ctypes.Structure):
+    _fields_ = [('user_data', ctypes.c_uint64), ('res', ctypes.c_int32),
+                ('flags', ctypes.c_uint32)]
+
+
+class kernel_timespec(ctypes.Structure):
+    _fields_ = [('tv_sec', ctypes.c_int64), ('tv_nsec', ctypes.c_int64)]
+
+
+class io_uring_getevents_arg(ctypes.Structure):
+    _fields_ = [('sigmask', ctypes.c_uint64), ('sigmask_sz', ctypes.c_uint32),
+                ('pad', ctypes.c_uint32), ('ts', ctypes.c_uint64)]
+
+
+SQE_SIZE = ctypes.sizeof(io_uring_sqe)
+CQE_SIZE = ctypes.sizeof(io_uring_cqe)
+
+try:
+    _libc = ctypes.CDLL(None, use_errno=True)
+    _syscall = _libc.syscall
+    _syscall.restype = ctypes.c_long
+except (OSError, AttributeError):
+    _syscall = None
+
+memset = ctypes.memset
+c_uint32 = ctypes.c_uint32
+
+
+def io_uring_setup(entries, params):
+    fd = _syscall(ctypes.c_long(SYS_IO_URING_SETUP), ctypes.c_uint(entries), ctypes.byref(params))
+    if fd < 0:
+        e = ctypes.get_errno()
+        raise OSError(e, os.strerror(e))
+    return fd
+
+
+class IoUring(object):
+    """ A submission & a completion ring of an io_uring instance, mapped in memory.
+        The submissions are queued by get_sqe and passed to the kernel at enter,
+        the completions are taken by reap.
+    """
+
+    def __init__(self, entries=RING_ENTRIES):
+        params = io_uring_params()
+        self.fd = io_uring_setup(entries, params)
+        try:
+            if params.features & REQUIRED_FEATURES != REQUIRED_FEATURES:
+                raise OSError(errno.ENOSYS, "io_uring features 0x%x, required 0x%x" % (
+                    params.features, REQUIRED_FEATURES))
+            self._map(params)
+        except:
+            os.close(self.fd)
+            raise
+        self.ts = kernel_timespec()
+        self.arg = io_uring_getevents_arg(0, NSIG_BYTES, 0, ctypes.addressof(self.ts))
+        self.arg_ref = ctypes.byref(self.arg)
+        self.arg_size = ctypes.sizeof(self.arg)
+        #
+
+    def _map(self, params):
+        sq_off = params.sq_off
+        cq_off = params.cq_off
+        self.sq_entries = params.sq_entries
+        self.cq_entries = params.cq_entries
+        size = max(sq_off.array + params.sq_entries * 4, cq_off.cqes + params.cq_entries * CQE_SIZE)
+        prot = mmap.PROT_READ | mmap.PROT_WRITE
+        self.ring_mm = mmap.mmap(self.fd, size, mmap.MAP_SHARED, prot,
+                                 offset=IORING_OFF_SQ_RING)
+        self.sqes_mm = mmap.mmap(self.fd, params.sq_entries * SQE_SIZE, mmap.MAP_SHARED, prot,
+                                 offset=IORING_OFF_SQES)
+        # the exported buffers, released at close to unmap
+        self.ring_buf = ctypes.c_char.from_buffer(self.ring_mm)
+        self.sqes_buf = ctypes.c_char.from_buffer(self.sqes_mm)
+        ring = ctypes.addressof(self.ring_buf)
+
+        self.sq_head = c_uint32.from_address(ring + sq_off.head)
+        self.sq_tail = c_uint32.from_address(ring + sq_off.tail)
+        self.sq_mask = c_uint32.from_address(ring + sq_off.ring_mask).value
+        self.sqes = (io_uring_sqe * params.sq_entries).from_address(ctypes.addressof(self.sqes_buf))
+        # the sqes are used in ring order, the index array maps each slot to itself
+        array = (c_uint32 * params.sq_entries).from_address(ring + sq_off.array)
+        for i in six.moves.range(params.sq_entries):
+            array[i] = i
+        self.tail = self.sq_tail.value
+
+        self.cq_head = c_uint32.from_address(ring + cq_off.head)
+        self.cq_tail = c_uint32.from_address(ring + cq_off.tail)
+        self.cq_mask = c_uint32.from_address(ring + cq_off.ring_mask).value
+        self.cqes = (io_uring_cqe * params.cq_entries).from_address(ring + cq_off.cqes)
+        #
+
+    def get_sqe(self):
+        """ The next free submission entry, cleared, submits the queued entries
+            first if the ring is full
+        """
+        if self.pending() >= self.sq_entries:
+            err = self.enter(0, None)
+            if err:
+                raise OSError(err, os.strerror(err))
+        tail = self.tail
+        sqe = self.sqes[tail & self.sq_mask]
+        memset(ctypes.addressof(sqe), 0, SQE_SIZE)
+        self.tail = (tail + 1) & 0xffffffff
+        return sqe
+        #
+
+    def pending(self):
+        """ The submissions queued and not yet consumed by the kernel """
+        return (self.tail - self.sq_head.value) & 0xffffffff
+        #
+
+    def enter(self, min_complete, seconds):
+        """ Submit the queued entries, wait for min_complete completions up to
+            seconds, None waits without limit. Returns the errno, 0 on success
+        """
+        self.sq_tail.value = self.tail
+        flags = 0
+        arg = None
+        arg_size = 0
+        if min_complete:
+            flags = IORING_ENTER_GETEVENTS | IORING_ENTER_EXT_ARG
+            if seconds is None:
+                self.arg.ts = 0
+            else:
+                self.arg.ts = ctypes.addressof(self.ts)
+                self.ts.tv_sec = int(seconds)
+                self.ts.tv_nsec = int((seconds - int(seconds)) * 1000000000)
+            arg = self.arg_ref
+            arg_size = self.arg_size
+        res = _syscall(ctypes.c_long(SYS_IO_URING_ENTER), ctypes.c_uint(self.fd),
+                       ctypes.c_uint(self.pending()), ctypes.c_uint(min_complete),
+                       ctypes.c_uint(flags), arg, ctypes.c_size_t(arg_size))
+        if res < 0:
+            return ctypes.get_errno()
+        return 0
+        #
+
+    def reap(self):
+        """ Take the completions, a list of (user_data, res) """
+        head = self.cq_head.value
+        tail = self.cq_tail.value
+        if head == tail:
+            return ()
+        cqes = self.cqes
+        mask = self.cq_mask
+        done = []
+        add = done.append
+        while head != tail:
+            cqe = cqes[head & mask]
+            add((cqe.user_data, cqe.res))
+            head = (head + 1) & 0xffffffff
+        self.cq_head.value = head
+        return done
+        #
+
+    def close(self):
+        if self.fd < 0:
+            return
+        del self.sq_head, self.sq_tail, self.cq_head, self.cq_tail, self.sqes, self.cqes
+        del self.ring_buf, self.sqes_buf
+        self.ring_mm.close()
+        self.sqes_mm.close()
+        os.close(self.fd)
+        self.fd = -1
+        #
+
+
+_available = None
+
+
+def is_available():
+    global _available
+    if _available is None:
+        _available = False
+        if _syscall is not None and sys.platform.startswith('linux') and platform.machine() in ('x86_64', 'AMD64'):
+            try:
+                IoUring(8).close()
+                _available = True
+            except (OSError, IOError, ValueError):
+                pass
+    return _available
+
+
+def buffer_address(buff, nbytes, writable):
+    """ The address of a buffer & the object keeping it alive for the kernel """
+    try:
+        keep = (ctypes.c_char * nbytes).from_buffer(buff)
+    except TypeError:
+        if writable:
+            raise
+        # read-only buffer, bytes
+        keep = bytes(buff[:nbytes])
+        return ctypes.cast(ctypes.c_char_p(keep), ctypes.c_void_p).value, keep
+    return ctypes.addressof(keep), keep
+
+
+class Hub(BaseHub):
+    """ Linux io_uring hub.
+        A wait on a fd is a oneshot poll operation, the operations are queued
+        in the submission ring and passed to the kernel in one io_uring_enter
+        per loop, with the wait for the completions.
+        io_recv_into & io_send do the whole transfer as an io_uring operation,
+        the greenthread is switched back at its completion, that saves the
+        EAGAIN attempt & the wait of a readiness.
+    """
+
+    completion_io = True
+
+    def __init__(self, clock=None, entries=None, **kwargs):
+        super(Hub, self).__init__(clock, **kwargs)
+        self.ring = IoUring(entries or RING_ENTRIES)
+        self.next_id = UD_IGNORE
+        self.polls = {}       # user_data -> (evtype, fileno) of a pending poll
+        self.polls_ids = {}   # (evtype, fileno) -> user_data of its pending poll
+        self.ops = {}         # user_data -> [callback, buffer kept, fileno, opcode]
+        self.recv_stale = {}  # fileno -> bytes received by a canceled recv
+        self.fired = []       # (evtype, fileno) of the polls completed at the last wait
+        self.pid = os.getpid()
+        if hasattr(os, 'register_at_fork'):
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref().reinit())
+        #
+
+    def reinit(self):
+        """ A forked child shares the rings of the parent, set up a ring of its own,
+            poll again for the listeners & fail the operations in flight
+        """
+        self.pid = os.getpid()
+        entries = self.ring.sq_entries
+        self.ring.close()
+        self.ring = IoUring(entries)
+        self.polls.clear()
+        self.polls_ids.clear()
+        del self.fired[:]
+        for evtype, bucket in enumerate(self.listeners):
+            for fileno in bucket:
+                self.poll_add(evtype, fileno)
+        ops = list(self.ops.values())
+        self.ops.clear()
+        for op in ops:
+            if op[0] is not None:
+                self.call_soon(op[0], -errno.ECANCELED)
+        #
+
+    def new_id(self):
+        self.next_id = i = (self.next_id + 1) & 0xffffffffffffffff or 1
+        return i
+        #
+
+    def submit(self, opcode, fileno, addr=0, length=0, op_flags=0, user_data=UD_IGNORE):
+        sqe = self.ring.get_sqe()
+        sqe.opcode = opcode
+        sqe.fd = fileno
+        sqe.addr = addr
+        sqe.len = length
+        sqe.op_flags = op_flags
+        sqe.user_data = user_data
+        #
+
+    def cancel(self, user_data):
+        self.submit(IORING_OP_ASYNC_CANCEL, -1, user_data)
+        #
+
+    # POLLS
+    def poll_add(self, evtype, fileno):
+        key = (evtype, fileno)
+        if key in self.polls_ids:
+            return
+        i = self.new_id()
+        self.polls[i] = key
+        self.polls_ids[key] = i
+        self.submit(IORING_OP_POLL_ADD, fileno, op_flags=READ_MASK if evtype is self.READ else WRITE_MASK,
+                    user_data=i)
+        #
+
+    def poll_remove(self, evtype, fileno):
+        i = self.polls_ids.pop((evtype, fileno), None)
+        if i is not None:
+            # a pending poll holds a reference of the file, until its completion
+            del self.polls[i]
+            self.cancel(i)
+        #
+
+    def add(self, *args):
+        """ *args: evtype, fileno, cb, tb, mac """
+        listener = self.add_listener(*args)
+        self.poll_add(args[0], args[1])
+        return listener
+        #
+
+    def remove(self, listener):
+        self.remove_listener(listener)
+        evtype = listener.evtype
+        fileno = listener.fileno
+        if fileno not in self.listeners[evtype]:
+            self.poll_remove(evtype, fileno)
+        #
+
+    def remove_descriptor(self, fileno):
+        self.remove_descriptor_from_listeners(fileno)
+        self.poll_remove(self.READ, fileno)
+        self.poll_remove(self.WRITE, fileno)
+        self.ops_cancel(fileno)
+        #
+
+    def notify_close(self, fileno):
+        if not isinstance(fileno, six.integer_types):
+            return
+        self._obsolete(fileno)
+        self.poll_remove(self.READ, fileno)
+        self.poll_remove(self.WRITE, fileno)
+        self.ops_cancel(fileno)
+        self.recv_stale.pop(fileno, None)
+        #
+
+    def mark_as_reopened(self, fileno):
+        self._obsolete(fileno)
+        self.poll_remove(self.READ, fileno)
+        self.poll_remove(self.WRITE, fileno)
+        self.recv_stale.pop(fileno, None)
+        #
+
+    # COMPLETION OPERATIONS
+    def ops_cancel(self, fileno):
+        for i, op in list(self.ops.items()):
+            if op[2] == fileno and op[0] is not None:
+                self.cancel(i)
+        #
+
+    def io(self, opcode, fileno, addr, length, flags, keep, timeout, timeout_exc):
+        """ Submit an operation, switch to the hub until its completion,
+            returns its result or raises its error
+        """
+        current = greenlet.getcurrent()
+        i = self.new_id()
+        op = [current.switch, keep, fileno, opcode]
+        self.ops[i] = op
+        self.submit(opcode, fileno, addr, length, flags, i)
+        t = None
+        if timeout is not None:
+            t = self.schedule_call_global(timeout, current.throw, timeout_exc or socket.timeout('timed out'))
+        try:
+            res = self.switch()
+        except:
+            if self.ops.get(i) is op:
+                # canceled before the completion, the buffer is kept until the kernel is done with it
+                op[0] = None
+                self.cancel(i)
+            raise
+        finally:
+            if t is not None:
+                t.cancel()
+        if res < 0:
+            if res == -errno.ECANCELED:
+                raise socket.error(errno.ECONNRESET, 'Connection closed by another thread')
+            raise socket.error(-res, os.strerror(-res))
+        return res
+        #
+
+    def io_recv_into(self, fileno, buff, nbytes=0, flags=0, timeout=None, timeout_exc=None, attempt=None):
+        """ recv_into as an io_uring operation,
+            attempt is the non-blocking recv_into of the socket, tried before the operation
+            is submitted, after the bytes of a canceled recv
+        """
+        if not nbytes:
+            nbytes = len(buff)
+        stale = self.recv_stale.pop(fileno, None)
+        if stale is not None:
+            n = min(nbytes, len(stale))
+            buff[:n] = stale[:n]
+            if n < len(stale):
+                self.recv_stale[fileno] = stale[n:]
+            return n
+        if attempt is not None:
+            try:
+                return attempt(buff, nbytes, flags)
+            except socket.error as e:
+                if get_errno(e) not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    raise
+        addr, keep = buffer_address(buff, nbytes, True)
+        return self.io(IORING_OP_RECV, fileno, addr, nbytes, flags, keep, timeout, timeout_exc)
+        #
+
+    def io_send(self, fileno, data, nbytes=0, flags=0, timeout=None, timeout_exc=None):
+        """ send as an io_uring operation """
+        if not nbytes:
+            nbytes = len(data)
+        if not nbytes:
+            return 0
+        addr, keep = buffer_address(data, nbytes, False)
+        return self.io(IORING_OP_SEND, fileno, addr, nbytes, flags, keep, timeout, timeout_exc)
+        #
+
+    def op_done(self, op, res):
+        cb = op[0]
+        if cb is not None:
+            cb(res)
+            return
+        if res > 0 and op[3] == IORING_OP_RECV:
+            # the data of a recv completed while being canceled, for the next recv
+            self.recv_stale[op[2]] = op[1].raw[:res]
+        #
+
+    def rearm(self):
+        """ The polls are oneshot, poll again for the listeners left after their event """
+        listeners = self.listeners
+        polls_ids = self.polls_ids
+        for key in self.fired:
+            if key not in polls_ids and key[1] in listeners[key[0]]:
+                self.poll_add(*key)
+        del self.fired[:]
+        #
+
+    def wait(self, seconds=0):
+        if self.pid != os.getpid():
+            self.reinit()
+        if self.fired:
+            self.rearm()
+        ring = self.ring
+        if seconds > 0 and ring.cq_head.value == ring.cq_tail.value:
+            err = ring.enter(1, seconds)
+        elif ring.pending():
+            err = ring.enter(0, None)
+        else:
+            err = 0
+        if err and err not in (errno.ETIME, errno.EINTR, errno.EBUSY, errno.EAGAIN):
+            raise OSError(err, os.strerror(err))
+
+        done = ring.reap()
+        if not done:
+            return
+        polls = self.polls
+        polls_ids = self.polls_ids
+        ops = self.ops
+        add_listener_events = self.add_listener_events
+        fired = self.fired.append
+        for i, res in done:
+            if i == UD_IGNORE:
+                continue
+            key = polls.pop(i, None)
+            if key is not None:
+                del polls_ids[key]
+                if res != -errno.ECANCELED:
+                    add_listener_events(key)
+                    fired(key)
+                    if res == -errno.EBADF:
+                        self.remove_descriptor(key[1])
+                continue
+            op = ops.pop(i, None)
+            if op is None:
+                continue
+            try:
+                self.op_done(op, res)
+            except self.SYSTEM_EXCEPTIONS:
+                raise
+            except:
+                self.squelch_exception(op[2], sys.exc_info())
+                clear_sys_exc_info()
+        #
@@ -1,10 +1,12 @@
 import errno
+import functools
 import sys
 import traceback
 import heapq
 import eventlet
 from eventlet.support import clear_sys_exc_info, get_errno
 from eventlet.hubs.v1_skeleton import HubSkeleton, FdListener
+from eventlet.hubs.busy_poll import BusyPoll, BUSY_POLL
 
 select = eventlet.patcher.original('select')
 
@@ -33,7 +35,7 @@ class Hub(HubSkeleton):
     WRITE = WRITE
     READ = READ
 
-    def __init__(self, clock=None):
+    def __init__(self, clock=None, busy_poll=None):
         super(Hub, self).__init__(clock)
 
         self.listeners = ({}, {})
@@ -44,10 +46,17 @@ class Hub(HubSkeleton):
         self.timers = []
 
         self.poll = select.epoll()
+
+        if busy_poll is None:
+            busy_poll = BUSY_POLL
+        self.busy_poll = BusyPoll(self.clock, busy_poll) if busy_poll else None  # spin before a wait
         #
 
     def add_timer(self, timer):
         timer.scheduled_time = self.clock() + timer.seconds
+        if timer.seconds <= 0:
+            self.add_ready(timer)
+            return timer
         heappush(self.timers, (timer.scheduled_time, timer))
         return timer
         #
@@ -119,6 +128,7 @@ class Hub(HubSkeleton):
 
         self.running = True
         self.stopping = False
+        self.open_waker()
 
         clock = self.clock
         timers = self.timers
@@ -128,9 +138,12 @@ class Hub(HubSkeleton):
         pop_closed = self.closed.pop
 
         poll = self.poll.poll
+        if self.busy_poll is not None:
+            poll = functools.partial(self.busy_poll.poll, poll)
         get_reader = self.listeners[READ].get
         get_writer = self.listeners[WRITE].get
         squelch_exception = self.squelch_exception
+        fire_ready = self.fire_ready
 
         while not self.stopping:
 
@@ -158,6 +171,9 @@ class Hub(HubSkeleton):
             else:
                 due = DEFAULT_SLEEP
 
+            if fire_ready():
+                due = 0
+
             while closed:                # Ditch all closed fds first.
                 l = pop_closed(-1)
                 if not l.greenlet.dead:  # There's no point signalling a greenlet that's already dead.
@@ -189,6 +205,7 @@ class Hub(HubSkeleton):
                 raise
 
         del self.timers[:]
+        self.ready.clear()
         del self.closed[:]
 
         self.running = False
@@ -196,7 +213,11 @@ class Hub(HubSkeleton):
         #
 
     def get_readers(self):
-        return self.listeners_r.values()
+        if self.waker is None:
+            return self.listeners_r.values()
+        readers = dict(self.listeners_r)
+        readers.pop(self.waker.fileno(), None)
+        return readers.values()
         #
 
     def get_writers(self):
@@ -208,7 +229,7 @@ class Hub(HubSkeleton):
         #
 
     def get_listeners_count(self):
-        return len(self.listeners_r),  len(self.listeners_w)
+        return len(self.listeners_r) - (self.waker is not None),  len(self.listeners_w)
         #
 
     def register(self, fileno, new=False):
@@ -7,6 +7,7 @@ from collections import deque
 import eventlet
 from eventlet.support import clear_sys_exc_info, get_errno
 from eventlet.hubs.v1_skeleton import HubSkeleton
+from eventlet.hubs.batch_handoff import BatchHandoff
 
 select = eventlet.patcher.original('select')
 orig_threading = eventlet.patcher.original('threading')
@@ -50,13 +51,15 @@ class Hub(HubSkeleton):
         self.listeners_events = deque()
         self.add_listener_events = self.listeners_events.append
         self.poll = select.epoll()
-        self.event_has = orig_threading.Event()
-        self.event_want = orig_threading.Event()
+        self.handoff = None  # BatchHandoff, made at run
         self.events_waiter = None
         #
 
     def add_timer(self, timer):
         timer.scheduled_time = self.clock() + timer.seconds
+        if timer.seconds <= 0:
+            self.add_ready(timer)
+            return timer
         heappush(self.timers, (timer.scheduled_time, timer))
         return timer
         #
@@ -114,29 +117,30 @@ class Hub(HubSkeleton):
             sys.stderr.flush()
         #
 
-    def waiting_thread(self):
+    def wakeup(self):
+        """ The loop waits on the handoff """
+        handoff = self.handoff
+        if handoff is not None:
+            handoff.wakeup()
+        #
+
+    def waiting_thread(self, handoff):
         poll = self.poll.poll
         fd_events = self.listeners_events
         add_event = self.listeners_events.append
+        post = handoff.post
 
-        has = self.event_has.set
-        want = self.event_want.wait
-        want_clear = self.event_want.clear
-
-        while not self.stopping:
+        while not handoff.stopping:
             try:
                 for f, ev in poll(DEFAULT_SLEEP):
                     if ev & EXC_MASK or ev & READ_MASK:
-                        if (f, READ) not in fd_events:
-                            add_event((f, READ))
+                        add_event((f, READ))
                     if ev & EXC_MASK or ev & WRITE_MASK:
-                        if (f, WRITE) not in fd_events:
-                            add_event((f, WRITE))
+                        add_event((f, WRITE))
                     if ev & POLLNVAL:
                         self.remove_descriptor(f)
-                has()
-                want(1)
-                want_clear()
+                if fd_events:
+                    post()  # no re-poll until the batch is consumed
             except (IOError, select.error) as e:
                 if get_errno(e) == errno.EINTR:
                     ev_sleep(1)
@@ -144,6 +148,7 @@ class Hub(HubSkeleton):
                 raise
             except SYSTEM_EXCEPTIONS:
                 raise
+        handoff.close()
         #
 
     def run(self, *a, **kw):
@@ -157,13 +162,14 @@ class Hub(HubSkeleton):
         self.running = True
         self.stopping = False
 
-        if self.events_waiter is None or not self.events_waiter.is_alive():
-            self.events_waiter = orig_threading.Thread(target=self.waiting_thread)
-            self.events_waiter.start()
+        # the waiter of a previous run exits at its next poll result
+        handoff = self.handoff = BatchHandoff()
+        self.events_waiter = orig_threading.Thread(target=self.waiting_thread, args=(handoff,))
+        self.events_waiter.setDaemon(True)
+        self.events_waiter.start()
 
-        wait = self.event_has.wait
-        wait_clear = self.event_has.clear
-        want = self.event_want.set
+        wait = handoff.wait
+        release = handoff.release
 
         listeners = self.listeners
         timers = self.timers
@@ -176,56 +182,65 @@ class Hub(HubSkeleton):
 
         squelch_exception = self.squelch_exception
         clock = self.clock
+        fire_ready = self.fire_ready
 
-        while not self.stopping:
-            when = clock()
-            while timers:
-                exp, t = timers[0]   # current evaluated timer
-                if t.called:
-                    heappop(timers)  # remove called/cancelled timer
+        try:
+            while not self.stopping:
+                when = clock()
+                while timers:
+                    exp, t = timers[0]   # current evaluated timer
+                    if t.called:
+                        heappop(timers)  # remove called/cancelled timer
+                        continue
+                    due = exp - when
+                    if due > 0:
+                        break
+                    heappop(timers)  # remove evaluated timer
+                    try:
+                        t()
+                    except SYSTEM_EXCEPTIONS:
+                        raise
+                    except:
+                        pass
                     continue
-                due = exp - when
-                if due > 0:
-                    break
-                heappop(timers)  # remove evaluated timer
-                try:
-                    t()
-                except SYSTEM_EXCEPTIONS:
-                    raise
-                except:
-                    pass
-                continue
-            else:
-                due = DEFAULT_SLEEP
-
-            if not fd_events:
-                wait(due)  # wait for fd signals
-                wait_clear()
-
-            while fd_events:
-                fileno, ev = fd_events[0]
-                try:
-                    l = listeners[ev].get(fileno)
-                    if l:
-                        l.cb(fileno)
-                except SYSTEM_EXCEPTIONS:
-                    raise
-                except:
-                    squelch_exception(fileno, sys.exc_info())
-                    clear_sys_exc_info()
-                pop_fd_event()
-            want()
-
-            while closed:                # Ditch all closed fds first.
-                l = pop_closed(-1)
-                if not l.greenlet.dead:  # There's no point signalling a greenlet that's already dead.
-                    l.tb(eventlet.hubs.IOClosed(errno.ENOTCONN, "Operation on closed file"))
-
-        del self.timers[:]
-        del self.listeners_events[:]
-
-        self.running = False
-        self.stopping = False
+                else:
+                    due = DEFAULT_SLEEP
+
+                if fire_ready():
+                    due = 0
+
+                if not fd_events:
+                    wait(due)  # wait for a batch of fd events
+                    self.wakeup_pending = False
+
+                while fd_events:
+                    fileno, ev = fd_events[0]
+                    try:
+                        l = listeners[ev].get(fileno)
+                        if l:
+                            l.cb(fileno)
+                    except SYSTEM_EXCEPTIONS:
+                        raise
+                    except:
+                        squelch_exception(fileno, sys.exc_info())
+                        clear_sys_exc_info()
+                    pop_fd_event()
+                if handoff.pending and not fd_events:
+                    release()
+
+                while closed:                # Ditch all closed fds first.
+                    l = pop_closed(-1)
+                    if not l.greenlet.dead:  # There's no point signalling a greenlet that's already dead.
+                        l.tb(eventlet.hubs.IOClosed(errno.ENOTCONN, "Operation on closed file"))
+
+            del self.timers[:]
+            self.ready.clear()
+            self.listeners_events.clear()
+        finally:
+            self.handoff = None
+            handoff.stop()
+            self.running = False
+            self.stopping = False
         #
 
     def get_readers(self):
@@ -0,0 +1,201 @@
+import operator
+
+
+SLOT_BITS = 6
+SLOTS = 1 << SLOT_BITS  # slots in a level
+SLOT_MASK = SLOTS - 1
+LEVELS = 6              # with 1ms resolution, 64^6 ticks cover ~2 years
+
+DEFAULT_RESOLUTION = 0.001
+
+scheduled_time_key = operator.attrgetter('scheduled_time')
+
+
+class TimerWheel(object):
+    """ Hierarchical timing wheel of timers.
+        A timer is due at the tick of its scheduled_time rounded up to the resolution.
+        A timer is kept at the first level that its distance in ticks from the
+        current tick fits in, and is cascaded to a lower level lazily, only once the
+        current tick reaches the slot the timer is in.
+        Insert and cancel are O(1), canceled timers are dropped when their slot is
+        cascaded or fired, or at cleanup once most of the wheel is canceled timers.
+        The fileno of a timer pending in the wheel is set to the wheel.
+    """
+
+    __slots__ = ['resolution', 'tick', 'levels', 'counts', 'overflow', 'count', 'canceled']
+
+    def __init__(self, now, resolution=DEFAULT_RESOLUTION):
+        if resolution <= 0:
+            raise ValueError("Timer wheel resolution must be positive, %r" % (resolution,))
+        self.resolution = resolution
+        self.tick = int(now / resolution)  # next tick to process
+        self.levels = [[[] for _ in range(SLOTS)] for _ in range(LEVELS)]
+        self.counts = [0] * LEVELS   # timers in a level
+        self.overflow = []           # timers beyond the last level
+        self.count = 0
+        self.canceled = 0
+        #
+
+    def __len__(self):
+        return self.count
+        #
+
+    def add(self, timer, scheduled_time):
+        """ Add a timer due at scheduled_time """
+        timer.fileno = self
+        self.count += 1
+        self.place(timer, scheduled_time)
+        #
+
+    def place(self, timer, scheduled_time):
+        expires = scheduled_time / self.resolution
+        tick = int(expires)
+        if tick < expires:
+            tick += 1
+        delta = tick - self.tick
+        if delta < SLOTS:
+            if delta < 0:
+                tick = self.tick
+            self.levels[0][tick & SLOT_MASK].append(timer)
+            self.counts[0] += 1
+            return
+        level = (delta.bit_length() - 1) // SLOT_BITS
+        if level >= LEVELS:
+            self.overflow.append(timer)
+            return
+        self.levels[level][(tick >> (SLOT_BITS * level)) & SLOT_MASK].append(timer)
+        self.counts[level] += 1
+        #
+
+    def cancel(self, timer):
+        """ A timer was canceled, cleanup the wheel if most of it is canceled timers """
+        if timer.fileno is not self:
+            return
+        timer.fileno = None
+        self.canceled += 1
+        if self.count > 1000 and self.count <= self.canceled * 2:
+            self.cleanup()
+        #
+
+    def cleanup(self):
+        count = 0
+        for level, slots in enumerate(self.levels):
+            n = 0
+            for slot in slots:
+                if slot:
+                    slot[:] = [t for t in slot if not t.called]
+                    n += len(slot)
+            self.counts[level] = n
+            count += n
+        self.overflow[:] = [t for t in self.overflow if not t.called]
+        count += len(self.overflow)
+        self.count = count
+        self.canceled = 0
+        #
+
+    def _take(self, lst):
+        """ Remove the timers in a slot, returns the pending ones """
+        timers = lst[:]
+        del lst[:]
+        self.count -= len(timers)
+        pending = [t for t in timers if not t.called]
+        self.canceled -= len(timers) - len(pending)
+        return pending
+
+    def _cascade(self, level):
+        """ Move the timers of the current slot at level down to the lower levels """
+        slot = self.levels[level][(self.tick >> (SLOT_BITS * level)) & SLOT_MASK]
+        if not slot:
+            return
+        self.counts[level] -= len(slot)
+        timers = slot[:]
+        del slot[:]
+        for t in timers:
+            if t.called:
+                self.count -= 1
+                self.canceled -= 1
+                continue
+            self.place(t, t.scheduled_time)
+        #
+
+    def advance(self, now):
+        """ Advance the wheel to the tick of now, returns the due timers in order """
+        due = []
+        target = int(now / self.resolution)
+        counts = self.counts
+        levels = self.levels
+        while self.tick <= target:
+            if not self.count:
+                self.tick = target + 1
+                break
+            tick = self.tick
+            if not counts[0]:
+                # nothing at the first level, skip to the next cascade of a used level
+                level = 1
+                while level < LEVELS and not counts[level]:
+                    level += 1
+                mask = (1 << (SLOT_BITS * level)) - 1
+                if tick & mask:
+                    tick = (tick | mask) + 1
+                    if tick > target:
+                        self.tick = target + 1
+                        break
+                    self.tick = tick
+
+            if not tick & SLOT_MASK:
+                level = 1
+                while level < LEVELS:
+                    self._cascade(level)
+                    if (tick >> (SLOT_BITS * level)) & SLOT_MASK:
+                        break
+                    level += 1
+                else:
+                    # wrapped the whole wheel
+                    overflow = self._take(self.overflow)
+                    self.count += len(overflow)
+                    for t in overflow:
+                        self.place(t, t.scheduled_time)
+
+            slot = levels[0][tick & SLOT_MASK]
+            self.tick = tick + 1
+            if slot:
+                counts[0] -= len(slot)
+                due.extend(self._take(slot))
+        for t in due:
+            t.fileno = None
+        if len(due) > 1:
+            due.sort(key=scheduled_time_key)
+        return due
+        #
+
+    def next_due(self):
+        """ The time of the next tick with timers, or of the next cascade,
+            None without timers
+        """
+        if not self.count:
+            return None
+        tick = self.tick
+        counts = self.counts
+        level = 1
+        while level < LEVELS and not counts[level]:
+            level += 1
+        mask = (1 << (SLOT_BITS * level)) - 1
+        due = (tick | mask) + 1 if tick & mask else tick
+        if counts[0]:
+            slots = self.levels[0]
+            for i in range(min(SLOTS, due - tick)):
+                if slots[(tick + i) & SLOT_MASK]:
+                    due = tick + i
+                    break
+        return due * self.resolution
+        #
+
+    def clear(self):
+        for slots in self.levels:
+            for slot in slots:
+                del slot[:]
+        self.counts = [0] * LEVELS
+        del self.overflow[:]
+        self.count = 0
+        self.canceled = 0
+        #
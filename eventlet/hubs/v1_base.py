@@ -1,4 +1,5 @@
 import errno
+import os
 import sys
 import traceback
 from collections import deque
@@ -7,6 +8,7 @@ import heapq
 import eventlet
 from eventlet import support
 from eventlet.hubs.v1_skeleton import HubSkeleton
+from eventlet.hubs.timer_wheel import TimerWheel, DEFAULT_RESOLUTION
 
 # EVENT TYPE INDEX FOR listeners TUPLE
 READ = 0
@@ -16,6 +18,13 @@ event_types = (READ, WRITE)
 heappush = heapq.heappush
 heappop = heapq.heappop
 
+# TIMERS BACKEND
+TIMER_BACKEND_HEAP = 'heap'
+TIMER_BACKEND_WHEEL = 'wheel'
+TIMER_BACKENDS = (TIMER_BACKEND_HEAP, TIMER_BACKEND_WHEEL)
+TIMER_BACKEND = os.environ.get('EVENTLET_TIMER_BACKEND', TIMER_BACKEND_HEAP)
+TIMER_RESOLUTION = float(os.environ.get('EVENTLET_TIMER_RESOLUTION', DEFAULT_RESOLUTION))
+
 
 class HubBase(HubSkeleton):
     """ HubBase class for easing the implementation of subclasses to Timers, Listeners and Listeners Events"""
@@ -24,9 +33,16 @@ class HubBase(HubSkeleton):
     WRITE = WRITE
     event_types = event_types
 
-    def __init__(self, clock=None):
+    def __init__(self, clock=None, timer_backend=None, timer_resolution=None):
         super(HubBase, self).__init__(clock)
 
+        if timer_backend is None:
+            timer_backend = TIMER_BACKEND
+        if timer_backend not in TIMER_BACKENDS:
+            raise ValueError("Unknown timer backend %r, expected one of %r" % (timer_backend, TIMER_BACKENDS))
+        if timer_resolution is None:
+            timer_resolution = TIMER_RESOLUTION
+
         self.listeners = ({}, {})
         self.listeners_r = self.listeners[READ]
         self.listeners_w = self.listeners[WRITE]
@@ -37,6 +53,10 @@ class HubBase(HubSkeleton):
         self.next_timers = []
         self.add_next_timer = self.next_timers.append
         self.timer_delay = 0
+        self.timer_wheel = None
+        if timer_backend == TIMER_BACKEND_WHEEL:
+            self.timer_wheel = TimerWheel(self.clock(), timer_resolution)
+            self.timer_canceled = self.timer_wheel.cancel  # lazy removal
 
         self.listeners_events = deque()
         self.add_listener_events = self.listeners_events.append
@@ -204,11 +224,18 @@ class HubBase(HubSkeleton):
 
     def add_timer(self, timer):
         timer.scheduled_time = self.clock() + timer.seconds
-        self.add_next_timer(timer)
+        if timer.seconds <= 0:
+            self.add_ready(timer)
+        elif self.timer_wheel is not None:
+            self.timer_wheel.add(timer, timer.scheduled_time)
+        else:
+            self.add_next_timer(timer)
         return timer
         #
 
     def prepare_timers(self):
+        if self.timer_wheel is not None:
+            return
         pop = self.next_timers.pop
         while self.next_timers:
             timer = pop(-1)
@@ -217,6 +244,8 @@ class HubBase(HubSkeleton):
         #
 
     def fire_timers(self, when):
+        if self.timer_wheel is not None:
+            return self.fire_wheel_timers(when)
         debug_blocking = self.debug_blocking
         timers = self.timers
 
@@ -250,19 +279,63 @@ class HubBase(HubSkeleton):
                 self.block_detect_post()
         #
 
+    def fire_wheel_timers(self, when):
+        debug_blocking = self.debug_blocking
+        for t in self.timer_wheel.advance(when):
+            if t.called:
+                # canceled by a timer fired before it
+                continue
+
+            if debug_blocking:
+                self.block_detect_pre()
+            try:
+                t()
+            except self.SYSTEM_EXCEPTIONS:
+                raise
+            except:
+                if self.debug_exceptions:
+                    self.squelch_generic_exception(sys.exc_info())
+                support.clear_sys_exc_info()
+
+            if debug_blocking:
+                self.block_detect_post()
+        #
+
+    def next_timer_due(self):
+        """ The scheduled time of the next timer, None without timers """
+        if self.timer_wheel is not None:
+            return self.timer_wheel.next_due()
+        timers = self.timers
+        return timers[0][0] if timers else None
+        #
+
+    def clear_timers(self):
+        del self.timers[:]
+        del self.next_timers[:]
+        if self.timer_wheel is not None:
+            self.timer_wheel.clear()
+        #
+
     # for debugging:
 
     def get_readers(self):
-        return self.listeners_r.values()
+        if self.waker is None:
+            return self.listeners_r.values()
+        readers = dict(self.listeners_r)
+        readers.pop(self.waker.fileno(), None)
+        return readers.values()
 
     def get_writers(self):
         return self.listeners_w.values()
 
     def get_timers_count(self):
-        return len(self.timers)+len(self.next_timers)
+        count = len(self.timers)+len(self.next_timers)
+        if self.timer_wheel is not None:
+            count += len(self.timer_wheel)
+        return count
 
     def get_listeners_count(self):
-        return len(self.listeners_r),  len(self.listeners_w)
+        return len(self.listeners_r) - (self.waker is not None),  len(self.listeners_w)
 
     def get_listeners_events_count(self):
         return len(self.listeners_events)
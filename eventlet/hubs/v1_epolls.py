@@ -14,8 +14,8 @@ def is_available():
 
 class Hub(v1_poll.Hub):
 
-    def __init__(self, clock=None):
-        BaseHub.__init__(self, clock)
+    def __init__(self, clock=None, **kwargs):
+        BaseHub.__init__(self, clock, **kwargs)
         self.poll = select.epoll()
 
     def add(self, *args):
@@ -1,4 +1,5 @@
 import errno
+import heapq
 import os
 import sys
 import traceback
@@ -7,7 +8,8 @@ from linuxfd import timerfd_c
 
 import eventlet
 from eventlet.support import clear_sys_exc_info, get_errno
-from eventlet.hubs.v1_skeleton import HubSkeleton, HubFileDetails
+from eventlet.hubs.v1_skeleton import HubSkeleton, FdTable
+from eventlet.hubs.busy_poll import BusyPoll, BUSY_POLL
 
 select = eventlet.patcher.original('select')
 
@@ -29,44 +31,105 @@ CLOSED_MASK = select.POLLNVAL | select.EPOLLERR
 READ_MASK = select.EPOLLIN | select.EPOLLPRI | select.EPOLLHUP
 WRITE_MASK = select.EPOLLOUT | EPOLLRDHUP
 
+# EDGE-TRIGGERED, an fd is registered once for both directions,
+# readiness without a listener is kept at FdTable.ready
+EDGE_MASK = select.EPOLLIN | select.EPOLLOUT | EPOLLRDHUP | select.EPOLLET
+EDGE_READ_MASK = select.EPOLLIN | select.EPOLLPRI | select.EPOLLHUP | EPOLLRDHUP | select.EPOLLERR
+EDGE_WRITE_MASK = select.EPOLLOUT | select.EPOLLHUP | select.EPOLLERR
+READY_READ = 1 << READ
+READY_WRITE = 1 << WRITE
+
+# EPOLL MODES:
+EPOLL_LEVEL = 'level'  # an fd is registered for the directions with listeners
+EPOLL_EDGE = 'edge'    # an fd is registered once, at open or first listener, until close
+EPOLL_MODES = (EPOLL_LEVEL, EPOLL_EDGE)
+EPOLL_MODE = os.environ.get('EVENTLET_EPOLL_MODE', EPOLL_LEVEL)
+
 # TIMER-FD DETAILS:
 MIN_TIMER = 0.000000001
 TIMER_MASK = select.EPOLLIN | select.EPOLLONESHOT | select.EPOLLHUP  # | EXC_MASK
 
+# the single timerfd is edge-triggered, every expiry wakes the epoll wait-queue
+# and a re-arm resets the expirations count, so the fd is never read.
+TIMER_SINGLE_MASK = select.EPOLLIN | select.EPOLLET
+
 TIMER_CLOCK = timerfd_c.CLOCK_MONOTONIC
 TIMER_FLAGS = timerfd_c.TFD_NONBLOCK
 timerfd_create = timerfd_c.timerfd_create
 timerfd_settime = timerfd_c.timerfd_settime
 
+# TIMERFD MODES:
+TIMERFD_PER_TIMER = 'per_timer'  # a timerfd for each timer
+TIMERFD_SINGLE = 'single'        # timers in a heap, one timerfd armed to the earliest
+TIMERFD_MODES = (TIMERFD_PER_TIMER, TIMERFD_SINGLE)
+TIMERFD_MODE = os.environ.get('EVENTLET_TIMERFD_MODE', TIMERFD_PER_TIMER)
+
+heappush = heapq.heappush
+heappop = heapq.heappop
+heapify = heapq.heapify
+
 
 class Hub(HubSkeleton):
-    __slots__ = HubSkeleton.__slots__ + ['fds', 'closed',  'timers_immediate', 'poll', 'poll_backing']
+    __slots__ = HubSkeleton.__slots__ + ['fds', 'closed', 'poll', 'poll_backing',
+                                         'timerfd_single', 'timer_fileno', 'timer_armed',
+                                         'timers', 'timers_canceled', 'edge_triggered', 'busy_poll']
     WRITE = WRITE
     READ = READ
 
-    def __init__(self, clock=None):
+    def __init__(self, clock=None, timerfd_mode=None, epoll_mode=None, busy_poll=None):
         super(Hub, self).__init__(clock)
 
-        self.fds = {}        # HubFileDetails
+        self.fds = FdTable()  # listeners, by fileno
         self.closed = []     # FdListener
 
-        self.timers_immediate = []  # timer-obj
-
         self.poll = select.epoll()
         self.poll_backing = select.epoll.fromfd(os.dup(self.poll.fileno()))
+
+        if timerfd_mode is None:
+            timerfd_mode = TIMERFD_MODE
+        if timerfd_mode not in TIMERFD_MODES:
+            raise ValueError("Unknown timerfd mode %r, expected one of %r" % (timerfd_mode, TIMERFD_MODES))
+
+        if epoll_mode is None:
+            epoll_mode = EPOLL_MODE
+        if epoll_mode not in EPOLL_MODES:
+            raise ValueError("Unknown epoll mode %r, expected one of %r" % (epoll_mode, EPOLL_MODES))
+        self.edge_triggered = epoll_mode == EPOLL_EDGE
+
+        if busy_poll is None:
+            busy_poll = BUSY_POLL
+        self.busy_poll = BusyPoll(self.clock, busy_poll) if busy_poll else None  # spin before a wait
+
+        self.timerfd_single = timerfd_mode == TIMERFD_SINGLE
+        self.timers = []            # (scheduled_time, timer-obj) heap, at single timerfd mode
+        self.timers_canceled = 0    # canceled timers still in the heap
+        self.timer_armed = None     # scheduled_time the single timerfd is armed to
+        self.timer_fileno = None
+        if self.timerfd_single:
+            self.timer_fileno = int(timerfd_create(TIMER_CLOCK, TIMER_FLAGS))
+            self.fds.open(self.timer_fileno, self.timer_fire_expired)
+            self.poll.register(self.timer_fileno, TIMER_SINGLE_MASK)
         #
 
     def add_timer(self, timer):
         seconds = timer.seconds
         if seconds < MIN_TIMER:
-            self.timers_immediate.append(timer)
+            self.add_ready(timer)
+            return timer
+
+        if self.timerfd_single:
+            scheduled_time = timer.scheduled_time = self.clock() + seconds
+            timer.fileno = self.timer_fileno  # marks the timer as being in the heap
+            heappush(self.timers, (scheduled_time, timer))
+            if self.timer_armed is None or scheduled_time < self.timer_armed:
+                self.timer_arm(scheduled_time, seconds)
             return timer
 
         fileno = int(timerfd_create(TIMER_CLOCK, TIMER_FLAGS))
         self._obsolete(fileno)
 
         timer.fileno = fileno
-        self.fds[fileno] = HubFileDetails(timer, True)
+        self.fds.open(fileno, timer)
         try:
             self.poll.register(fileno, TIMER_MASK)
         except:
@@ -80,9 +143,21 @@ class Hub(HubSkeleton):
         #
 
     def timer_canceled(self, timer):
+        if self.timerfd_single:
+            if timer.fileno is None:
+                return
+            # lazy removal, the heap is cleaned once most of it is canceled timers
+            timer.fileno = None
+            self.timers_canceled += 1
+            timers = self.timers
+            if len(timers) > 1000 and len(timers) <= self.timers_canceled * 2:
+                timers[:] = [t for t in timers if not t[1].called]
+                heapify(timers)
+                self.timers_canceled = 0
+            return
+
         fileno = timer.fileno
-        fd = self.fds.pop(fileno, None)
-        if fd is None:
+        if self.fds.close(fileno) is None:
             return
         try:
             self.poll.unregister(fileno)
@@ -98,13 +173,42 @@ class Hub(HubSkeleton):
             pass
         #
 
+    def timer_arm(self, scheduled_time, seconds):
+        """ Arm the single timerfd to expire in *seconds* for the timer due at *scheduled_time* """
+        self.timer_armed = scheduled_time
+        # zero and below 1 ns disarms a timer
+        timerfd_settime(self.timer_fileno, 0, seconds if seconds > MIN_TIMER else MIN_TIMER, 0)
+        #
+
+    def timer_fire_expired(self):
+        """ Fire the due timers of the single timerfd and re-arm it to the next one """
+        self.timer_armed = None
+        timers = self.timers
+        now = self.clock()
+        while timers:
+            exp, t = timers[0]
+            if t.called:
+                heappop(timers)  # remove canceled timer
+                self.timers_canceled -= 1
+                continue
+            if exp > now:
+                self.timer_arm(exp, exp - now)
+                return
+            heappop(timers)
+            t.fileno = None
+            try:
+                t()  # exec timer
+            except:
+                self.squelch_generic_exception(sys.exc_info())
+        #
+
     def _obsolete(self, fileno):
         """ We've received an indication that 'fileno' has been obsoleted.
             Any current listeners must be defanged, and notifications to
             their greenlets queued up to send.
         """
-        fd = self.fds.pop(fileno, None)
-        if fd is None:
+        listeners = self.fds.close(fileno)
+        if listeners is None:
             return
 
         try:
@@ -112,7 +216,7 @@ class Hub(HubSkeleton):
         except:
             pass
 
-        for listener in fd:
+        for listener in listeners:
             self.closed.append(listener)
             listener.defang()
         #
@@ -128,6 +232,12 @@ class Hub(HubSkeleton):
             Catch the case where the fd was previously in use.
         """
         self._obsolete(fileno)
+        if self.edge_triggered:
+            try:
+                self.poll.register(fileno, EDGE_MASK)
+            except (IOError, OSError):
+                return  # not pollable, as a regular file
+            self.fds.open(fileno)
         #
 
     def squelch_exception(self, fileno, exc_info):
@@ -149,25 +259,16 @@ class Hub(HubSkeleton):
                 l.tb(eventlet.hubs.IOClosed(errno.ENOTCONN, "Operation on closed file"))
         #
 
-    def timer_fire_immediate(self):
-        timers = self.timers_immediate
-        if not timers:
-            return False
-        immediate = timers[:]  # copy current and exec without new to come
-        del timers[:]
-        for t in immediate:
-            try:
-                t()  # exec immediate timer
-            except:
-                pass
-        return bool(timers)
-        #
-
     def execute_polling(self):
         self.ditch_closed()
 
         try:
-            events = self.poll.poll(0 if self.timer_fire_immediate() else -1)
+            if self.fire_ready():
+                events = self.poll.poll(0)
+            elif self.busy_poll is not None:
+                events = self.busy_poll.poll(self.poll.poll)
+            else:
+                events = self.poll.poll(-1)
             if not events or not self.fds:
                 if events and not self.fds:
                     # that should not ever happen, else it is unregister &? close filno
@@ -187,14 +288,42 @@ class Hub(HubSkeleton):
             print (e, get_errno(e))
             return True
 
-        # use prior details,
-        # a FD can be cancelled and a new created with the same filno which can't be on the current evs poll
+        # a FD can be cancelled and a new created with the same filno which can't be on the current evs poll,
+        # the events of the filenos closed since the poll are skipped
 
         fds = self.fds
-        for f, ev, details in [(f, ev, fds.get(f)) for f, ev in events if f in fds]:
+        rs = fds.rs
+        ws = fds.ws
+        stale = fds.stale
+        stale.clear()
+        edge_triggered = self.edge_triggered
+        for f, ev in events:
+            if stale and f in stale:
+                continue
             try:
-                ev & READ_MASK and details.rs and details.rs[0]()
-                ev & WRITE_MASK and details.ws and details.ws[0]()
+                if edge_triggered:
+                    # wake the listener, or keep the readiness for the next one
+                    if ev & EDGE_READ_MASK:
+                        l = rs[f]
+                        if l is not None:
+                            l()
+                        else:
+                            fds.ready[f] |= READY_READ
+                    if ev & EDGE_WRITE_MASK:
+                        l = ws[f]
+                        if l is not None:
+                            l()
+                        else:
+                            fds.ready[f] |= READY_WRITE
+                else:
+                    if ev & READ_MASK:
+                        l = rs[f]
+                        if l is not None:
+                            l()
+                    if ev & WRITE_MASK:
+                        l = ws[f]
+                        if l is not None:
+                            l()
             except SYSTEM_EXCEPTIONS:
                 continue
             except:
@@ -216,12 +345,24 @@ class Hub(HubSkeleton):
 
         self.running = True
         self.stopping = False
+        self.open_waker()
         while self.execute_polling():
             pass
 
         # exiting
-        while self.fds:
-            self._obsolete(self.fds.keys()[0])
+        self.close_waker()
+        if self.timer_fileno is not None:
+            self.fds.close(self.timer_fileno)
+            try:
+                os.close(self.timer_fileno)
+            except:
+                pass
+            self.timer_fileno = None
+            del self.timers[:]
+            self.timers_canceled = 0
+        self.ready.clear()
+        for fileno in self.fds.filenos():
+            self._obsolete(fileno)
         self.ditch_closed()
 
         self.poll.close()
@@ -231,50 +372,68 @@ class Hub(HubSkeleton):
         #
 
     def get_readers(self):
-        return sum([len(self.fds[fileno].rs) for fileno in self.fds
-                    if self.fds[fileno].rs and isinstance(self.fds[fileno].rs[0], self.lclass)])
+        fds = self.fds
+        return sum([len(fds.readers(fileno)) for fileno in fds
+                    if isinstance(fds.rs[fileno], self.lclass)]) - (self.waker is not None)
         #
 
     def get_writers(self):
-        return sum([len(self.fds[fileno].ws) for fileno in self.fds
-                    if self.fds[fileno].ws and isinstance(self.fds[fileno].ws[0], self.lclass)])
+        fds = self.fds
+        return sum([len(fds.writers(fileno)) for fileno in fds])
         #
 
     def get_timers_count(self):
-        return len([None for fileno in self.fds
-                    if self.fds[fileno].rs and not isinstance(self.fds[fileno].rs[0], self.lclass)])
+        if self.timerfd_single:
+            return len(self.timers)
+        fds = self.fds
+        return len([None for fileno in fds
+                    if fds.rs[fileno] is not None and not isinstance(fds.rs[fileno], self.lclass)])
         #
 
     def get_listeners_count(self):
-        return sum([len(self.fds[fileno]) for fileno in self.fds])
+        fds = self.fds
+        return sum([len(fds.readers(fileno)) + len(fds.writers(fileno)) for fileno in fds]
+                   ) - (self.waker is not None)
         #
 
     def add(self, *args):
         """ *args: evtype, fileno, cb, tb, mac """
         evtype, fileno = args[:2]
-        fd = self.fds.get(fileno)
         listener = self.lclass(*args)
 
-        if fd is None:
-            self.fds[fileno] = HubFileDetails(listener, evtype == READ)
-            self.poll.register(fileno, READ_MASK if evtype == READ else WRITE_MASK)
-        else:
-            fd.add(listener, evtype == READ, self.g_prevent_multiple_readers)
-            self.modify(fileno, fd)
+        if self.fds.add(fileno, listener, evtype == READ, self.g_prevent_multiple_readers):
+            if self.edge_triggered:
+                self.poll.register(fileno, EDGE_MASK)
+            else:
+                self.poll.register(fileno, READ_MASK if evtype == READ else WRITE_MASK)
+        elif not self.edge_triggered:
+            self.modify(fileno)
 
         return listener
         #
 
-    def modify(self, fileno, details):
-        self.poll.modify(fileno, (READ_MASK if details.rs else 0) | (WRITE_MASK if details.ws else 0))
+    def take_readiness(self, evtype, fileno):
+        if not self.edge_triggered:
+            return False
+        try:
+            ready = self.fds.ready[fileno]  # 0 for a fileno not in the table
+        except (IndexError, TypeError):
+            return False
+        bit = 1 << evtype
+        if not ready & bit:
+            return False
+        self.fds.ready[fileno] = ready ^ bit
+        return True
+        #
+
+    def modify(self, fileno):
+        fds = self.fds
+        self.poll.modify(fileno, (READ_MASK if fds.rs[fileno] is not None else 0) |
+                         (WRITE_MASK if fds.ws[fileno] is not None else 0))
         #
 
     def remove(self, listener):
         fileno = listener.fileno
-        fd = self.fds.get(fileno)
-        if fd is None:
-            return
-
-        fd.remove(listener, listener.evtype == READ)
-        self.modify(fileno, fd)
+        if self.fds.remove(fileno, listener, listener.evtype == READ) and not self.edge_triggered:
+            self.modify(fileno)
         #
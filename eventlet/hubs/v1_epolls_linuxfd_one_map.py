@@ -7,7 +7,7 @@ from linuxfd import timerfd_c, eventfd_c
 
 import eventlet
 from eventlet.support import clear_sys_exc_info, get_errno
-from eventlet.hubs.v1_skeleton import HubSkeleton, HubFileDetails
+from eventlet.hubs.v1_skeleton import HubSkeleton, FdTable
 
 select = eventlet.patcher.original('select')
 
@@ -46,6 +46,7 @@ timerfd_settime = timerfd_c.timerfd_settime
 # EVENT-FD DETAILS:
 eventfd_create = eventfd_c.eventfd
 eventfd_read = eventfd_c.eventfd_read
+eventfd_write = eventfd_c.eventfd_write
 EV_FLAGS = eventfd_c.EFD_NONBLOCK | eventfd_c.EFD_SEMAPHORE
 EV_READ_MASK = select.EPOLLIN | select.EPOLLPRI
 
@@ -57,13 +58,11 @@ class Hub(HubSkeleton):
     def __init__(self, clock=None):
         super(Hub, self).__init__(clock)
 
-        self.fds = {}        # HubFileDetails
+        self.fds = FdTable()  # listeners, by fileno
         self.closed = []     # FdListener
 
         self.fd_events = {}  # timer-obj
         self.fd_timers = {}  # callback
-        self.timers_immediate = []  # timer-obj
-        self.add_immediate_timer = self.timers_immediate.append
 
         self.poll = select.epoll()
         self.poll_backing = select.epoll.fromfd(os.dup(self.poll.fileno()))
@@ -72,7 +71,7 @@ class Hub(HubSkeleton):
     def add_timer(self, timer):
         seconds = timer.seconds
         if seconds < MIN_TIMER:
-            self.add_immediate_timer(timer)
+            self.add_ready(timer)
             return timer
 
         fileno = int(timerfd_create(TIMER_CLOCK, TIMER_FLAGS))
@@ -113,6 +112,34 @@ class Hub(HubSkeleton):
         return fileno
         #
 
+    def open_waker(self):
+        """ The wakeup channel is an eventfd of the hub's fd_events """
+        if self.waker is not None:
+            return
+        self.waker = self.event_add(self.take_wakeup, semaphore=False)
+        self.wakeup_pending = False
+        #
+
+    def wakeup(self):
+        waker = self.waker
+        if waker is not None:
+            eventfd_write(waker, 1)
+        #
+
+    def take_wakeup(self, count):
+        self.wakeup_pending = False
+        #
+
+    def close_waker(self, *args):
+        waker, self.waker = self.waker, None
+        if waker is not None:
+            self.event_close(waker)
+        #
+
+    def waker_fileno(self):
+        return None
+        #
+
     def event_close(self, fileno):
         if self.fd_events.pop(fileno, None) is None:
             return
@@ -129,8 +156,8 @@ class Hub(HubSkeleton):
             Any current listeners must be defanged, and notifications to
             their greenlets queued up to send.
         """
-        fd = self.fds.pop(fileno, None)
-        if fd is None:
+        listeners = self.fds.close(fileno)
+        if listeners is None:
             return
 
         try:
@@ -138,7 +165,7 @@ class Hub(HubSkeleton):
         except:
             pass
 
-        for listener in fd:
+        for listener in listeners:
             self.closed.append(listener)
             listener.defang()
         #
@@ -174,17 +201,8 @@ class Hub(HubSkeleton):
             if not l.greenlet.dead:  # There's no point signalling a greenlet that's already dead.
                 l.tb(eventlet.hubs.IOClosed(errno.ENOTCONN, "Operation on closed file"))
 
-        timers_immediate = self.timers_immediate
-        if timers_immediate:
-            immediate = timers_immediate[:]  # copy current and exec without new to come
-            del timers_immediate[:]
-            for t in immediate:
-                try:
-                    t()  # exec immediate timer
-                except:
-                    pass
         try:
-            events = self.poll.poll(0 if timers_immediate else -1)
+            events = self.poll.poll(0 if self.fire_ready() else -1)
         except ValueError:
             if not self.stopping:
                 try:
@@ -200,15 +218,22 @@ class Hub(HubSkeleton):
             return True
         #
 
+        fds = self.fds
+        rs = fds.rs
+        ws = fds.ws
         for f, ev in events:
 
-            details = self.fds.get(f)
-            if details:
+            # a fileno without listeners may be reused by a timer or an event
+            if f in fds and (rs[f] is not None or ws[f] is not None):
                 try:
-                    if ev & READ_MASK and details.rs:
-                        details.rs[0]()
-                    if ev & WRITE_MASK and details.ws:
-                        details.ws[0]()
+                    if ev & READ_MASK:
+                        l = rs[f]
+                        if l is not None:
+                            l()
+                    if ev & WRITE_MASK:
+                        l = ws[f]
+                        if l is not None:
+                            l()
                 except SYSTEM_EXCEPTIONS:
                     continue
                 except:
@@ -256,18 +281,21 @@ class Hub(HubSkeleton):
 
         self.running = True
         self.stopping = False
+        self.open_waker()
 
         try:
             while True:
                 if not self.execute_polling():
                     break
         finally:
+            self.waker = None
             while self.fd_timers:
                 self.timer_canceled(self.fd_timers.values()[0])
             while self.fd_events:
                 self.event_close(self.fd_events.keys()[0])
 
             del self.closed[:]
+            self.ready.clear()
             self.poll.close()
             self.poll_backing.close()
             self.stopping = False
@@ -275,11 +303,13 @@ class Hub(HubSkeleton):
         #
 
     def get_readers(self):
-        return sum([len(self.fds[fileno].rs) for fileno in self.fds])
+        fds = self.fds
+        return sum([len(fds.readers(fileno)) for fileno in fds])
         #
 
     def get_writers(self):
-        return sum([len(self.fds[fileno].ws) for fileno in self.fds])
+        fds = self.fds
+        return sum([len(fds.writers(fileno)) for fileno in fds])
         #
 
     def get_timers_count(self):
@@ -287,30 +317,27 @@ class Hub(HubSkeleton):
         #
 
     def get_listeners_count(self):
-        return sum([len(self.fds[fileno]) for fileno in self.fds])
+        return self.get_readers() + self.get_writers()
         #
 
     def add(self, *args):
         """ *args: evtype, fileno, cb, tb, mac """
         evtype, fileno = args[:2]
-        fd = self.fds.get(fileno)
         listener = self.lclass(*args)
 
-        if fd is not None:
-            fd.add(listener, evtype == READ, self.g_prevent_multiple_readers)
-            self.modify(fileno, fd)
-        else:
-            self.fds[fileno] = HubFileDetails(listener, evtype == READ)
+        if self.fds.add(fileno, listener, evtype == READ, self.g_prevent_multiple_readers):
             self.poll.register(fileno, READ_MASK if evtype == READ else WRITE_MASK)
+        else:
+            self.modify(fileno)
 
         return listener
         #
 
-    def modify(self, fileno, details):
+    def modify(self, fileno):
         mask = 0
-        if details.rs:
+        if self.fds.rs[fileno] is not None:
             mask |= READ_MASK
-        if details.ws:
+        if self.fds.ws[fileno] is not None:
             mask |= WRITE_MASK
 
         self.poll.modify(fileno, mask)
@@ -318,10 +345,6 @@ class Hub(HubSkeleton):
 
     def remove(self, listener):
         fileno = listener.fileno
-        fd = self.fds.get(fileno)
-        if fd is None:
-            return
-
-        fd.remove(listener, listener.evtype == READ)
-        self.modify(fileno, fd)
+        if self.fds.remove(fileno, listener, listener.evtype == READ):
+            self.modify(fileno)
         #
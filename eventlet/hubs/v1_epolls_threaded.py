@@ -21,8 +21,8 @@ SELECT_ERR = select.error
 class Hub(BaseHub):
     """ epolls Hub with Threaded Poll Waiter. """
 
-    def __init__(self, clock=None):
-        super(Hub, self).__init__(clock)
+    def __init__(self, clock=None, **kwargs):
+        super(Hub, self).__init__(clock, **kwargs)
         self.poll = select.epoll()
         #
 
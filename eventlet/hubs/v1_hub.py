@@ -9,8 +9,8 @@ class BaseHub(HubBase):
     """ Base hub class for easing the implementation of subclasses that are
     specific to a particular underlying event architecture. """
 
-    def __init__(self, clock=None):
-        super(BaseHub, self).__init__(clock)
+    def __init__(self, clock=None, **kwargs):
+        super(BaseHub, self).__init__(clock, **kwargs)
         #
 
     def run(self, *a, **kw):
@@ -24,10 +24,12 @@ class BaseHub(HubBase):
         try:
             self.running = True
             self.stopping = False
+            self.open_waker()
 
-            timers = self.timers
+            next_timer_due = self.next_timer_due
             fire_timers = self.fire_timers
             prepare_timers = self.prepare_timers
+            fire_ready = self.fire_ready
 
             closed = self.closed
             pop_closed = self.closed.pop
@@ -49,10 +51,14 @@ class BaseHub(HubBase):
 
                 prepare_timers()
                 fire_timers(self.clock())
+                ready = fire_ready()
                 prepare_timers()
 
-                if timers:
-                    sleep_time = timers[0][0] - self.clock() + self.timer_delay
+                sleep_time = next_timer_due()
+                if ready:
+                    sleep_time = 0
+                elif sleep_time is not None:
+                    sleep_time = sleep_time - self.clock() + self.timer_delay
                     if sleep_time < 0:
                         sleep_time = 0
                 else:
@@ -73,9 +79,9 @@ class BaseHub(HubBase):
                         clear_sys_exc_info()
 
             else:
-                del self.timers[:]
-                del self.next_timers[:]
-                del self.listeners_events[:]
+                self.clear_timers()
+                self.ready.clear()
+                self.listeners_events.clear()
                 del self.closed[:]
         finally:
             self.running = False
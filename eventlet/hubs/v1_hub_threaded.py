@@ -7,6 +7,7 @@ from eventlet.support import clear_sys_exc_info
 
 import eventlet
 from eventlet.hubs.v1_base import HubBase
+from eventlet.hubs.batch_handoff import BatchHandoff
 
 orig_threading = eventlet.patcher.original('threading')
 ev_sleep = eventlet.patcher.original('time').sleep
@@ -21,21 +22,33 @@ class BaseHub(HubBase):
 
     DEFAULT_SLEEP = 60.0
 
-    def __init__(self, clock=None):
-        super(BaseHub, self).__init__(clock)
+    def __init__(self, clock=None, **kwargs):
+        super(BaseHub, self).__init__(clock, **kwargs)
 
-        self.event_notifier = orig_threading.Event()
+        self.handoff = None  # BatchHandoff, made at run
         self.events_waiter = None
         #
 
-    def waiting_thread(self):
-        is_set = self.event_notifier.is_set
-        notify = self.event_notifier.set
+    def wakeup(self):
+        """ The loop waits on the handoff """
+        handoff = self.handoff
+        if handoff is not None:
+            handoff.wakeup()
+        #
+
+    def open_waker(self):
+        pass
+        #
+
+    def waiting_thread(self, handoff):
         wait = self.wait
-        while not self.stopping:
+        fd_events = self.listeners_events
+        post = handoff.post
+        while not handoff.stopping:
             wait()
-            if not is_set():
-                notify()
+            if fd_events:
+                post()  # no re-poll until the batch is consumed
+        handoff.close()
         #
 
     def run(self, *a, **kw):
@@ -50,17 +63,19 @@ class BaseHub(HubBase):
         self.running = True
         self.stopping = False
 
-        if self.events_waiter is None or not self.events_waiter.is_alive():
-            self.events_waiter = orig_threading.Thread(target=self.waiting_thread)
-            self.events_waiter.start()
-        self.event_notifier.set()
+        # the waiter of a previous run exits at its next poll result
+        handoff = self.handoff = BatchHandoff()
+        self.events_waiter = orig_threading.Thread(target=self.waiting_thread, args=(handoff,))
+        self.events_waiter.setDaemon(True)
+        self.events_waiter.start()
 
-        wait = self.event_notifier.wait
-        wait_clear = self.event_notifier.clear
+        wait = handoff.wait
+        release = handoff.release
 
-        timers = self.timers
+        next_timer_due = self.next_timer_due
         fire_timers = self.fire_timers
         prepare_timers = self.prepare_timers
+        fire_ready = self.fire_ready
 
         closed = self.closed
         pop_closed = self.closed.pop
@@ -81,17 +96,19 @@ class BaseHub(HubBase):
 
                 prepare_timers()
                 fire_timers(self.clock())
+                ready = fire_ready()
                 prepare_timers()
 
-                if not fd_events:
-                    if timers:
-                        due = timers[0][0] - self.clock() + self.timer_delay
+                if not ready and not fd_events:
+                    due = next_timer_due()
+                    if due is not None:
+                        due = due - self.clock() + self.timer_delay
                         if due < 0:
                             continue
                     else:
                         due = self.default_sleep()
-                    wait(due)  # wait for fd signals
-                    wait_clear()
+                    wait(due)  # wait for a batch of fd events
+                    self.wakeup_pending = False
 
                 # Process all fds events
                 while fd_events:
@@ -105,13 +122,17 @@ class BaseHub(HubBase):
                     except:
                         squelch_exception(fileno, sys.exc_info())
                         clear_sys_exc_info()
+                if handoff.pending and not fd_events:
+                    release()
 
             else:
-                del self.timers[:]
-                del self.next_timers[:]
-                del self.listeners_events[:]
+                self.clear_timers()
+                self.ready.clear()
+                self.listeners_events.clear()
                 del self.closed[:]
         finally:
+            self.handoff = None
+            handoff.stop()
             self.running = False
             self.stopping = False
         #
@@ -17,8 +17,8 @@ class Hub(BaseHub):
     FILTERS = {BaseHub.READ: select.KQ_FILTER_READ,
                BaseHub.WRITE: select.KQ_FILTER_WRITE}
 
-    def __init__(self, clock=None):
-        super(Hub, self).__init__(clock)
+    def __init__(self, clock=None, **kwargs):
+        super(Hub, self).__init__(clock, **kwargs)
         self._events = {}
         self._init_kqueue()
 
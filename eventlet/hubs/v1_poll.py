@@ -17,8 +17,8 @@ POLLNVAL = select.POLLNVAL
 
 
 class Hub(BaseHub):
-    def __init__(self, clock=None):
-        super(Hub, self).__init__(clock)
+    def __init__(self, clock=None, **kwargs):
+        super(Hub, self).__init__(clock, **kwargs)
         self.poll = select.poll()
 
     def add(self, *args):
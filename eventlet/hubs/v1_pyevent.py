@@ -5,6 +5,7 @@ import types
 from eventlet.support import greenlets as greenlet
 import six
 from eventlet.hubs import v1_hub
+from eventlet.hubs.v1_skeleton import new_waker
 
 try:
     import event
@@ -46,8 +47,8 @@ class event_wrapper(object):
 
 class Hub(v1_hub.BaseHub):
 
-    def __init__(self):
-        super(Hub, self).__init__()
+    def __init__(self, **kwargs):
+        super(Hub, self).__init__(**kwargs)
         event.init()
 
         self.signal_exc_info = None
@@ -77,6 +78,7 @@ class Hub(v1_hub.BaseHub):
                 return result
 
     def run(self):
+        self.open_waker()
         while True:
             try:
                 self.dispatch()
@@ -92,6 +94,40 @@ class Hub(v1_hub.BaseHub):
                 else:
                     self.squelch_timer_exception(None, sys.exc_info())
 
+    def call_soon(self, cb, *args):
+        # the run-queue is not drained by the libevent loop
+        return self.schedule_call_global(0, cb, *args)
+
+    def open_waker(self):
+        """ libevent is not thread-safe, the calls of call_soon_threadsafe are at the
+            run-queue, drained at the wakeup of a read event of the libevent loop
+        """
+        if self.waker is not None:
+            return
+        waker = new_waker()
+        self.waker_listener = event.read(waker.fileno(), self.take_ready)
+        self.waker = waker
+        self.wakeup_pending = False
+        if self.ready:
+            # the calls made before the loop
+            waker.send()
+
+    def take_ready(self):
+        self.take_wakeup(None)
+        if self.fire_ready():
+            self.waker.send()
+        # a true result keeps the read event of libevent
+        return True
+
+    def close_waker(self, *args):
+        waker = self.waker
+        if waker is None:
+            return
+        self.waker = None
+        listener, self.waker_listener = self.waker_listener, None
+        listener.delete()
+        waker.close()
+
     def abort(self, wait=True):
         self.schedule_call_global(0, self.greenlet.throw, greenlet.GreenletExit)
         if wait:
@@ -3,7 +3,9 @@ import traceback
 import signal
 import eventlet
 import sys
+from collections import deque
 from eventlet import support
+import six
 
 if os.environ.get('EVENTLET_CLOCK'):
     mod = os.environ.get('EVENTLET_CLOCK').rsplit('.', 1)
@@ -82,29 +84,124 @@ class FdListener(object):
         self.spent = True
 
 
+class ReadyCall(object):
+    """ A callback of the hub run-queue, a lightweight Timer of zero seconds.
+        The run-queue takes zero seconds Timers as well, both are called at the order of scheduling.
+    """
+
+    __slots__ = ['cb', 'args', 'called']
+
+    def __init__(self, cb, args):
+        self.cb = cb
+        self.args = args
+        self.called = False
+        #
+
+    def __call__(self):
+        self.called = True
+        try:
+            self.cb(*self.args)
+        except:
+            pass
+        self.args = None
+        #
+
+    def cancel(self):
+        """ Prevent the callback from being called, no effect if already called """
+        self.called = True
+        self.args = None
+        #
+
+    def __repr__(self):
+        return "%s(%r, %r, %r)" % (type(self).__name__, self.cb, self.args, self.called)
+    __str__ = __repr__
+
+
+class PipeWaker(object):
+    """ The wakeup channel of a hub where there is no eventfd, a pipe """
+
+    __slots__ = ['r', 'w']
+
+    def __init__(self):
+        self.r, self.w = os.pipe()
+        for fd in (self.r, self.w):
+            if hasattr(os, 'set_blocking'):
+                os.set_blocking(fd, False)
+            else:
+                import fcntl
+                fcntl.fcntl(fd, fcntl.F_SETFL, fcntl.fcntl(fd, fcntl.F_GETFL) | os.O_NONBLOCK)
+        #
+
+    def fileno(self):
+        return self.r
+        #
+
+    def send(self):
+        try:
+            os.write(self.w, b'x')
+        except (IOError, OSError):
+            pass  # full, already signaled
+        #
+
+    def drain(self):
+        n = 0
+        try:
+            while True:
+                got = len(os.read(self.r, 4096))
+                if not got:
+                    break
+                n += got
+        except (IOError, OSError):
+            pass
+        return n
+        #
+
+    def close(self):
+        for fd in (self.r, self.w):
+            try:
+                os.close(fd)
+            except (IOError, OSError):
+                pass
+        #
+
+
+def new_waker():
+    """ An eventfd, or a pipe without eventfd support """
+    try:
+        from eventlet.eventfd import EventFd
+    except ImportError:
+        return PipeWaker()
+    return EventFd(semaphore=False)
+
+
+def multiple_listeners_error(listener):
+    return RuntimeError(
+        "Second simultaneous %s on fileno %s "
+        "detected.  Unless you really know what you're doing, "
+        "make sure that only one greenthread can %s any "
+        "particular socket.  Consider using a pools.Pool. "
+        "If you do know what you're doing and want to disable "
+        "this error, call "
+        "eventlet.debug.hub_prevent_multiple_readers(False) - MY THREAD=%s; "
+        "THAT THREAD=%s" % (listener.evtype, listener.fileno, listener.evtype, listener.cb, listener))
+
+
 class HubFileDetails(object):
     """ HubFileDetails class for keeping a fileno listeners - readers+writers"""
 
-    __slots__ = ['rs', 'ws']
+    __slots__ = ['rs', 'ws', 'ready']
 
-    def __init__(self, listener, a_reader):
-        self.rs = [listener] if a_reader else []
-        self.ws = [] if a_reader else [listener]
+    def __init__(self, listener=None, a_reader=True):
+        self.rs = [listener] if a_reader and listener is not None else []
+        self.ws = [listener] if not a_reader and listener is not None else []
+        self.ready = 0  # readiness bits, of an edge-triggered hub
         #
 
     def add(self, listener, a_reader, prevent_multiple):
         l = self.rs if a_reader else self.ws
 
         if l and prevent_multiple:
-            raise RuntimeError(
-                "Second simultaneous %s on fileno %s "
-                "detected.  Unless you really know what you're doing, "
-                "make sure that only one greenthread can %s any "
-                "particular socket.  Consider using a pools.Pool. "
-                "If you do know what you're doing and want to disable "
-                "this error, call "
-                "eventlet.debug.hub_prevent_multiple_readers(False) - MY THREAD=%s; "
-                "THAT THREAD=%s" % (listener.evtype, listener.fileno, listener.evtype, listener.cb, listener))
+            raise multiple_listeners_error(listener)
         l.append(listener)
         #
 
@@ -145,6 +242,155 @@ class HubFileDetails(object):
     __str__ = __repr__
 
 
+class FdTable(object):
+    """ FdTable class for keeping the listeners of the filenos of a hub, filenos are small dense integers.
+        Lists indexed by fileno keep the primary reader and writer of a fileno, None if there is none,
+        so a dispatch is a list indexing.  The secondary listeners, only with
+        g_prevent_multiple_readers off, are kept at the overflow lists, a removed primary is
+        replaced by the first secondary.  The lists grow by doubling, in place,
+        a reference to rs or ws stays valid.
+        A fileno is in the table from open, or the first add, until close.
+        The filenos closed since the last clear of stale are kept at stale, a hub clears it after a poll,
+        the events of the batch of a closed fileno are of the fileno before it was reused.
+    """
+
+    __slots__ = ['rs', 'ws', 'ready', 'present', 'count', 'overflow', 'stale']
+
+    def __init__(self, size=1024):
+        self.rs = [None] * size        # primary reader, or a callable as a timer, by fileno
+        self.ws = [None] * size        # primary writer, by fileno
+        self.ready = bytearray(size)   # readiness bits, of an edge-triggered hub
+        self.present = bytearray(size)
+        self.count = 0
+        self.overflow = {}             # fileno: ([readers], [writers]), the secondary listeners
+        self.stale = set()
+        #
+
+    def __len__(self):
+        return self.count
+        #
+
+    def __contains__(self, fileno):
+        try:
+            return fileno >= 0 and self.present[fileno] == 1
+        except (IndexError, TypeError):
+            return False
+        #
+
+    def __iter__(self):
+        return iter(self.filenos())
+        #
+
+    def filenos(self):
+        return [fileno for fileno, present in enumerate(self.present) if present]
+        #
+
+    def grow(self, fileno):
+        size = len(self.present)
+        if fileno < size:
+            return
+        while size <= fileno:
+            size *= 2
+        more = size - len(self.present)
+        self.rs.extend([None] * more)
+        self.ws.extend([None] * more)
+        self.ready.extend(bytearray(more))
+        self.present.extend(bytearray(more))
+        #
+
+    def open(self, fileno, reader=None):
+        """ Put fileno in the table, with a reader if given, returns whether fileno was not in the table """
+        if fileno >= len(self.present):
+            self.grow(fileno)
+        if reader is not None:
+            self.rs[fileno] = reader
+        if self.present[fileno]:
+            return False
+        self.present[fileno] = 1
+        self.count += 1
+        return True
+        #
+
+    def close(self, fileno):
+        """ Remove fileno from the table, returns its listeners, None if fileno was not in the table """
+        if fileno not in self:
+            return None
+        rs = self.rs
+        ws = self.ws
+        listeners = []
+        if rs[fileno] is not None:
+            listeners.append(rs[fileno])
+            rs[fileno] = None
+        if ws[fileno] is not None:
+            listeners.append(ws[fileno])
+            ws[fileno] = None
+        extra = self.overflow.pop(fileno, None)
+        if extra is not None:
+            listeners.extend(extra[0])
+            listeners.extend(extra[1])
+        self.ready[fileno] = 0
+        self.present[fileno] = 0
+        self.count -= 1
+        self.stale.add(fileno)
+        return listeners
+        #
+
+    def add(self, fileno, listener, a_reader, prevent_multiple):
+        """ Add a listener, returns whether fileno was not in the table """
+        opened = False
+        if fileno >= len(self.present) or not self.present[fileno]:
+            opened = self.open(fileno)
+        slots = self.rs if a_reader else self.ws
+        if slots[fileno] is None:
+            slots[fileno] = listener
+            return opened
+        if prevent_multiple:
+            raise multiple_listeners_error(listener)
+        extra = self.overflow.get(fileno)
+        if extra is None:
+            extra = self.overflow[fileno] = ([], [])
+        extra[0 if a_reader else 1].append(listener)
+        return opened
+        #
+
+    def remove(self, fileno, listener, a_reader):
+        """ Remove a listener of a fileno that was in the table, returns whether the listener was found """
+        slots = self.rs if a_reader else self.ws
+        extra = self.overflow.get(fileno)
+        if slots[fileno] is listener:
+            if extra is None or not extra[0 if a_reader else 1]:
+                slots[fileno] = None
+                return True
+            slots[fileno] = extra[0 if a_reader else 1].pop(0)
+        elif extra is None:
+            return False
+        else:
+            try:
+                extra[0 if a_reader else 1].remove(listener)
+            except ValueError:
+                return False
+        if not extra[0] and not extra[1]:
+            del self.overflow[fileno]
+        return True
+        #
+
+    def readers(self, fileno):
+        reader = self.rs[fileno]
+        if reader is None:
+            return []
+        extra = self.overflow.get(fileno)
+        return [reader] + extra[0] if extra else [reader]
+        #
+
+    def writers(self, fileno):
+        writer = self.ws[fileno]
+        if writer is None:
+            return []
+        extra = self.overflow.get(fileno)
+        return [writer] + extra[1] if extra else [writer]
+        #
+
+
 # in debug mode, track the call site that created the listener
 
 class DebugListener(FdListener):
@@ -171,9 +417,12 @@ class HubSkeleton(object):
 
     __slots__ = ['clock', 'lclass', 'greenlet', 'greenlet_switch', 'stopping', 'running',
                  'debug_exceptions', 'debug_blocking', 'debug_blocking_resolution', '_old_signal_handler',
-                 'g_prevent_multiple_readers']
+                 'g_prevent_multiple_readers', 'ready', 'add_ready',
+                 'wakeup_pending', 'waker', 'waker_listener']
 
     SYSTEM_EXCEPTIONS = (KeyboardInterrupt, SystemExit)
+    edge_triggered = False  # listeners are woken only by a new readiness
+    completion_io = False   # the hub has io_recv_into & io_send, transfers completed by the kernel
 
     def __init__(self, clock=None):
         self.clock = default_clock if clock is None else clock
@@ -189,6 +438,13 @@ class HubSkeleton(object):
         self.debug_blocking_resolution = 1
         self._old_signal_handler = None
         self.g_prevent_multiple_readers = True
+
+        self.ready = deque()  # ReadyCall, the run-queue
+        self.add_ready = self.ready.append
+
+        self.wakeup_pending = False  # a wakeup was sent and not yet taken
+        self.waker = None            # the wakeup channel, opened at run
+        self.waker_listener = None
         #
 
     # Not Implemented
@@ -251,6 +507,85 @@ class HubSkeleton(object):
             self.switch()
         #
 
+    def call_soon(self, cb, *args):
+        """Schedule a callable to be called at the next run of the hub loop,
+        in the order of scheduling, without the cost of a timer.
+            cb: The callable to call.
+            *args: Arguments to pass to the callable when called.
+        Returns the ReadyCall, with cancel() as of a Timer.
+        """
+        call = ReadyCall(cb, args)
+        self.add_ready(call)
+        return call
+
+    def call_soon_threadsafe(self, cb, *args):
+        """call_soon from any OS thread, the hub is woken if it waits.
+        The wakeups of a burst of calls are coalesced, one until the hub takes it.
+        Returns the ReadyCall.
+        """
+        call = ReadyCall(cb, args)
+        self.add_ready(call)  # deque append is atomic
+        if not self.wakeup_pending:
+            self.wakeup_pending = True
+            self.wakeup()
+        return call
+
+    def wakeup(self):
+        """ Wake the hub from its wait, from any OS thread """
+        waker = self.waker
+        if waker is not None:
+            waker.send()
+
+    def open_waker(self):
+        """ Open the wakeup channel, read by an internal listener, at the start of run.
+            The calls made before are at the run-queue already.
+        """
+        if self.waker is not None:
+            return
+        waker = new_waker()
+        self.waker_listener = self.add(self.READ, waker.fileno(), self.take_wakeup, self.close_waker, None)
+        self.waker = waker
+        self.wakeup_pending = False
+
+    def take_wakeup(self, fileno):
+        # drained first, a wakeup sent after the drain and before the reset is not lost,
+        # its call is at the run-queue already
+        self.waker.drain()
+        self.wakeup_pending = False
+
+    def close_waker(self, *args):
+        waker = self.waker
+        if waker is None:
+            return
+        self.waker = None
+        listener, self.waker_listener = self.waker_listener, None
+        if not listener.spent:
+            self.remove(listener)
+        waker.close()
+
+    def waker_fileno(self):
+        """ The fileno of the internal listener of the wakeup channel, None if not open """
+        return None if self.waker is None else self.waker.fileno()
+
+    def take_readiness(self, evtype, fileno):
+        """ Whether fileno is already known to be ready for evtype, the readiness is consumed.
+            Only an edge-triggered hub knows the readiness of a fileno without a listener.
+        """
+        return False
+
+    def fire_ready(self):
+        """ Call the callbacks of the run-queue, bounded to the ones ready at start,
+            the callbacks added meanwhile are called at the next run of the hub loop.
+            Returns whether callbacks are ready for the next run.
+        """
+        ready = self.ready
+        pop = ready.popleft
+        for _ in six.moves.range(len(ready)):
+            call = pop()
+            if not call.called:
+                call()
+        return bool(ready)
+
     def schedule_call_local(self, seconds, cb, *args, **kw):
         """Schedule a callable to be called after 'seconds' seconds have
         elapsed. Cancel the timer if greenlet has exited.
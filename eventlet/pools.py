@@ -2,11 +2,19 @@ from __future__ import print_function
 
 import collections
 from contextlib import contextmanager
+import errno
+import time
 
+import six
+
+from eventlet import hubs
+from eventlet import patcher
 from eventlet import queue
 
+_orig_socket = patcher.original('socket')
+
 
-__all__ = ['Pool', 'TokenPool']
+__all__ = ['Pool', 'TokenPool', 'SocketPool']
 
 
 class Pool(object):
@@ -184,3 +192,311 @@ class TokenPool(Pool):
 
     def create(self):
         return Token()
+
+
+# int() of the IntFlag of python 3, whose `|` is slow
+_PEEK_FLAGS = int(_orig_socket.MSG_PEEK) | int(getattr(_orig_socket, 'MSG_DONTWAIT', 0))
+
+
+def _alive(sock):
+    """A cheap check at checkout of a pooled socket: a peer having closed it,
+    or unread data of a plain socket (a protocol out of step), make it stale.
+    TLS peers may send records to idle sockets (session tickets), only EOF
+    counts there.
+    """
+    if not getattr(_orig_socket, 'MSG_DONTWAIT', 0):
+        return True
+    fileno = sock.fileno()
+    if fileno < 0:
+        return False
+    if six.PY3:
+        raw = _orig_socket.socket(fileno=fileno)
+    else:
+        raw = _orig_socket.fromfd(fileno, _orig_socket.AF_INET, _orig_socket.SOCK_STREAM)
+    try:
+        data = raw.recv(1, _PEEK_FLAGS)
+    except _orig_socket.error as e:
+        return e.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK)
+    finally:
+        if six.PY3:
+            raw.detach()
+        else:
+            raw.close()
+    return bool(data) and hasattr(sock, 'do_handshake')
+
+
+class _SocketSlot(object):
+    """Free sockets of a key, most recently used first, as
+    ``(last_used, created_at, sock)``; the sockets of the key, free or
+    checked out; the greenthreads waiting for one."""
+    __slots__ = ['free', 'size', 'channel']
+
+    def __init__(self):
+        self.free = collections.deque()
+        self.size = 0
+        self.channel = queue.LightQueue(0)
+
+
+class SocketPool(object):
+    """
+    Pool of connected client sockets, keyed by ``(host, port, ssl_ctx)``.
+    A checked out socket is put back to be reused by the next :meth:`get`
+    of its key, saving the connect and the TLS handshake::
+
+        pool = pools.SocketPool(max_size=8, max_idle=30)
+        with pool.item('example.com', 443, ctx) as sock:
+            sock.sendall(request)
+            ...
+
+    *max_size* limits the sockets of each key; past it :meth:`get` waits
+    for a socket of the key to be put back or discarded.  Free sockets idle
+    for more than *max_idle* seconds, or connected for more than *max_age*
+    seconds, are closed by a single hub timer of the pool, scheduled at the
+    earliest expiration; ``None`` disables either limit.  At checkout a
+    socket its peer has closed is discarded for a new one.
+
+    *ssl_ctx* is an :class:`eventlet.green.ssl.SSLContext` (of
+    :func:`eventlet.green.ssl.create_default_context`), whose ``wrap_socket``
+    gives green sockets.  *connect_timeout* bounds the connect of new
+    sockets, and *min_size* is the size :meth:`warm` fills a key to.
+    """
+
+    def __init__(self, max_size=4, min_size=0, max_idle=60, max_age=600,
+                 connect_timeout=None, create=None):
+        self.max_size = max_size
+        self.min_size = min_size
+        self.max_idle = max_idle
+        self.max_age = max_age
+        self.connect_timeout = connect_timeout
+        if create is not None:
+            self.create = create
+        self._slots = {}
+        # id of checked out socket -> (key, created_at)
+        self._checked_out = {}
+        self._expiration_timer = None
+        self._expiration_at = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self._hits = self._misses = self._stale = self._evictions = 0
+        self._waits = 0
+        self._wait_time = self._max_wait_time = 0.0
+
+    def create(self, host, port, ssl_ctx=None):
+        """Connect a new socket to *host* and *port*, wrapped with *ssl_ctx*
+        when given.  Override it, or pass `create`, for other transports.
+        """
+        from eventlet.green import socket
+        sock = socket.create_connection((host, port), self.connect_timeout)
+        sock.settimeout(None)
+        if ssl_ctx is not None:
+            sock = ssl_ctx.wrap_socket(sock, server_hostname=host)
+        return sock
+
+    def _slot(self, key):
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = _SocketSlot()
+        return slot
+
+    def _expired(self, now, last_used, created_at):
+        return ((self.max_idle is not None and now - last_used > self.max_idle)
+                or (self.max_age is not None and now - created_at > self.max_age))
+
+    def _new(self, key, slot):
+        """Create a socket of the *slot*, already counted in its size."""
+        try:
+            sock = self.create(*key)
+        except:
+            self._release(slot)
+            raise
+        self._misses += 1
+        return sock, time.time()
+
+    def _release(self, slot):
+        """A socket of *slot* is gone: a waiter creates one in its place."""
+        if slot.channel.getting() > slot.channel.putting():
+            slot.channel.put(None)
+        else:
+            slot.size -= 1
+
+    def get(self, host, port, ssl_ctx=None):
+        """Return a connected socket of ``(host, port, ssl_ctx)``, a free one
+        that is alive or a new one.  This may cause the calling greenthread to
+        block, for the connect or for a socket of a key at *max_size*.
+        """
+        key = (host, port, ssl_ctx)
+        slot = self._slot(key)
+        now = time.time()
+        while slot.free:
+            last_used, created_at, sock = slot.free.popleft()
+            if not self._expired(now, last_used, created_at) and _alive(sock):
+                self._hits += 1
+                break
+            self._stale += 1
+            slot.size -= 1
+            _close(sock)
+        else:
+            if slot.size < self.max_size:
+                slot.size += 1
+                sock, created_at = self._new(key, slot)
+            else:
+                start = time.time()
+                item = slot.channel.get()
+                waited = time.time() - start
+                self._waits += 1
+                self._wait_time += waited
+                self._max_wait_time = max(self._max_wait_time, waited)
+                if item is None:
+                    sock, created_at = self._new(key, slot)
+                else:
+                    self._hits += 1
+                    sock, created_at = item
+        self._checked_out[id(sock)] = key, created_at
+        return sock
+
+    def put(self, sock, discard=False):
+        """Put a socket of :meth:`get` back into the pool, or close it when
+        *discard* is true (e.g. its protocol state is unknown after an error).
+        """
+        key, created_at = self._checked_out.pop(id(sock))
+        slot = self._slot(key)
+        now = time.time()
+        if discard or self._expired(now, now, created_at):
+            _close(sock)
+            self._release(slot)
+        elif slot.size > self.max_size:
+            # the pool was resized under it
+            _close(sock)
+            slot.size -= 1
+        elif slot.channel.getting() > slot.channel.putting():
+            slot.channel.put((sock, created_at))
+        else:
+            slot.free.appendleft((now, created_at, sock))
+            self._schedule_expiration(self._expiration(now, created_at))
+
+    @contextmanager
+    def item(self, host, port, ssl_ctx=None):
+        """ Get a socket out of the pool, for use with with statement.  It is
+        put back on success and discarded if the block raises.
+        """
+        sock = self.get(host, port, ssl_ctx)
+        try:
+            yield sock
+        except:
+            self.put(sock, discard=True)
+            raise
+        self.put(sock)
+
+    def warm(self, host, port, ssl_ctx=None, min_size=None):
+        """Connect free sockets of ``(host, port, ssl_ctx)`` up to *min_size*
+        (by default the *min_size* of the pool), ahead of the first requests.
+        """
+        if min_size is None:
+            min_size = self.min_size
+        key = (host, port, ssl_ctx)
+        slot = self._slot(key)
+        while slot.size < min(min_size, self.max_size):
+            slot.size += 1
+            sock, created_at = self._new(key, slot)
+            self._checked_out[id(sock)] = key, created_at
+            self.put(sock)
+
+    def resize(self, new_size):
+        """Resize the per-key limit to *new_size*, sockets over it are closed
+        as they are put back."""
+        self.max_size = new_size
+
+    def free(self, host, port, ssl_ctx=None):
+        """Return the number of free sockets of ``(host, port, ssl_ctx)``."""
+        slot = self._slots.get((host, port, ssl_ctx))
+        return len(slot.free) if slot is not None else 0
+
+    def waiting(self, host, port, ssl_ctx=None):
+        """Return the number of greenthreads waiting for a socket of the key."""
+        slot = self._slots.get((host, port, ssl_ctx))
+        if slot is None:
+            return 0
+        return max(0, slot.channel.getting() - slot.channel.putting())
+
+    def stats(self):
+        """Counters of the pool: ``hits`` reused and ``misses`` connected
+        sockets at checkout, ``stale`` sockets discarded at checkout, idle or
+        aged ``evictions`` of the timer, ``waits`` for a key at *max_size*
+        with their total and max ``wait_time`` in seconds, and the ``free``
+        and ``size`` of the keys.
+        """
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'stale': self._stale,
+            'evictions': self._evictions,
+            'waits': self._waits,
+            'wait_time': self._wait_time,
+            'max_wait_time': self._max_wait_time,
+            'free': sum(len(slot.free) for slot in self._slots.values()),
+            'size': sum(slot.size for slot in self._slots.values()),
+            'keys': len(self._slots),
+        }
+
+    def _expiration(self, last_used, created_at):
+        limits = []
+        if self.max_idle is not None:
+            limits.append(last_used + self.max_idle)
+        if self.max_age is not None:
+            limits.append(created_at + self.max_age)
+        return min(limits) if limits else None
+
+    def _schedule_expiration(self, when):
+        """Have the one timer of the pool fire by *when*, the earliest
+        expiration of the free sockets."""
+        if when is None:
+            return
+        if self._expiration_timer is not None:
+            if self._expiration_at <= when:
+                return
+            self._expiration_timer.cancel()
+        self._expiration_at = when
+        self._expiration_timer = hubs.get_hub().schedule_call_global(
+            max(0, when - time.time()), self._expire)
+
+    def _expire(self):
+        """Close the expired free sockets and reschedule the timer at the next
+        expiration; keys left empty are dropped."""
+        self._expiration_timer = self._expiration_at = None
+        now = time.time()
+        earliest = None
+        for key, slot in list(self._slots.items()):
+            kept = collections.deque()
+            for item in slot.free:
+                last_used, created_at, sock = item
+                if self._expired(now, last_used, created_at):
+                    self._evictions += 1
+                    slot.size -= 1
+                    _close(sock)
+                    continue
+                kept.append(item)
+                when = self._expiration(last_used, created_at)
+                if earliest is None or when < earliest:
+                    earliest = when
+            slot.free = kept
+            if not slot.size and not slot.channel.getting():
+                del self._slots[key]
+        self._schedule_expiration(earliest)
+
+    def clear(self):
+        """Close the free sockets and cancel the timer of the pool."""
+        if self._expiration_timer is not None:
+            self._expiration_timer.cancel()
+            self._expiration_timer = self._expiration_at = None
+        for slot in self._slots.values():
+            while slot.free:
+                _close(slot.free.pop()[2])
+                slot.size -= 1
+
+
+def _close(sock):
+    try:
+        sock.close()
+    except Exception:
+        pass
@@ -380,7 +380,7 @@ class LightQueue(object):
 
     def _schedule_unlock(self):
         if self._event_unlock is None:
-            self._event_unlock = active_hub.inst.schedule_call_global(0, self._unlock)
+            self._event_unlock = active_hub.inst.call_soon(self._unlock)
 
 
 class ItemWaiter(Waiter):
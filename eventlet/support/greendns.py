@@ -42,6 +42,7 @@ from eventlet.green import _socket_nodns
 from eventlet.green import os
 from eventlet.green import time
 from eventlet.green import select
+from eventlet.greenio.stream import GreenStreamReader, IncompleteReadError
 import six
 
 
@@ -616,28 +617,24 @@ def getnameinfo(sockaddr, flags):
     return (host, port)
 
 
-def _net_read(sock, count, expiration):
+def _net_read(reader, count, expiration):
     """coro friendly replacement for dns.query._net_read
-    Read the specified number of bytes from sock.  Keep trying until we
-    either get the desired amount, or we hit EOF.
+    Read the specified number of bytes from the GreenStreamReader of the socket.
+    Keep trying until we either get the desired amount, or we hit EOF,
+    the bytes received before a timeout are kept buffered by the reader.
     A Timeout exception will be raised if the operation is not completed
     by the expiration time.
     """
-    s = bytearray()
-    while count > 0:
+    while True:
         try:
-            n = sock.recv(count)
+            return reader.readexactly(count)
         except socket.timeout:
             # Q: Do we also need to catch coro.CoroutineSocketWake and pass?
             if expiration - time.time() <= 0.0:
                 raise dns.exception.Timeout
             eventlet.sleep(0.01)
-            continue
-        if n == b'':
+        except IncompleteReadError:
             raise EOFError
-        count -= len(n)
-        s += n
-    return s
 
 
 def _net_write(sock, data, expiration):
@@ -821,9 +818,10 @@ def query_tcp(q, where, timeout=DNS_QUERY_TIMEOUT, port=53,
         # onto the net
         tcpmsg = struct.pack("!H", l) + wire
         _net_write(s, tcpmsg, expiration)
-        ldata = _net_read(s, 2, expiration)
+        reader = GreenStreamReader(s, 1024)
+        ldata = _net_read(reader, 2, expiration)
         (l,) = struct.unpack("!H", ldata)
-        wire = bytes(_net_read(s, l, expiration))
+        wire = _net_read(reader, l, expiration)
     finally:
         s.close()
     r = dns.message.from_wire(wire, keyring=q.keyring, request_mac=q.mac)
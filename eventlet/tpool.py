@@ -20,7 +20,7 @@ import sys
 import traceback
 
 import eventlet
-from eventlet import event, greenio, greenthread, patcher, timeout
+from eventlet import event, hubs, patcher, timeout
 import six
 
 __all__ = ['execute', 'Proxy', 'killall', 'set_num_threads']
@@ -31,7 +31,6 @@ SYS_EXCS = (GeneratorExit, KeyboardInterrupt, SystemExit)
 
 QUIET = True
 
-socket = patcher.original('socket')
 threading = patcher.original('threading')
 if six.PY2:
     Queue_module = patcher.original('Queue')
@@ -41,35 +40,13 @@ if six.PY3:
 Empty = Queue_module.Empty
 Queue = Queue_module.Queue
 
-_bytetosend = b' '
-_coro = None
 _nthreads = int(os.environ.get('EVENTLET_THREADPOOL_SIZE', 20))
-_reqq = _rspq = None
-_rsock = _wsock = None
+_reqq = None
 _setup_already = False
 _threads = []
 
 
-def tpool_trampoline():
-    global _rspq
-    while True:
-        try:
-            _c = _rsock.recv(1)
-            assert _c
-        # FIXME: this is probably redundant since using sockets instead of pipe now
-        except ValueError:
-            break  # will be raised when pipe is closed
-        while not _rspq.empty():
-            try:
-                (e, rv) = _rspq.get(block=False)
-                e.send(rv)
-                e = rv = None
-            except Empty:
-                pass
-
-
 def tworker():
-    global _rspq
     while True:
         try:
             msg = _reqq.get()
@@ -77,7 +54,7 @@ def tworker():
             return  # can't get anything off of a dud queue
         if msg is None:
             return
-        (e, meth, args, kwargs) = msg
+        (hub, e, meth, args, kwargs) = msg
         rv = None
         try:
             rv = meth(*args, **kwargs)
@@ -91,9 +68,9 @@ def tworker():
             sys.exc_clear()
         # test_leakage_from_tracebacks verifies that the use of
         # exc_info does not lead to memory leaks
-        _rspq.put((e, rv))
-        msg = meth = args = kwargs = e = rv = None
-        _wsock.sendall(_bytetosend)
+        # the result is sent at the hub of the caller, the wakeups of a burst are coalesced
+        hub.call_soon_threadsafe(e.send, rv)
+        msg = hub = meth = args = kwargs = e = rv = None
 
 
 def execute(meth, *args, **kwargs):
@@ -116,7 +93,7 @@ def execute(meth, *args, **kwargs):
         return meth(*args, **kwargs)
 
     e = event.Event()
-    _reqq.put((e, meth, args, kwargs))
+    _reqq.put((hubs.get_hub(), e, meth, args, kwargs))
 
     rv = e.wait()
     if isinstance(rv, tuple) \
@@ -257,7 +234,7 @@ class Proxy(object):
 
 
 def setup():
-    global _rsock, _wsock, _coro, _setup_already, _rspq, _reqq
+    global _setup_already, _reqq
     if _setup_already:
         return
     else:
@@ -270,21 +247,6 @@ def setup():
             execute in main thread.  Check the value of the environment \
             variable EVENTLET_THREADPOOL_SIZE.", RuntimeWarning)
     _reqq = Queue(maxsize=-1)
-    _rspq = Queue(maxsize=-1)
-
-    # connected socket pair
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.bind(('127.0.0.1', 0))
-    sock.listen(1)
-    csock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    csock.connect(sock.getsockname())
-    csock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, True)
-    _wsock, _addr = sock.accept()
-    _wsock.settimeout(None)
-    _wsock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, True)
-    sock.close()
-    _rsock = greenio.GreenSocket(csock)
-    _rsock.settimeout(None)
 
     for i in six.moves.range(_nthreads):
         t = threading.Thread(target=tworker,
@@ -293,15 +255,10 @@ def setup():
         t.start()
         _threads.append(t)
 
-    _coro = greenthread.spawn_n(tpool_trampoline)
-    # This yield fixes subtle error with GreenSocket.__del__
-    eventlet.sleep(0)
-
 
-# Avoid ResourceWarning unclosed socket on Python3.2+
 @atexit.register
 def killall():
-    global _setup_already, _rspq, _rsock, _wsock
+    global _setup_already
     if not _setup_already:
         return
 
@@ -314,27 +271,22 @@ def killall():
         thr.join()
     del _threads[:]
 
-    # return any remaining results
-    while (_rspq is not None) and not _rspq.empty():
-        try:
-            (e, rv) = _rspq.get(block=False)
-            e.send(rv)
-            e = rv = None
-        except Empty:
-            pass
-
-    if _coro is not None:
-        greenthread.kill(_coro)
-    if _rsock is not None:
-        _rsock.close()
-        _rsock = None
-    if _wsock is not None:
-        _wsock.close()
-        _wsock = None
-    _rspq = None
+    # the remaining results are at the hubs run-queues
     _setup_already = False
 
 
+def _after_fork():
+    """ The threads of the pool are not in a forked child, setup starts new ones """
+    global _setup_already, _reqq
+    _setup_already = False
+    _reqq = None
+    del _threads[:]
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
 def set_num_threads(nthreads):
     global _nthreads
     _nthreads = nthreads
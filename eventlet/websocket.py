@@ -20,6 +20,7 @@ except ImportError:  # pragma NO COVER
 from eventlet import semaphore
 from eventlet import wsgi
 from eventlet.green import socket
+from eventlet.greenio.stream import GreenStreamReader, IncompleteReadError
 from eventlet.support import get_errno
 import six
 
@@ -61,6 +62,20 @@ class BadRequest(Exception):
         self.headers = headers
 
 
+def _read_ahead(rfile, sock):
+    """The bytes past the handshake buffered by the file object of the wsgi stdlib parser"""
+    if not hasattr(rfile, 'peek'):
+        return b''
+    timeout = sock.gettimeout()
+    sock.settimeout(0.0)
+    try:
+        return rfile.read(len(rfile.peek()))
+    except SocketError:
+        return b''
+    finally:
+        sock.settimeout(timeout)
+
+
 class WebSocketWSGI(object):
     """Wraps a websocket handler function in a WSGI application.
 
@@ -126,6 +141,10 @@ class WebSocketWSGI(object):
                            [('Connection', 'close'), ] + headers)
             return [body]
 
+        set_idle = environ.get('eventlet.set_idle')
+        if set_idle is not None:
+            # no end to wait for at the exit of the server
+            set_idle()
         try:
             self.handler(ws)
         except socket.error as e:
@@ -270,8 +289,16 @@ class WebSocketWSGI(object):
         return b", ".join(parts)
 
     def _handle_hybi_request(self, environ):
+        reader = None
         if 'eventlet.input' in environ:
             sock = environ['eventlet.input'].get_socket()
+            # the frames sent right after the handshake can be buffered already
+            rfile = getattr(environ['eventlet.input'], 'rfile', None)
+            if isinstance(rfile, GreenStreamReader):
+                reader = rfile
+            elif rfile is not None:
+                reader = GreenStreamReader(sock)
+                reader.feed_data(_read_ahead(rfile, sock))
         elif 'gunicorn.socket' in environ:
             sock = environ['gunicorn.socket']
         else:
@@ -323,7 +350,8 @@ class WebSocketWSGI(object):
         sock.sendall(b'\r\n'.join(handshake_reply) + b'\r\n\r\n')
         return RFC6455WebSocket(sock, environ, self.protocol_version,
                                 protocol=negotiated_protocol,
-                                extensions=parsed_extensions)
+                                extensions=parsed_extensions,
+                                reader=reader)
 
     def _extract_number(self, value):
         """
@@ -502,8 +530,10 @@ class ProtocolError(ValueError):
 
 
 class RFC6455WebSocket(WebSocket):
-    def __init__(self, sock, environ, version=13, protocol=None, client=False, extensions=None):
+    def __init__(self, sock, environ, version=13, protocol=None, client=False, extensions=None,
+                 reader=None):
         super(RFC6455WebSocket, self).__init__(sock, environ, version)
+        self.reader = reader if reader is not None else GreenStreamReader(sock)
         self.iterator = self._iter_frames()
         self.client = client
         self.protocol = protocol
@@ -573,13 +603,10 @@ class RFC6455WebSocket(WebSocket):
             return self._deflate_dec
 
     def _get_bytes(self, numbytes):
-        data = b''
-        while len(data) < numbytes:
-            d = self.socket.recv(numbytes - len(data))
-            if not d:
-                raise ConnectionClosedError()
-            data = data + d
-        return data
+        try:
+            return self.reader.readexactly(numbytes)
+        except IncompleteReadError:
+            raise ConnectionClosedError()
 
     class Message(object):
         def __init__(self, opcode, decoder=None, decompressor=None):
@@ -720,7 +747,7 @@ class RFC6455WebSocket(WebSocket):
             message.push(b'', final=finished)
         else:
             while received < length:
-                d = self.socket.recv(length - received)
+                d = self.reader.read1(length - received)
                 if not d:
                     raise ConnectionClosedError()
                 dlen = len(d)
@@ -1,5 +1,10 @@
+import collections
 import errno
+import functools
+import gc
 import os
+import re
+import signal
 import sys
 import time
 import traceback
@@ -7,8 +12,11 @@ import types
 import warnings
 
 import eventlet
+from eventlet import convenience
 from eventlet import greenio
+from eventlet import hubs
 from eventlet import support
+from eventlet import tpool
 from eventlet.green import BaseHTTPServer
 from eventlet.green import socket
 import six
@@ -27,11 +35,20 @@ DEFAULT_LOG_FORMAT = ('%(client_ip)s - - [%(date_time)s] "%(request_line)s"'
 RESPONSE_414 = b'''HTTP/1.0 414 Request URI Too Long\r\n\
 Connection: close\r\n\
 Content-Length: 0\r\n\r\n'''
+RESPONSE_400 = (b"HTTP/1.0 400 Bad Request\r\n"
+                b"Connection: close\r\nContent-length: 0\r\n\r\n")
+RESPONSE_400_LINE = (b"HTTP/1.0 400 Header Line Too Long\r\n"
+                     b"Connection: close\r\nContent-length: 0\r\n\r\n")
+RESPONSE_400_HEADERS = (b"HTTP/1.0 400 Headers Too Large\r\n"
+                        b"Connection: close\r\nContent-length: 0\r\n\r\n")
+PARSERS = ('stdlib', 'fast')
 is_accepting = True
 
 STATE_IDLE = 'idle'
 STATE_REQUEST = 'request'
 STATE_CLOSE = 'close'
+# idle between requests, the socket of a hub registration only
+STATE_PARKED = 'parked'
 
 __all__ = ['server', 'format_date_time']
 
@@ -50,6 +67,32 @@ def format_date_time(timestamp):
     )
 
 
+# the Date header of the current second
+_date = [None, None]
+
+
+def _date_header():
+    now = int(time.time())
+    if _date[0] != now:
+        _date[1] = 'Date: %s\r\n' % (format_date_time(now),)
+        _date[0] = now
+    return _date[1]
+
+
+# response header name -> Foo-Bar name, of the names seen, bounded against floods of names
+_capitalized_names = {}
+MAX_CAPITALIZED_NAMES = 1024
+
+
+def _capitalized(name):
+    capitalized = _capitalized_names.get(name)
+    if capitalized is None:
+        capitalized = '-'.join([x.capitalize() for x in name.split('-')])
+        if len(_capitalized_names) < MAX_CAPITALIZED_NAMES:
+            _capitalized_names[name] = capitalized
+    return capitalized
+
+
 def addr_to_host_port(addr):
     host = 'unix'
     port = ''
@@ -257,6 +300,10 @@ class HeadersTooLarge(Exception):
     pass
 
 
+class RequestLineTooLong(Exception):
+    pass
+
+
 def get_logger(log, debug):
     if callable(getattr(log, 'info', None)) \
        and callable(getattr(log, 'debug', None)):
@@ -323,6 +370,155 @@ class FileObjectForHeaders(object):
         return rv
 
 
+class RequestHeaders(object):
+    """The headers of a request read by the fast parser, in place of the
+    email.message.Message of the stdlib parser: the first value of a name,
+    case-insensitive.
+    """
+
+    def __init__(self, headers, first):
+        self._headers = headers
+        self._first = first
+
+    def get(self, name, default=None):
+        return self._first.get(name.lower(), default)
+
+    getheader = get
+
+    def get_all(self, name, failobj=None):
+        name = name.lower()
+        values = [v for k, v in self._headers if k.lower() == name]
+        return values or failobj
+
+    def __getitem__(self, name):
+        return self._first.get(name.lower())
+
+    def __contains__(self, name):
+        return name.lower() in self._first
+
+    def __iter__(self):
+        return iter([k for k, _v in self._headers])
+
+    def __len__(self):
+        return len(self._headers)
+
+    def keys(self):
+        return [k for k, _v in self._headers]
+
+    def values(self):
+        return [v for _k, v in self._headers]
+
+    def items(self):
+        return list(self._headers)
+
+
+# header name -> (environ key, lower name) of the names seen, bounded against floods of names
+_environ_keys = {}
+MAX_ENVIRON_KEYS = 1024
+_http_versions = {'HTTP/1.1': (1, 1), 'HTTP/1.0': (1, 0)}
+# the obs-fold of a header value continued on the next line
+_folded = re.compile(r'\r?\n[ \t]+')
+
+
+def _environ_key(name):
+    keys = _environ_keys.get(name)
+    if keys is None:
+        key = name.replace('-', '_').upper()
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = 'HTTP_' + key
+        keys = key, name.lower()
+        if len(_environ_keys) < MAX_ENVIRON_KEYS:
+            _environ_keys[name] = keys
+    return keys
+
+
+class ConnectionTimeouts(object):
+    """The deadlines of the connections of a server, of one hub timer:
+    the idle keepalive connections, waiting for the first bytes of a request,
+    and the connections reading the head of a request.
+
+    The timeouts are constant, the entries of each kind are in the order of
+    their deadlines, the least recently active idle connection first.
+    An expired connection is shut down, its read ends.
+    """
+
+    def __init__(self, keepalive_timeout=None, header_timeout=None, log=None):
+        self.keepalive_timeout = keepalive_timeout
+        self.header_timeout = header_timeout
+        self.log = log
+        # id(connection) -> (deadline, connection)
+        self.idle = collections.OrderedDict()
+        self.reading = collections.OrderedDict()
+        self.expired = 0
+        self.evicted = 0
+        self._timer = None
+        self._timer_at = None
+
+    def set_idle(self, conn):
+        self._set(self.idle, conn, self.keepalive_timeout)
+
+    def set_reading(self, conn):
+        self._set(self.reading, conn, self.header_timeout)
+
+    def clear(self, conn):
+        key = id(conn)
+        self.idle.pop(key, None)
+        self.reading.pop(key, None)
+
+    def _set(self, entries, conn, timeout):
+        self.clear(conn)
+        deadline = None if timeout is None else time.time() + timeout
+        entries[id(conn)] = deadline, conn
+        if deadline is not None:
+            self._schedule(deadline)
+
+    def evict(self):
+        """Shut down the least recently active idle connection of a green thread,
+        returns whether there was one
+        """
+        for key, (_deadline, conn) in self.idle.items():
+            if conn[2] != STATE_PARKED:
+                del self.idle[key]
+                self.evicted += 1
+                self._shutdown(conn, 'evicted')
+                return True
+        return False
+
+    def _schedule(self, when):
+        if self._timer is not None:
+            if self._timer_at <= when:
+                return
+            self._timer.cancel()
+        self._timer_at = when
+        self._timer = hubs.get_hub().schedule_call_global(max(0, when - time.time()), self._expire)
+
+    def _expire(self):
+        self._timer = self._timer_at = None
+        now = time.time()
+        earliest = None
+        for entries in (self.idle, self.reading):
+            while entries:
+                key = next(iter(entries))
+                deadline, conn = entries[key]
+                if deadline is None:
+                    # of a keepalive_timeout of None, only kept for the eviction
+                    break
+                if deadline > now:
+                    if earliest is None or deadline < earliest:
+                        earliest = deadline
+                    break
+                del entries[key]
+                self.expired += 1
+                self._shutdown(conn, 'timed out')
+        if earliest is not None:
+            self._schedule(earliest)
+
+    def _shutdown(self, conn, reason):
+        if self.log is not None:
+            self.log.debug('({0}) {1} {2!r}'.format(os.getpid(), reason, conn[0]))
+        greenio.shutdown_safe(conn[1])
+
+
 class HttpProtocol(BaseHTTPServer.BaseHTTPRequestHandler):
     protocol_version = 'HTTP/1.1'
     minimum_chunk_size = MINIMUM_CHUNK_SIZE
@@ -356,13 +552,21 @@ class HttpProtocol(BaseHTTPServer.BaseHTTPRequestHandler):
             except socket.error:
                 pass
 
+        # the readline of the stdlib parser is faster of a BufferedReader
+        stream = self.server.parser == 'fast' or self.server.park_idle
         try:
-            self.rfile = conn.makefile('rb', self.rbufsize)
             self.wfile = conn.makefile('wb', self.wbufsize)
+            if stream and hasattr(conn, 'recv_into'):
+                self.rfile = greenio.GreenStreamReader(conn, self.rbufsize)
+            else:
+                self.rfile = conn.makefile('rb', self.rbufsize)
         except (AttributeError, NotImplementedError):
             if hasattr(conn, 'send') and hasattr(conn, 'recv'):
                 # it's an SSL.Connection
-                self.rfile = socket._fileobject(conn, "rb", self.rbufsize)
+                if stream and hasattr(conn, 'recv_into'):
+                    self.rfile = greenio.GreenStreamReader(conn, self.rbufsize)
+                else:
+                    self.rfile = socket._fileobject(conn, "rb", self.rbufsize)
                 self.wfile = socket._fileobject(conn, "wb", self.wbufsize)
             else:
                 # it's a SSLObject, or a martian
@@ -371,13 +575,28 @@ class HttpProtocol(BaseHTTPServer.BaseHTTPRequestHandler):
 
     def handle(self):
         self.close_connection = True
+        self.requests = 0
 
         while True:
             self.handle_one_request()
+            self.requests += 1
             if self.conn_state[2] == STATE_CLOSE:
                 self.close_connection = 1
             if self.close_connection:
                 break
+            if self.server.park_idle and self._parkable():
+                # the greenthread and the buffers are released until the next request
+                if self.server.timeouts is not None:
+                    self.server.timeouts.set_idle(self.conn_state)
+                self.conn_state[2] = STATE_PARKED
+                break
+
+    def _parkable(self):
+        """A plain socket, without bytes of the next request buffered"""
+        conn = self.connection
+        if getattr(conn, 'is_ssl', hasattr(conn, 'do_handshake')):
+            return False
+        return isinstance(self.rfile, greenio.GreenStreamReader) and not self.rfile.buffered
 
     def _read_request_line(self):
         if self.rfile.closed:
@@ -398,52 +617,127 @@ class HttpProtocol(BaseHTTPServer.BaseHTTPRequestHandler):
                 raise
         return ''
 
-    def handle_one_request(self):
-        if self.server.max_http_version:
-            self.protocol_version = self.server.max_http_version
+    def _read_head(self):
+        """The request line and the headers, of the buffer of the stream reader"""
+        if self.rfile.closed:
+            return b''
 
-        self.raw_requestline = self._read_request_line()
-        if not self.raw_requestline:
-            self.close_connection = 1
-            return
-        if len(self.raw_requestline) >= self.server.url_length_limit:
-            self.wfile.write(RESPONSE_414)
-            self.close_connection = 1
-            return
+        limit = self.server.url_length_limit
+        try:
+            return self.rfile.readhead(limit + MAX_TOTAL_HEADER_SIZE)
+        except greenio.IncompleteReadError:
+            pass
+        except greenio.LimitOverrunError:
+            if b'\n' in self.rfile.peek()[:limit]:
+                raise HeadersTooLarge()
+            raise RequestLineTooLong()
+        except greenio.SSL.ZeroReturnError:
+            pass
+        except socket.error as e:
+            last_errno = support.get_errno(e)
+            if last_errno in BROKEN_SOCK:
+                self.server.log.debug('({0}) connection reset by peer {1!r}'.format(
+                    self.server.pid,
+                    self.client_address))
+            elif last_errno not in BAD_SOCK:
+                raise
+        return b''
 
-        orig_rfile = self.rfile
+    def _read_request_timed(self, timeouts):
+        """read_request of the keepalive_timeout of an idle connection,
+        then of the header_timeout of the head
+        """
+        conn_state = self.conn_state
         try:
-            self.rfile = FileObjectForHeaders(self.rfile)
-            if not self.parse_request():
-                return
-        except HeaderLineTooLong:
-            self.wfile.write(
-                b"HTTP/1.0 400 Header Line Too Long\r\n"
-                b"Connection: close\r\nContent-length: 0\r\n\r\n")
-            self.close_connection = 1
-            return
-        except HeadersTooLarge:
-            self.wfile.write(
-                b"HTTP/1.0 400 Headers Too Large\r\n"
-                b"Connection: close\r\nContent-length: 0\r\n\r\n")
-            self.close_connection = 1
-            return
+            if self.requests and not getattr(self.rfile, 'buffered', 0):
+                timeouts.set_idle(conn_state)
+                try:
+                    # the first bytes of the next request
+                    self.rfile.peek(1)
+                except socket.timeout:
+                    raise
+                except (socket.error, greenio.SSL.ZeroReturnError):
+                    self.close_connection = 1
+                    return False
+            timeouts.set_reading(conn_state)
+            return self.read_request()
         finally:
-            self.rfile = orig_rfile
+            timeouts.clear(conn_state)
 
-        content_length = self.headers.get('content-length')
-        if content_length is not None:
+    def read_request(self):
+        """Read and parse the request line and the headers, set the environ,
+        returns whether there is a request to handle
+        """
+        if self.server.parser == 'fast' and isinstance(self.rfile, greenio.GreenStreamReader):
             try:
-                int(content_length)
-            except ValueError:
-                self.wfile.write(
-                    b"HTTP/1.0 400 Bad Request\r\n"
-                    b"Connection: close\r\nContent-length: 0\r\n\r\n")
+                self.environ = self.parse_environ()
+            except RequestLineTooLong:
+                self.wfile.write(RESPONSE_414)
                 self.close_connection = 1
-                return
+                return False
+            except HeaderLineTooLong:
+                self.wfile.write(RESPONSE_400_LINE)
+                self.close_connection = 1
+                return False
+            except HeadersTooLarge:
+                self.wfile.write(RESPONSE_400_HEADERS)
+                self.close_connection = 1
+                return False
+            return self.environ is not None
+        else:
+            self.raw_requestline = self._read_request_line()
+            if not self.raw_requestline:
+                self.close_connection = 1
+                return False
+            if len(self.raw_requestline) >= self.server.url_length_limit:
+                self.wfile.write(RESPONSE_414)
+                self.close_connection = 1
+                return False
+
+            orig_rfile = self.rfile
+            try:
+                self.rfile = FileObjectForHeaders(self.rfile)
+                if not self.parse_request():
+                    return False
+            except HeaderLineTooLong:
+                self.wfile.write(RESPONSE_400_LINE)
+                self.close_connection = 1
+                return False
+            except HeadersTooLarge:
+                self.wfile.write(RESPONSE_400_HEADERS)
+                self.close_connection = 1
+                return False
+            finally:
+                self.rfile = orig_rfile
+
+            content_length = self.headers.get('content-length')
+            if content_length is not None:
+                try:
+                    int(content_length)
+                except ValueError:
+                    self.wfile.write(RESPONSE_400)
+                    self.close_connection = 1
+                    return False
+
+            self.environ = self.get_environ()
+        return True
+
+    def handle_one_request(self):
+        if self.server.max_http_version:
+            self.protocol_version = self.server.max_http_version
+
+        timeouts = self.server.timeouts
+        if timeouts is None:
+            ready = self.read_request()
+        else:
+            ready = self._read_request_timed(timeouts)
+        if not ready:
+            return
 
-        self.environ = self.get_environ()
         self.application = self.server.app
+        if self.server.graceful_exit:
+            # not closed by the exit of the server before the response
+            self.conn_state[2] = STATE_REQUEST
         try:
             self.server.outstanding_requests += 1
             try:
@@ -454,6 +748,8 @@ class HttpProtocol(BaseHTTPServer.BaseHTTPRequestHandler):
                     raise
         finally:
             self.server.outstanding_requests -= 1
+            if self.conn_state[2] == STATE_REQUEST:
+                self.conn_state[2] = STATE_IDLE
 
     def handle_one_response(self):
         start = time.time()
@@ -461,6 +757,8 @@ class HttpProtocol(BaseHTTPServer.BaseHTTPRequestHandler):
         headers_sent = []
 
         wfile = self.wfile
+        # vectored writes straight to the socket, the writes of wfile are flushed
+        sendmsg_all = getattr(self.connection, 'sendmsg_all', None)
         result = None
         use_chunked = [False]
         length = [0]
@@ -474,13 +772,14 @@ class HttpProtocol(BaseHTTPServer.BaseHTTPRequestHandler):
                 status, response_headers = headers_set
                 headers_sent.append(1)
                 header_list = [header[0].lower() for header in response_headers]
-                towrite.append(six.b('%s %s\r\n' % (self.protocol_version, status)))
+                # the head serialized at once, a bytes of its lines
+                head = ['%s %s\r\n' % (self.protocol_version, status)]
                 for header in response_headers:
-                    towrite.append(six.b('%s: %s\r\n' % header))
+                    head.append('%s: %s\r\n' % header)
 
                 # send Date header?
                 if 'date' not in header_list:
-                    towrite.append(six.b('Date: %s\r\n' % (format_date_time(time.time()),)))
+                    head.append(_date_header())
 
                 client_conn = self.headers.get('Connection', '').lower()
                 send_keep_alive = False
@@ -498,25 +797,32 @@ class HttpProtocol(BaseHTTPServer.BaseHTTPRequestHandler):
                 if 'content-length' not in header_list:
                     if self.request_version == 'HTTP/1.1':
                         use_chunked[0] = True
-                        towrite.append(b'Transfer-Encoding: chunked\r\n')
+                        head.append('Transfer-Encoding: chunked\r\n')
                     elif 'content-length' not in header_list:
                         # client is 1.0 and therefore must read to EOF
                         self.close_connection = 1
 
                 if self.close_connection:
-                    towrite.append(b'Connection: close\r\n')
+                    head.append('Connection: close\r\n')
                 elif send_keep_alive:
-                    towrite.append(b'Connection: keep-alive\r\n')
-                towrite.append(b'\r\n')
+                    head.append('Connection: keep-alive\r\n')
+                head.append('\r\n')
+                towrite.append(six.b(''.join(head)))
                 # end of header writing
 
             if use_chunked[0]:
-                # Write the chunked encoding
-                towrite.append(six.b("%x" % (len(data),)) + b"\r\n" + data + b"\r\n")
+                # Write the chunked encoding, framed around the data
+                towrite.append(six.b("%x\r\n" % (len(data),)))
+                towrite.append(data)
+                towrite.append(b"\r\n")
             else:
                 towrite.append(data)
-            wfile.writelines(towrite)
-            wfile.flush()
+            if sendmsg_all is not None:
+                # the head and the data of a sendmsg
+                sendmsg_all(towrite)
+            else:
+                wfile.writelines(towrite)
+                wfile.flush()
             length[0] = length[0] + sum(map(len, towrite))
 
         def start_response(status, response_headers, exc_info=None):
@@ -536,7 +842,7 @@ class HttpProtocol(BaseHTTPServer.BaseHTTPRequestHandler):
             # Please, fix your client to ignore header case if possible.
             if self.capitalize_response_headers:
                 response_headers = [
-                    ('-'.join([x.capitalize() for x in key.split('-')]), value)
+                    (_capitalized(key), value)
                     for key, value in response_headers]
 
             headers_set[:] = [status, response_headers]
@@ -632,8 +938,109 @@ class HttpProtocol(BaseHTTPServer.BaseHTTPRequestHandler):
                 host = forward + ',' + host
         return (host, port)
 
-    def get_environ(self):
+    def parse_environ(self):
+        """The fast parser: the request line and the headers parsed of the buffer
+        of the stream reader, the environ built in the same pass.
+        Returns None when there is no request to handle.
+        """
+        self.command = None
+        self.request_version = 'HTTP/0.9'
+        self.requestline = ''
+        self.close_connection = 1
+
+        head = self._read_head()
+        if six.PY3:
+            head = head.decode('iso-8859-1')
+        # empty lines before the request line are ignored
+        head = head.lstrip('\r\n')
+        if not head:
+            return None
+        eol = head.find('\n')
+        if eol + 1 >= self.server.url_length_limit:
+            raise RequestLineTooLong()
+        self.requestline = requestline = head[:eol].rstrip('\r')
+        rest = head[eol + 1:]
+        if len(rest) > MAX_TOTAL_HEADER_SIZE:
+            raise HeadersTooLarge()
+
+        words = requestline.split()
+        if len(words) >= 3:
+            version = words[-1]
+            version_number = _http_versions.get(version)
+            if version_number is None:
+                try:
+                    if not version.startswith('HTTP/'):
+                        raise ValueError
+                    major, minor = version[5:].split('.')
+                    version_number = int(major), int(minor)
+                except ValueError:
+                    self.send_error(400, "Bad request version (%r)" % version)
+                    return None
+            if version_number >= (1, 1) and self.protocol_version >= 'HTTP/1.1':
+                self.close_connection = 0
+            if version_number >= (2, 0):
+                self.send_error(505, "Invalid HTTP version (%s)" % version[5:])
+                return None
+            self.request_version = version
+        if not 2 <= len(words) <= 3:
+            self.send_error(400, "Bad request syntax (%r)" % requestline)
+            return None
+        command, path = words[:2]
+        if len(words) == 2:
+            self.close_connection = 1
+            if command != 'GET':
+                self.send_error(400, "Bad HTTP/0.9 request type (%r)" % command)
+                return None
+        if path.startswith('//'):
+            # as the stdlib parser, against open redirects of scheme-relative URIs
+            path = '/' + path.lstrip('/')
+        self.command, self.path = command, path
+
         env = self.server.get_environ()
+        self._environ_request(env)
+        if '\n ' in rest or '\n\t' in rest:
+            rest = _folded.sub(' ', rest)
+        headers = []
+        first = {}
+        # the lines before the empty line
+        for line in rest.split('\n')[:-2]:
+            if len(line) >= MAX_HEADER_LINE - 1:
+                raise HeaderLineTooLong()
+            name, sep, value = line.partition(':')
+            if not sep:
+                continue
+            value = value.strip(' \t\r')
+            headers.append((name, value))
+            key, lname = _environ_key(name)
+            if lname not in first:
+                first[lname] = value
+            if key in env:
+                if key[0] == 'H':
+                    env[key] += ',' + value
+            elif key[0] == 'H':
+                env[key] = value
+
+        length = first.get('content-length')
+        if length is not None:
+            try:
+                int(length)
+            except ValueError:
+                self.wfile.write(RESPONSE_400)
+                self.close_connection = 1
+                return None
+            if length:
+                env['CONTENT_LENGTH'] = length
+        env['CONTENT_TYPE'] = first.get('content-type', 'text/plain')
+        conntype = first.get('connection', '').lower()
+        if conntype == 'close':
+            self.close_connection = 1
+        elif conntype == 'keep-alive' and self.protocol_version >= 'HTTP/1.1':
+            self.close_connection = 0
+        self.headers = RequestHeaders(headers, first)
+        env['headers_raw'] = tuple(headers)
+        return self._environ_connection(env, length)
+
+    def _environ_request(self, env):
         env['REQUEST_METHOD'] = self.command
         env['SCRIPT_NAME'] = ''
 
@@ -643,6 +1050,10 @@ class HttpProtocol(BaseHTTPServer.BaseHTTPRequestHandler):
         if len(pq) > 1:
             env['QUERY_STRING'] = pq[1]
 
+    def get_environ(self):
+        env = self.server.get_environ()
+        self._environ_request(env)
+
         ct = self.headers.get('content-type')
         if ct is None:
             try:
@@ -654,16 +1065,6 @@ class HttpProtocol(BaseHTTPServer.BaseHTTPRequestHandler):
         length = self.headers.get('content-length')
         if length:
             env['CONTENT_LENGTH'] = length
-        env['SERVER_PROTOCOL'] = 'HTTP/1.0'
-
-        sockname = self.request.getsockname()
-        server_addr = addr_to_host_port(sockname)
-        env['SERVER_NAME'] = server_addr[0]
-        env['SERVER_PORT'] = str(server_addr[1])
-        client_addr = addr_to_host_port(self.client_address)
-        env['REMOTE_ADDR'] = client_addr[0]
-        env['REMOTE_PORT'] = str(client_addr[1])
-        env['GATEWAY_INTERFACE'] = 'CGI/1.1'
 
         try:
             headers = self.headers.headers
@@ -683,6 +1084,19 @@ class HttpProtocol(BaseHTTPServer.BaseHTTPRequestHandler):
                 env[envk] += ',' + v
             else:
                 env[envk] = v
+        return self._environ_connection(env, length)
+
+    def _environ_connection(self, env, length):
+        env['SERVER_PROTOCOL'] = 'HTTP/1.0'
+
+        sockname = self.request.getsockname()
+        server_addr = addr_to_host_port(sockname)
+        env['SERVER_NAME'] = server_addr[0]
+        env['SERVER_PORT'] = str(server_addr[1])
+        client_addr = addr_to_host_port(self.client_address)
+        env['REMOTE_ADDR'] = client_addr[0]
+        env['REMOTE_PORT'] = str(client_addr[1])
+        env['GATEWAY_INTERFACE'] = 'CGI/1.1'
 
         if env.get('HTTP_EXPECT') == '100-continue':
             wfile = self.wfile
@@ -695,9 +1109,17 @@ class HttpProtocol(BaseHTTPServer.BaseHTTPRequestHandler):
             self.rfile, length, self.connection, wfile=wfile, wfile_line=wfile_line,
             chunked_input=chunked)
         env['eventlet.posthooks'] = []
+        env['eventlet.set_idle'] = self.set_idle
 
         return env
 
+    def set_idle(self):
+        """The request in progress is closed at the exit of the server as an idle
+        connection, for a long lived request such as a websocket
+        """
+        if self.conn_state[2] == STATE_REQUEST:
+            self.conn_state[2] = STATE_IDLE
+
     def finish(self):
         try:
             BaseHTTPServer.BaseHTTPRequestHandler.finish(self)
@@ -705,6 +1127,8 @@ class HttpProtocol(BaseHTTPServer.BaseHTTPRequestHandler):
             # Broken pipe, connection reset by peer
             if support.get_errno(e) not in BROKEN_SOCK:
                 raise
+        if self.conn_state[2] == STATE_PARKED:
+            return
         greenio.shutdown_safe(self.connection)
         self.connection.close()
 
@@ -730,7 +1154,13 @@ class Server(BaseHTTPServer.HTTPServer):
                  url_length_limit=MAX_REQUEST_LINE,
                  debug=True,
                  socket_timeout=None,
-                 capitalize_response_headers=True):
+                 capitalize_response_headers=True,
+                 parser='stdlib',
+                 park_idle=False,
+                 keepalive_timeout=None,
+                 header_timeout=None,
+                 evict_idle=False,
+                 graceful_exit=False):
 
         self.outstanding_requests = 0
         self.socket = socket
@@ -752,6 +1182,15 @@ class Server(BaseHTTPServer.HTTPServer):
         self.debug = debug
         self.socket_timeout = socket_timeout
         self.capitalize_response_headers = capitalize_response_headers
+        if parser not in PARSERS:
+            raise ValueError('parser must be one of {0!r}, not {1!r}'.format(PARSERS, parser))
+        self.parser = parser
+        self.park_idle = park_idle
+        self.evict_idle = evict_idle
+        self.graceful_exit = graceful_exit
+        self.timeouts = None
+        if keepalive_timeout is not None or header_timeout is not None or evict_idle:
+            self.timeouts = ConnectionTimeouts(keepalive_timeout, header_timeout, self.log)
 
         if not self.capitalize_response_headers:
             warnings.warn("""capitalize_response_headers is disabled.
@@ -849,7 +1288,15 @@ def server(sock, site,
            url_length_limit=MAX_REQUEST_LINE,
            debug=True,
            socket_timeout=None,
-           capitalize_response_headers=True):
+           capitalize_response_headers=True,
+           accept_batch=convenience.ACCEPT_BATCH,
+           accept_stats=None,
+           parser='stdlib',
+           park_idle=False,
+           keepalive_timeout=None,
+           header_timeout=None,
+           evict_idle=False,
+           graceful_exit=False):
     """Start up a WSGI server handling requests from the supplied server
     socket.  This function loops forever.  The *sock* object will be
     closed after server exits, but the underlying file descriptor will
@@ -904,6 +1351,30 @@ def server(sock, site,
                 wait forever.
     :param capitalize_response_headers: Normalize response headers' names to Foo-Bar.
                 Default is True.
+    :param accept_batch: Maximum number of connections accepted of the listen backlog by a wakeup
+                of the server, before their green threads are spawned. Default is 64.
+    :param accept_stats: A :class:`eventlet.convenience.AcceptStats` instance that counts the
+                accepted connections and the depth of the backlog drained, for monitoring.
+    :param parser: The parser of the request line and the headers: 'stdlib' parses through
+                BaseHTTPRequestHandler, 'fast' parses them straight of the receive buffer and
+                builds the environ in the same pass. The limits are the same.
+                Default is 'stdlib'.
+    :param park_idle: If True, a keepalive connection idle between requests gives up its green thread
+                and buffers, it is only registered in the hub until it is readable again and a green
+                thread of the pool handles the next request. socket_timeout applies to the parked
+                connections. Plain sockets only, the TLS connections are not parked.
+    :param keepalive_timeout: Seconds a keepalive connection may stay idle between requests before
+                it is closed. Default None means no limit other than socket_timeout.
+    :param header_timeout: Seconds to receive the request line and the headers of a request, from
+                the start of the request or the accept of the connection, against slow clients.
+                Default None means no limit other than socket_timeout.
+    :param evict_idle: If True, when the pool is full and a connection is accepted, the least
+                recently active idle keepalive connection is closed to make room for it.
+                The deadlines and the order of activity are of one timer of the server.
+    :param graceful_exit: If True, the exit of the server lets the requests in progress finish
+                their responses, only the idle connections are shut down. A long lived request
+                calls environ['eventlet.set_idle'] to be shut down as idle. Default is False,
+                the connections are shut down whatever their state.
     """
     serv = Server(
         sock, sock.getsockname(),
@@ -920,6 +1391,12 @@ def server(sock, site,
         debug=debug,
         socket_timeout=socket_timeout,
         capitalize_response_headers=capitalize_response_headers,
+        parser=parser,
+        park_idle=park_idle,
+        keepalive_timeout=keepalive_timeout,
+        header_timeout=header_timeout,
+        evict_idle=evict_idle,
+        graceful_exit=graceful_exit,
     )
     if server_event is not None:
         warnings.warn(
@@ -937,11 +1414,53 @@ def server(sock, site,
         raise AttributeError('''\
 eventlet.wsgi.Server pool must provide methods: `spawn`, `waitall`.
 If unsure, use eventlet.GreenPool.''')
+    if evict_idle and not hasattr(pool, 'free'):
+        raise AttributeError('eventlet.wsgi.Server evict_idle needs a pool of a `free` method, as eventlet.GreenPool.')
 
     # [addr, socket, state]
     connections = {}
+    hub = hubs.get_hub()
+    # fileno -> (connection, listener, timer) of the parked connections
+    parked = {}
+
+    def _resume(conn):
+        pool.spawn(serv.process_request, conn).link(_clean_connection, conn)
+
+    def _unpark(fileno):
+        conn, listener, timer = parked.pop(fileno)
+        hub.remove(listener)
+        if timer is not None:
+            timer.cancel()
+        conn[2] = STATE_IDLE
+        return conn
+
+    def _readable(fileno, *args):
+        # in the hub, the pool may have to be waited for
+        eventlet.spawn_n(_resume, _unpark(fileno))
+
+    def _expired(fileno):
+        conn = _unpark(fileno)
+        serv.log.debug('({0}) timed out {1!r}'.format(serv.pid, conn[0]))
+        _clean_connection(None, conn)
+
+    def _park(conn):
+        fileno = conn[1].fileno()
+        if hub.take_readiness(hub.READ, fileno):
+            conn[2] = STATE_IDLE
+            eventlet.spawn_n(_resume, conn)
+            return
+        listener = hub.add(hub.READ, fileno, _readable, functools.partial(_readable, fileno), None)
+        timer = None
+        if serv.socket_timeout is not None:
+            timer = hub.schedule_call_global(serv.socket_timeout, _expired, fileno)
+        parked[fileno] = conn, listener, timer
 
     def _clean_connection(_, conn):
+        if conn[2] == STATE_PARKED:
+            _park(conn)
+            return
+        if serv.timeouts is not None:
+            serv.timeouts.clear(conn)
         connections.pop(conn[0], None)
         conn[2] = STATE_CLOSE
         greenio.shutdown_safe(conn[1])
@@ -951,12 +1470,19 @@ If unsure, use eventlet.GreenPool.''')
         serv.log.info('({0}) wsgi starting up on {1}'.format(serv.pid, socket_repr(sock)))
         while is_accepting:
             try:
-                client_socket, client_addr = sock.accept()
-                client_socket.settimeout(serv.socket_timeout)
-                serv.log.debug('({0}) accepted {1!r}'.format(serv.pid, client_addr))
-                connections[client_addr] = connection = [client_addr, client_socket, STATE_IDLE]
-                (pool.spawn(serv.process_request, connection)
-                    .link(_clean_connection, connection))
+                batch = []
+                for client_socket, client_addr in convenience.accept_batch(sock, accept_batch, accept_stats):
+                    client_socket.settimeout(serv.socket_timeout)
+                    serv.log.debug('({0}) accepted {1!r}'.format(serv.pid, client_addr))
+                    connections[client_addr] = connection = [client_addr, client_socket, STATE_IDLE]
+                    batch.append(connection)
+                # spawned once the backlog is drained
+                for connection in batch:
+                    if evict_idle and not pool.free():
+                        serv.timeouts.evict()
+                    (pool.spawn(serv.process_request, connection)
+                        .link(_clean_connection, connection))
+                batch = client_socket = connection = None
             except ACCEPT_EXCEPTIONS as e:
                 if support.get_errno(e) not in ACCEPT_ERRNO:
                     raise
@@ -964,6 +1490,8 @@ If unsure, use eventlet.GreenPool.''')
                 serv.log.info('wsgi exiting')
                 break
     finally:
+        for fileno in list(parked):
+            _clean_connection(None, _unpark(fileno))
         for cs in six.itervalues(connections):
             prev_state = cs[2]
             cs[2] = STATE_CLOSE
@@ -981,3 +1509,184 @@ If unsure, use eventlet.GreenPool.''')
         except socket.error as e:
             if support.get_errno(e) not in BROKEN_SOCK:
                 traceback.print_exc()
+
+
+def _serve_worker(sock, others, site, kwargs):
+    """ The main of a forked worker, the server of sock until a SIGTERM or SIGINT """
+    # a hub of its own, not the epoll fd & wakeup pipe shared with the supervisor
+    hubs.use_hub(type(hubs.get_hub()))
+    if not hasattr(os, 'register_at_fork'):
+        tpool._after_fork()
+    for other in others:
+        other.close()
+    # the byte written at a signal wakes the hub up, of the non-blocking fd of a green socket
+    wakeup, wakeup_w = socket.socketpair()
+    signal.set_wakeup_fd(wakeup_w.fileno())
+    signal.signal(signal.SIGTERM, lambda *args: None)
+    signal.signal(signal.SIGINT, lambda *args: None)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    kwargs.setdefault('graceful_exit', True)
+    serving = eventlet.spawn(server, sock, site, **kwargs)
+
+    def stop():
+        wakeup.recv(1)
+        # the server stops accepting and waits for the requests in progress
+        serving.kill(SystemExit)
+    eventlet.spawn_n(stop)
+    serving.wait()
+
+
+def serve_multiprocess(site, addr, workers=2, family=socket.AF_INET, backlog=50, reuse_port=True,
+                       graceful_timeout=30, restart_delay=1, **kwargs):
+    """Serve *site* on *addr* from *workers* forked processes, the calling process
+    is their supervisor.  This function returns when the supervisor gets SIGTERM or SIGINT,
+    after the workers finished the requests in progress.
+
+    The supervisor opens the listening sockets before forking, with *reuse_port*
+    every worker has a socket of its own, of SO_REUSEPORT, so the kernel spreads the
+    connections over the workers; otherwise, or without SO_REUSEPORT, the workers accept
+    from one shared socket.  A worker is started again on the socket of the one it replaces,
+    so the connections queued on it are not lost.  Every worker re-creates the hub and the
+    tpool threads after the fork, and runs :func:`server` of the keyword arguments, with
+    *graceful_exit* True unless they set it.
+
+    The objects of the supervisor are moved to the permanent generation of the garbage
+    collector (:func:`gc.freeze`, Python 3.7+) before forking, so the collections of the
+    workers do not copy their memory pages.
+
+    A worker that exits is started again, after *restart_delay* seconds when it exits
+    within *restart_delay* seconds of its start.  SIGHUP restarts the workers one by one,
+    each is replaced by a new worker before it is sent SIGTERM, and killed when it is
+    still running after *graceful_timeout* seconds.
+
+    :param site: WSGI application function.
+    :param addr: Address to listen on, or a listening socket shared by the workers.
+    :param workers: The number of worker processes.
+    :param family: Socket family of *addr*.
+    :param backlog: The maximum number of queued connections of each listening socket.
+    :param reuse_port: Set False for one listening socket shared by the workers.
+    :param graceful_timeout: Seconds of a worker to finish its requests after SIGTERM.
+    :param restart_delay: Seconds before starting again a worker that exited early.
+    """
+    if workers < 1:
+        raise ValueError('serve_multiprocess needs at least one worker, not {0!r}'.format(workers))
+    log = LoggerNull()
+    if kwargs.get('log_output', True):
+        log = get_logger(kwargs.get('log'), kwargs.get('debug', True))
+
+    if hasattr(addr, 'accept'):
+        listeners = [addr] * workers
+    elif reuse_port and hasattr(socket, 'SO_REUSEPORT'):
+        listeners = []
+        with warnings.catch_warnings():
+            # the port of the first socket is bound by all of them
+            warnings.simplefilter('ignore', convenience.ReuseRandomPortWarning)
+            for _ in range(workers):
+                listeners.append(convenience.listen(addr, family, backlog, reuse_port=True))
+                if family in (socket.AF_INET, socket.AF_INET6):
+                    addr = listeners[-1].getsockname()[:2]
+    else:
+        listeners = [convenience.listen(addr, family, backlog, reuse_port=False)] * workers
+
+    # slot -> (pid, start time) of the running worker
+    running = {}
+    # pid -> deadline of the workers sent SIGTERM
+    retiring = {}
+    signals = []
+
+    def _fork(slot):
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                sock = listeners[slot]
+                _serve_worker(sock, [other for other in set(listeners) if other is not sock], site, kwargs)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        running[slot] = pid, time.time()
+        log.info('({0}) started worker {1}'.format(os.getpid(), pid))
+
+    def _retire(pid):
+        retiring[pid] = time.time() + graceful_timeout
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass
+
+    def _reap():
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except OSError as e:
+                if support.get_errno(e) == errno.ECHILD:
+                    return
+                raise
+            if not pid:
+                return
+            if retiring.pop(pid, None) is not None:
+                continue
+            for slot, (worker, started) in list(running.items()):
+                if worker == pid:
+                    del running[slot]
+                    log.info('({0}) worker {1} exited, status {2}'.format(os.getpid(), pid, status))
+                    if time.time() - started < restart_delay:
+                        time.sleep(restart_delay)
+                    _fork(slot)
+
+    def _kill_late():
+        now = time.time()
+        for pid, deadline in list(retiring.items()):
+            if now > deadline:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except OSError:
+                    pass
+                retiring[pid] = now + graceful_timeout
+
+    handlers = {}
+    for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+        handlers[signum] = signal.signal(signum, lambda signum, frame: signals.append(signum))
+    try:
+        for slot in range(workers):
+            _fork(slot)
+        rolling = []
+        while True:
+            while signals:
+                signum = signals.pop(0)
+                if signum == signal.SIGHUP:
+                    log.info('({0}) restarting the workers'.format(os.getpid()))
+                    rolling = list(range(workers))
+                else:
+                    rolling = None
+            if rolling is None:
+                break
+            if rolling and not retiring:
+                # the next one, once the previous one exited
+                slot = rolling.pop(0)
+                old = running[slot][0]
+                _fork(slot)
+                _retire(old)
+            _reap()
+            _kill_late()
+            time.sleep(0.1)
+        log.info('({0}) stopping the workers'.format(os.getpid()))
+        for pid, _ in running.values():
+            _retire(pid)
+        running.clear()
+        while retiring:
+            _reap()
+            _kill_late()
+            time.sleep(0.1)
+    finally:
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+        for pid, _ in running.values():
+            _retire(pid)
+        for sock in set(listeners):
+            if sock is not addr:
+                sock.close()
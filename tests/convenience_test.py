@@ -113,6 +113,21 @@ class TestServe(tests.LimitedTestCase):
             timeout_value="timed out")
         self.assertEqual(x, "timed out")
 
+    def test_serve_accept_batch(self):
+        l = eventlet.listen(('localhost', 0))
+        clients = [eventlet.connect(l.getsockname()) for _ in range(6)]
+        stats = convenience.AcceptStats()
+
+        def handle(sock, addr):
+            sock.sendall(b'hi')
+        server = eventlet.spawn(eventlet.serve, l, handle, accept_batch_size=4, accept_stats=stats)
+        for c in clients:
+            self.assertEqual(b'hi', c.recv(2))
+        result = stats.stats()
+        self.assertEqual((result['accepted'], result['batches'], result['max_depth']), (6, 2, 4))
+        assert result['rate'] > 0 and result['full_batches'] == 1
+        server.kill()
+
     @tests.skip_if_no_ssl
     def test_wrap_ssl(self):
         server = eventlet.wrap_ssl(
@@ -194,3 +209,12 @@ def test_reuseport_oserror():
             socket.socket.__init__ = original_socket_init
         assert len(w) == 1
         assert issubclass(w[0].category, convenience.ReusePortUnavailableWarning)
+
+
+def test_server_ssl_context():
+    context = convenience.server_ssl_context(tests.certificate_file, tests.private_key_file)
+    assert convenience.server_ssl_context(tests.certificate_file, tests.private_key_file) is context
+    assert not context.options & convenience.ssl.OP_NO_TICKET
+    no_tickets = convenience.server_ssl_context(
+        tests.certificate_file, tests.private_key_file, session_tickets=False)
+    assert no_tickets is not context and no_tickets.options & convenience.ssl.OP_NO_TICKET
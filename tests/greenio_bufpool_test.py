@@ -0,0 +1,82 @@
+import six
+
+from eventlet.green import socket
+from eventlet.greenio import BufferPool, buffer_pool, recv_lease
+import tests
+
+
+def test_size_classes():
+    pool = BufferPool(min_class=1024, max_class=8192)
+    assert pool.size_class(1) == 1024
+    assert pool.size_class(1024) == 1024
+    assert pool.size_class(1025) == 2048
+    assert pool.size_class(8192) == 8192
+    assert pool.size_class(8193) is None
+    with tests.assert_raises(ValueError):
+        BufferPool(min_class=1000)
+
+
+def test_lease_reuses():
+    pool = BufferPool(min_class=1024, max_class=8192)
+    with pool.lease(1500) as buf:
+        assert len(buf) == 2048
+        first = buf
+        assert pool.stats()['leased_bytes'] == 2048
+    with pool.lease(2000) as buf:
+        assert buf is first
+    stats = pool.stats()
+    assert stats['leases'] == 2 and stats['hits'] == 1 and stats['misses'] == 1
+    assert stats['hit_ratio'] == 0.5
+    assert stats['resident_bytes'] == 2048 and stats['leased_bytes'] == 0
+    assert stats['free'] == {2048: 1}
+
+
+def test_oversize_not_pooled():
+    pool = BufferPool(min_class=1024, max_class=8192)
+    with pool.lease(10000) as buf:
+        assert len(buf) == 10000
+    stats = pool.stats()
+    assert stats['oversize'] == 1 and stats['resident_bytes'] == 0
+
+
+def test_high_water():
+    pool = BufferPool(min_class=1024, max_class=8192, high_water=3072)
+    bufs = [pool.acquire(1024) for _ in range(5)]
+    for buf in bufs:
+        pool.release(buf)
+    stats = pool.stats()
+    assert stats['resident_bytes'] == 3072
+    assert stats['releases'] == 3 and stats['drops'] == 2
+    pool.clear()
+    assert pool.stats()['resident_bytes'] == 0
+
+
+def test_recv_lease():
+    pool = BufferPool(min_class=1024, max_class=8192)
+    a, b = socket.socketpair()
+    a.sendall(b'hello')
+    with b.recv_lease(100, pool=pool) as data:
+        assert data.tobytes() == b'hello'
+        held = data
+    if six.PY3:
+        # released with the buffer, a late use of the view fails
+        with tests.assert_raises(ValueError):
+            held.tobytes()
+    a.close()
+    with recv_lease(b, 100, pool=pool) as data:
+        assert len(data) == 0
+    assert pool.stats()['hits'] == 1
+    b.close()
+
+
+def test_default_pool():
+    a, b = socket.socketpair()
+    buffer_pool.reset_stats()
+    for i in range(3):
+        a.sendall(b'x' * 10)
+        with b.recv_lease(65536) as data:
+            assert data.tobytes() == b'x' * 10
+    stats = buffer_pool.stats()
+    assert stats['leases'] == 3 and stats['hits'] >= 2
+    a.close()
+    b.close()
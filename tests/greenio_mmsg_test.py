@@ -0,0 +1,109 @@
+import socket as _orig_sock
+
+import eventlet
+from eventlet.green import socket
+from eventlet.greenio import mmsg
+from eventlet.hubs import notify_opened
+import tests
+import tests.mock as mock
+
+
+def udp_pair(family=socket.AF_INET, host='127.0.0.1', ultra=False):
+    def make():
+        if ultra:
+            from eventlet.greenio.ultra import UltraGreenSocket
+            raw = _orig_sock.socket(family, _orig_sock.SOCK_DGRAM)
+            notify_opened(raw.fileno())
+            sock = UltraGreenSocket(fd=raw)
+        else:
+            sock = socket.socket(family, socket.SOCK_DGRAM)
+        sock.bind((host, 0))
+        return sock
+    return make(), make()
+
+
+def check_roundtrip(a, b):
+    dest = b.getsockname()
+    msgs = [(('d%d' % i).encode() * (i + 1), dest) for i in range(40)]
+    assert a.send_many(msgs) == 40
+    received = []
+    while len(received) < 40:
+        received.extend(b.recv_many(16, 2048))
+    assert [data for data, _ in received] == [data for data, _ in msgs]
+    assert set(addr[:2] for _, addr in received) == set([a.getsockname()[:2]])
+    # echo to the addresses received
+    assert b.send_many(received) == 40
+    echoed = []
+    while len(echoed) < 40:
+        echoed.extend(a.recv_many(64))
+    assert [data for data, _ in echoed] == [data for data, _ in msgs]
+    a.close()
+    b.close()
+
+
+def test_roundtrip():
+    for ultra in (False, True):
+        check_roundtrip(*udp_pair(ultra=ultra))
+
+
+def test_roundtrip_loop():
+    with mock.patch('eventlet.greenio.mmsg.MMSG', False):
+        for ultra in (False, True):
+            check_roundtrip(*udp_pair(ultra=ultra))
+
+
+def test_roundtrip_ipv6():
+    try:
+        pair = udp_pair(socket.AF_INET6, '::1')
+    except socket.error:
+        raise tests.SkipTest('no IPv6')
+    check_roundtrip(*pair)
+
+
+def test_recv_many_waits():
+    a, b = udp_pair()
+    dest = b.getsockname()
+
+    def sender():
+        eventlet.sleep(0.05)
+        a.sendto(b'one', dest)
+        a.sendto(b'two', dest)
+    eventlet.spawn(sender)
+    # a readiness drains both datagrams
+    received = b.recv_many(8, 100)
+    while len(received) < 2:
+        received.extend(b.recv_many(8, 100))
+    assert [data for data, _ in received] == [b'one', b'two']
+    b.settimeout(0.05)
+    with tests.assert_raises(socket.timeout):
+        b.recv_many(8, 100)
+    a.close()
+    b.close()
+
+
+def test_names_and_connected():
+    a, b = udp_pair()
+    port = b.getsockname()[1]
+    # a name resolved by sendto, the numeric addresses batched around it
+    msgs = [(b'1', ('127.0.0.1', port)), (b'2', ('localhost', port)), (b'3', ('127.0.0.1', port))]
+    assert a.send_many(msgs) == 3
+    received = []
+    while len(received) < 3:
+        received.extend(b.recv_many(8, 100))
+    assert [data for data, _ in received] == [b'1', b'2', b'3']
+    a.connect(b.getsockname())
+    assert a.send_many([(b'c', None)]) == 1
+    assert b.recv_many(8, 100)[0][0] == b'c'
+    # truncated to bufsize, as recvfrom
+    a.send_many([(b'x' * 100, None)])
+    assert b.recv_many(8, 10)[0][0] == b'x' * 10
+    a.close()
+    b.close()
+
+
+def test_sockaddr_codec():
+    raw = mmsg.encode_sockaddr(socket.AF_INET, ('10.1.2.3', 53))
+    assert mmsg.decode_sockaddr(raw) == ('10.1.2.3', 53)
+    raw = mmsg.encode_sockaddr(socket.AF_INET6, ('fe80::1', 53, 0, 2))
+    assert mmsg.decode_sockaddr(raw) == ('fe80::1', 53, 0, 2)
+    assert mmsg.encode_sockaddr(socket.AF_INET, ('localhost', 53)) is None
@@ -0,0 +1,187 @@
+import array
+
+import eventlet
+from eventlet.green import socket
+from eventlet.greenio import GreenStreamReader, IncompleteReadError, LimitOverrunError
+import tests
+
+
+def feed(chunks, delay=0):
+    """ A reader of the chunks, sent one by one by a greenthread """
+    a, b = socket.socketpair()
+
+    def writer():
+        for chunk in chunks:
+            a.sendall(chunk)
+            eventlet.sleep(delay)
+        a.close()
+    eventlet.spawn(writer)
+    return GreenStreamReader(b, 16), b
+
+
+def test_readexactly():
+    reader, _ = feed([b'ab', b'cdefg', b'h' * 100])
+    assert reader.readexactly(3) == b'abc'
+    assert reader.readexactly(0) == b''
+    # larger than the buffer, it grows
+    assert reader.readexactly(104) == b'defg' + b'h' * 100
+    try:
+        reader.readexactly(1)
+        assert False, 'IncompleteReadError expected'
+    except IncompleteReadError as e:
+        assert e.partial == b'' and e.expected == 1
+
+
+def test_feed_data():
+    reader, _ = feed([b'cd\n', b'e'])
+    # read ahead, larger than the buffer, before the bytes of the socket
+    reader.feed_data(b'x' * 20 + b'\nab')
+    assert reader.readline() == b'x' * 20 + b'\n'
+    assert reader.readline() == b'abcd\n'
+    assert reader.read() == b'e'
+
+
+def test_readexactly_incomplete():
+    reader, _ = feed([b'abc'])
+    try:
+        reader.readexactly(5)
+        assert False, 'IncompleteReadError expected'
+    except IncompleteReadError as e:
+        assert e.partial == b'abc' and e.expected == 5
+    assert isinstance(IncompleteReadError(b'', 1), EOFError)
+
+
+def test_readuntil():
+    reader, _ = feed([b'GET / HTTP/1.1\r', b'\nHost: x\r\n\r', b'\nbody'])
+    assert reader.readuntil(b'\r\n') == b'GET / HTTP/1.1\r\n'
+    assert reader.readuntil(b'\r\n\r\n') == b'Host: x\r\n\r\n'
+    try:
+        reader.readuntil(b'\r\n')
+        assert False, 'IncompleteReadError expected'
+    except IncompleteReadError as e:
+        assert e.partial == b'body' and e.expected is None
+
+
+def test_readuntil_limit():
+    reader, _ = feed([b'x' * 40, b'\n', b'short\n'])
+    try:
+        reader.readuntil(b'\n', limit=20)
+        assert False, 'LimitOverrunError expected'
+    except LimitOverrunError as e:
+        assert e.consumed > 20
+    # the bytes are kept buffered
+    assert reader.readuntil(b'\n', limit=100) == b'x' * 40 + b'\n'
+    assert reader.readuntil(b'\n', limit=6) == b'short\n'
+
+
+def test_readhead():
+    reader, _ = feed([b'GET / HTTP/1.1\r\nHost: x\r', b'\n\r\nGET / HTTP/1.0\n\nGET /',
+                      b' HTTP/1.0\r\nA: b\n\r\nrest'])
+    assert reader.readhead() == b'GET / HTTP/1.1\r\nHost: x\r\n\r\n'
+    assert reader.readhead() == b'GET / HTTP/1.0\n\n'
+    assert reader.readhead() == b'GET / HTTP/1.0\r\nA: b\n\r\n'
+    try:
+        reader.readhead()
+        assert False, 'IncompleteReadError expected'
+    except IncompleteReadError as e:
+        assert e.partial == b'rest'
+    reader, _ = feed([b'GET / HTTP/1.1\r\n', b'X: y\r\n' * 10, b'\r\n'])
+    try:
+        reader.readhead(limit=40)
+        assert False, 'LimitOverrunError expected'
+    except LimitOverrunError as e:
+        assert e.consumed > 40
+
+
+def test_readline():
+    reader, _ = feed([b'one\ntw', b'o\nthree', b'-long\nend'])
+    assert reader.readline() == b'one\n'
+    assert reader.readline() == b'two\n'
+    assert reader.readline(4) == b'thre'
+    assert reader.readline(0) == b''
+    assert reader.readline() == b'e-long\n'
+    assert reader.readline() == b'end'
+    assert reader.readline() == b''
+
+
+def test_readlines_iter():
+    reader, _ = feed([b'a\nb\n', b'c'])
+    assert reader.readlines() == [b'a\n', b'b\n', b'c']
+    reader, _ = feed([b'a\nb\nc\n'])
+    assert list(reader) == [b'a\n', b'b\n', b'c\n']
+
+
+def test_read():
+    reader, _ = feed([b'abc', b'defgh', b'i' * 50, b'tail'])
+    assert reader.read(2) == b'ab'
+    assert reader.peek()[:1] == b'c'
+    assert reader.read(6) == b'cdefgh'
+    assert reader.read() == b'i' * 50 + b'tail'
+    assert reader.read(10) == b''
+
+
+def test_read1():
+    reader, _ = feed([b'abc', b'd' * 100], delay=0.01)
+    assert reader.read1(2) == b'ab'
+    assert reader.read1(10) == b'c'
+    # larger than the buffer, a single recv of the socket
+    assert reader.read1(1000) == b'd' * 100
+    assert reader.read1(10) == b''
+
+
+def test_readinto():
+    payload = b''.join(bytes(bytearray([i % 256])) * 7 for i in range(100))
+    reader, _ = feed([payload[:5], payload[5:300], payload[300:]])
+    assert reader.read(3) == payload[:3]
+    small = bytearray(10)
+    assert reader.readinto(small) == 10 and small == payload[3:13]
+    # larger than the buffer, received in the caller's buffer
+    large = bytearray(600)
+    assert reader.readinto(large) == 600 and large == payload[13:613]
+    items = array.array('B', [0] * 100)
+    assert reader.readinto(items) == len(payload) - 613
+    assert reader.readinto(bytearray(1)) == 0
+
+
+def test_timeout_keeps_buffered():
+    a, b = socket.socketpair()
+    b.settimeout(0.05)
+    reader = GreenStreamReader(b)
+    a.sendall(b'abc')
+    try:
+        reader.readexactly(5)
+        assert False, 'timeout expected'
+    except socket.timeout:
+        pass
+    assert reader.buffered == 3
+    a.sendall(b'de')
+    assert reader.readexactly(5) == b'abcde'
+    a.close()
+
+
+def test_buffer_compacts_and_shrinks():
+    a, b = socket.socketpair()
+    reader = GreenStreamReader(b, 32)
+    for _ in range(20):
+        a.sendall(b'0123456789' * 3 + b'\n')
+        assert reader.readline() == b'0123456789' * 3 + b'\n'
+    a.sendall(b'x' * 1000)
+    assert reader.readexactly(1000) == b'x' * 1000
+    a.sendall(b'y\n')
+    assert reader.readline() == b'y\n'
+    # back to its size after a large read
+    assert len(reader._buf) == 32
+    a.close()
+
+
+def test_close():
+    reader, sock = feed([b'data'])
+    with reader:
+        assert reader.read(4) == b'data'
+    assert reader.closed
+    # the socket is not closed
+    assert sock.fileno() >= 0
+
+
+def test_websocket_frame_with_handshake():
+    tests.run_isolated('websocket_frame_with_handshake.py')
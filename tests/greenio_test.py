@@ -12,7 +12,7 @@ import tempfile
 from nose.tools import eq_
 
 import eventlet
-from eventlet import event, greenio, debug
+from eventlet import convenience, event, greenio, debug
 from eventlet.hubs import get_hub
 from eventlet.green import select, socket, time, ssl
 from eventlet.support import get_errno
@@ -945,6 +945,455 @@ def test_double_close_219():
     tests.run_isolated('greenio_double_close_219.py')
 
 
+def test_ultra_recv_optimistic():
+    tests.run_isolated('ultra_recv_optimistic.py')
+
+
+def _read_all(sock, result):
+    while True:
+        data = sock.recv(65536)
+        if not data:
+            break
+        result.append(data)
+    sock.close()
+
+
+def _ultra_socketpair():
+    from eventlet.greenio.ultra import UltraGreenSocket
+    from eventlet.hubs import notify_opened
+    a, b = _orig_sock.socketpair()
+    notify_opened(a.fileno())
+    notify_opened(b.fileno())
+    return UltraGreenSocket(fd=a), UltraGreenSocket(fd=b)
+
+
+def test_sendall_partial_writes_views():
+    # the rest of a partial send is a view, data of items larger than a byte is sent whole
+    payload = array.array('i', range(1 << 18))
+    expected = payload.tobytes() if six.PY3 else payload.tostring()
+    for pair in (socket.socketpair, _ultra_socketpair):
+        a, b = pair()
+        bufsized(a, 4096)
+        result = []
+        reader = eventlet.spawn(_read_all, b, result)
+        a.sendall(payload)
+        a.close()
+        reader.wait()
+        assert b''.join(result) == expected, pair
+
+
+def test_sendmsg_all_partial_writes():
+    buffers = [b'head', b'', bytearray(b'x' * 100000), memoryview(b'y' * 3), b'z' * 70000]
+    buffers.extend(b'%d,' % i for i in range(3000))
+    expected = b''.join(bytes(buf) for buf in buffers)
+    for pair in (socket.socketpair, _ultra_socketpair):
+        a, b = pair()
+        bufsized(a, 4096)
+        result = []
+        reader = eventlet.spawn(_read_all, b, result)
+        a.sendmsg_all(buffers)
+        a.writev([b'!'])
+        a.close()
+        reader.wait()
+        assert b''.join(result) == expected + b'!', pair
+
+
+def test_coalesce_buffers():
+    from eventlet.greenio.base import advance_buffers, coalesce_buffers
+    large = b'l' * 20000
+    assert list(coalesce_buffers([b'a', b'', b'b', large, b'c'])) == [b'ab', large, b'c']
+    assert list(coalesce_buffers([b'a' * 10, b'b' * 10], size=15)) == [b'a' * 10, b'b' * 10]
+    assert advance_buffers([b'abc', b'de', b'f'], 4) == [b'e', b'f']
+    assert advance_buffers([b'abc', b'de'], 5) == []
+
+
+def _sendfile_payload(size=3 << 20):
+    payload = b''.join(six.int2byte(i % 251) * 1021 for i in range(size // 1021 + 1))[:size]
+    f = tempfile.TemporaryFile()
+    f.write(payload)
+    f.seek(0)
+    return payload, f
+
+
+def _sendfile_received(pair, file, *args):
+    a, b = pair()
+    result = []
+    reader = eventlet.spawn(_read_all, b, result)
+    # small buffers, os.sendfile is short of space and trampolines
+    a.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+    sent = a.sendfile(file, *args)
+    a.close()
+    reader.wait()
+    return sent, b''.join(result)
+
+
+def test_sendfile():
+    payload, f = _sendfile_payload()
+    with f:
+        for pair in (socket.socketpair, _ultra_socketpair):
+            f.seek(0)
+            sent, data = _sendfile_received(pair, f)
+            assert sent == len(payload) and data == payload
+            assert f.tell() == len(payload)
+            sent, data = _sendfile_received(pair, f, 5000, 1 << 20)
+            assert sent == 1 << 20 and data == payload[5000:5000 + (1 << 20)]
+            assert f.tell() == 5000 + (1 << 20)
+
+
+def test_sendfile_fallbacks():
+    payload, f = _sendfile_payload(200000)
+    with f:
+        # read, as for TLS
+        with mock.patch('eventlet.greenio.base._os_sendfile', None):
+            sent, data = _sendfile_received(socket.socketpair, f, 70000)
+        assert sent == len(payload) - 70000 and data == payload[70000:]
+        assert f.tell() == len(payload)
+        # mapped, of the caller's choice
+        a, b = socket.socketpair()
+        result = []
+        reader = eventlet.spawn(_read_all, b, result)
+        assert greenio.base.sendfile(a, f, 5, mapped=True) == len(payload) - 5
+        a.close()
+        reader.wait()
+        assert b''.join(result) == payload[5:]
+    # read, of what has no file descriptor
+    sent, data = _sendfile_received(socket.socketpair, six.BytesIO(payload), 10, 100)
+    assert sent == 100 and data == payload[10:110]
+    with tempfile.TemporaryFile('w+') as text, socket.socket() as sock:
+        with tests.assert_raises(ValueError):
+            sock.sendfile(text)
+
+
+def test_sendfile_truncated():
+    # of no os.sendfile, a file truncated while it is sent ends the send, no SIGBUS of a mapping
+    payload, f = _sendfile_payload()
+    a, b = socket.socketpair()
+    a.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+    result = []
+
+    def read():
+        result.append(b.recv(65536))
+        f.truncate(1000)
+        _read_all(b, result)
+    reader = eventlet.spawn(read)
+    with f:
+        with mock.patch('eventlet.greenio.base._os_sendfile', None):
+            sent = a.sendfile(f)
+    a.close()
+    reader.wait()
+    assert sent == greenio.base.SENDFILE_CHUNK
+    assert b''.join(result) == payload[:sent]
+
+
+def test_sendfile_tls_ultra():
+    # no os.sendfile under TLS, the file is read and encrypted by sendall
+    orig_ssl = eventlet.patcher.original('ssl')
+    server_ctx = orig_ssl.SSLContext(orig_ssl.PROTOCOL_SSLv23)
+    server_ctx.load_cert_chain(tests.certificate_file, tests.private_key_file)
+    client_ctx = orig_ssl.SSLContext(orig_ssl.PROTOCOL_SSLv23)
+    payload, f = _sendfile_payload(1 << 20)
+    a, b = _ultra_socketpair()
+    result = []
+
+    def server():
+        b.ssl_wrap(server_ctx, server_side=True)
+        received = 0
+        while received < len(payload) - 3:
+            data = b.recv(65536)
+            result.append(data)
+            received += len(data)
+        b.sendall(b'ok')
+
+    with f:
+        server_thread = eventlet.spawn(server)
+        a.ssl_wrap(client_ctx)
+        assert a.is_ssl and b.is_ssl
+        with mock.patch('eventlet.greenio.base._os_sendfile') as os_sendfile:
+            assert a.sendfile(f, 3) == len(payload) - 3
+        assert not os_sendfile.called
+        assert a.recv(2) == b'ok'
+        server_thread.wait()
+    assert b''.join(result) == payload[3:]
+    a.close()
+    b.close()
+
+
+def _ultra_tls_contexts():
+    orig_ssl = eventlet.patcher.original('ssl')
+    server_ctx = orig_ssl.SSLContext(orig_ssl.PROTOCOL_SSLv23)
+    server_ctx.load_cert_chain(tests.certificate_file, tests.private_key_file)
+    return server_ctx, orig_ssl.SSLContext(orig_ssl.PROTOCOL_SSLv23)
+
+
+def test_ultra_tls_bio():
+    from eventlet.greenio import tlsbio
+    if not tlsbio.MEMORY_BIO:
+        raise tests.SkipTest('no ssl.MemoryBIO')
+    server_ctx, client_ctx = _ultra_tls_contexts()
+    payload = os.urandom(3 << 20)
+    # of memory BIOs on either side, or both
+    for server_bio, client_bio in ((True, True), (True, False), (False, True)):
+        a, b = _ultra_socketpair()
+        result = []
+
+        def server():
+            b.ssl_wrap(server_ctx, bio=server_bio, server_side=True)
+            received = 0
+            while received < len(payload):
+                data = b.recv(100000)
+                result.append(data)
+                received += len(data)
+            b.sendall(b'ok')
+            assert b.recv(10) == b'bye'
+
+        server_thread = eventlet.spawn(server)
+        a.ssl_wrap(client_ctx, bio=client_bio)
+        assert a.is_ssl and a.cipher()
+        a.sendall(payload)
+        buff = bytearray(10)
+        assert buff[:a.recv_into(buff)] == b'ok'
+        a.sendmsg_all([b'b', b'y', b'e'])
+        server_thread.wait()
+        assert b''.join(result) == payload
+        a.close()
+        b.close()
+
+
+def _record_length(n):
+    return bytes(bytearray([n >> 8, n & 0xff]))
+
+
+def test_ultra_tls_bio_records():
+    # the record boundaries of ciphertext received a byte at a time, the
+    # headers split across the receives
+    from eventlet.greenio import tlsbio
+    if not tlsbio.MEMORY_BIO:
+        raise tests.SkipTest('no ssl.MemoryBIO')
+    server_ctx, client_ctx = _ultra_tls_contexts()
+    tls = tlsbio.TLSBio(client_ctx)
+    records = b''.join(b'\x17\x03\x03' + _record_length(n) + b'r' * n for n in (3, 0, 300))
+    ends = []
+    for byte in six.iterbytes(records):
+        tls.rbuf[0] = byte
+        tls._feed(1)
+        ends.append(tls.complete)
+    assert sorted(set(ends)) == [0, 8, 13, 318]
+    assert ends.index(8) == 7 and ends.index(13) == 12 and ends[-1] == len(records)
+    assert tls.fed == tls.rec_end == len(records) and not tls.tail
+
+
+def test_ultra_tls_bio_unwrap_eof():
+    from eventlet.greenio import tlsbio
+    if not tlsbio.MEMORY_BIO:
+        raise tests.SkipTest('no ssl.MemoryBIO')
+    server_ctx, client_ctx = _ultra_tls_contexts()
+    a, b = _ultra_socketpair()
+
+    def server():
+        b.ssl_wrap(server_ctx, bio=True, server_side=True)
+        assert b.recv(10) == b'tls'
+        b.ssl_unwrap()
+        assert b.recv(10) == b'plain'
+        b.close()
+
+    server_thread = eventlet.spawn(server)
+    a.ssl_wrap(client_ctx, bio=True)
+    a.sendall(b'tls')
+    a.ssl_unwrap()
+    assert not a.is_ssl
+    a.sendall(b'plain')
+    server_thread.wait()
+    assert a.recv(10) == b''
+    a.close()
+
+
+def test_ultra_tls_bio_reset():
+    # a reset in the middle of the stream is raised, not a ragged EOF
+    from eventlet.greenio import tlsbio
+    from eventlet.greenio.ultra import UltraGreenSocket
+    from eventlet.hubs import notify_opened
+    if not tlsbio.MEMORY_BIO:
+        raise tests.SkipTest('no ssl.MemoryBIO')
+    server_ctx, client_ctx = _ultra_tls_contexts()
+    for bio in (False, True):
+        listener = _orig_sock.socket()
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(1)
+        raw = _orig_sock.create_connection(listener.getsockname())
+        # the close sends a reset
+        raw.setsockopt(_orig_sock.SOL_SOCKET, _orig_sock.SO_LINGER, b'\x01\x00\x00\x00\x00\x00\x00\x00')
+        accepted = listener.accept()[0]
+        listener.close()
+        for fd in (raw, accepted):
+            notify_opened(fd.fileno())
+        a, b = UltraGreenSocket(fd=raw), UltraGreenSocket(fd=accepted)
+        server_thread = eventlet.spawn(b.ssl_wrap, server_ctx, bio=bio, server_side=True)
+        a.ssl_wrap(client_ctx, bio=bio)
+        server_thread.wait()
+        a.sendall(b'partial')
+        assert b.recv(10) == b'partial'
+        a.close()
+        try:
+            b.recv(10)
+        except _orig_sock.error as e:
+            assert get_errno(e) == errno.ECONNRESET, e
+        else:
+            assert False, 'reset not raised, bio={0}'.format(bio)
+        b.close()
+
+
+def _ultra_tls_listener(ctx, **kw):
+    from eventlet.greenio.ultra import UltraGreenSocket
+    from eventlet.hubs import notify_opened
+    raw = _orig_sock.socket()
+    notify_opened(raw.fileno())
+    listener = UltraGreenSocket(fd=raw, **kw)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(50)
+    listener.ssl_wrap(ctx, server_side=True)
+    assert listener.is_ssl
+    return listener
+
+
+def _ultra_client(addr):
+    from eventlet.greenio.ultra import UltraGreenSocket
+    client = UltraGreenSocket()
+    client.connect(addr)
+    return client
+
+
+def test_ultra_tls_lazy_accept():
+    # a client that never handshakes does not stall the accept of the others
+    server_ctx, client_ctx = _ultra_tls_contexts()
+    listener = _ultra_tls_listener(server_ctx, lazy_handshake=True, handshake_timeout=0.1)
+    addr = listener.getsockname()
+    silent = _ultra_client(addr)
+    stalled, _ = listener.accept()
+    client = _ultra_client(addr)
+    conn, _ = listener.accept()
+
+    def handshake():
+        client.ssl_wrap(client_ctx)
+        client.sendall(b'hello')
+    handshaking = eventlet.spawn(handshake)
+    assert conn.recv(5) == b'hello'
+    handshaking.wait()
+    start = time.time()
+    with tests.assert_raises(socket.timeout):
+        stalled.recv(5)
+    assert time.time() - start < 1
+    for sock in (silent, stalled, client, conn, listener):
+        sock.close()
+
+
+def test_ultra_tls_accept_many_bad_client():
+    # the clients of the backlog handshake lazily, a bad or a silent one stalls no other
+    server_ctx, client_ctx = _ultra_tls_contexts()
+    listener = _ultra_tls_listener(server_ctx)
+    addr = listener.getsockname()
+    good = [_ultra_client(addr) for _ in range(2)]
+    bad = _ultra_client(addr)
+    bad.sendall(b'GET / HTTP/1.0\r\n\r\n')
+    good.append(_ultra_client(addr))
+    silent = _ultra_client(addr)
+
+    def hello(client):
+        client.ssl_wrap(client_ctx)
+        client.sendall(b'hello')
+    handshaking = [eventlet.spawn(hello, client) for client in good]
+    eventlet.sleep(0.01)
+    with eventlet.Timeout(1):
+        accepted = listener.accept_many(10)
+    assert len(accepted) == 5
+    received = []
+    for conn, _ in accepted[:4]:
+        try:
+            received.append(conn.recv(5))
+        except ssl.SSLError:
+            received.append(None)
+        conn.close()
+    assert received == [b'hello', b'hello', None, b'hello'], received
+    accepted[4][0].close()
+    for thread in handshaking:
+        thread.wait()
+    for sock in good + [bad, silent, listener]:
+        sock.close()
+
+
+def test_ultra_tls_session_resumption():
+    server_ctx = convenience.server_ssl_context(tests.certificate_file, tests.private_key_file)
+    client_ctx = _ultra_tls_contexts()[1]
+    listener = _ultra_tls_listener(server_ctx)
+    addr = listener.getsockname()
+
+    def serve():
+        for _ in range(2):
+            conn, _ = listener.accept()
+            conn.sendall(b'x')
+            conn.recv(1)
+            conn.close()
+    serving = eventlet.spawn(serve)
+    session = None
+    reused = []
+    for _ in range(2):
+        client = _ultra_client(addr)
+        client.ssl_wrap(client_ctx, session=session)
+        # TLS 1.3 tickets come after the handshake
+        assert client.recv(1) == b'x'
+        session = client.session
+        reused.append(client.session_reused)
+        client.sendall(b'y')
+        client.close()
+    serving.wait()
+    assert reused == [False, True]
+    listener.close()
+
+
+def test_accept_many():
+    from eventlet.greenio.ultra import UltraGreenSocket
+    from eventlet.hubs import notify_opened
+    for ultra in (False, True):
+        if ultra:
+            raw = _orig_sock.socket()
+            notify_opened(raw.fileno())
+            listener = UltraGreenSocket(fd=raw)
+        else:
+            listener = socket.socket()
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(50)
+        addr = listener.getsockname()
+        clients = [socket.create_connection(addr) for _ in range(5)]
+        eventlet.sleep(0.01)
+        first = listener.accept_many(3)
+        rest = listener.accept_many(10)
+        assert (len(first), len(rest)) == (3, 2)
+        for client in clients:
+            client.close()
+        # waits for the first connection
+        eventlet.spawn_after(0.02, socket.create_connection, addr)
+        accepted = listener.accept_many(10)
+        assert len(accepted) == 1
+        for conn, _ in first + rest + accepted:
+            assert type(conn) is type(listener)
+            conn.close()
+        listener.close()
+
+
+def test_green_os_sendfile():
+    from eventlet.green import os as green_os
+    payload, f = _sendfile_payload(1 << 20)
+    with f:
+        a, b = socket.socketpair()
+        result = []
+        reader = eventlet.spawn(_read_all, b, result)
+        sent = 0
+        while sent < len(payload):
+            sent += green_os.sendfile(a.fileno(), f.fileno(), sent, len(payload) - sent)
+        a.close()
+        reader.wait()
+        assert b''.join(result) == payload
+
+
 def test_partial_write_295():
     # https://github.com/eventlet/eventlet/issues/295
     # `socket.makefile('w').writelines()` must send all
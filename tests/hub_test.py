@@ -109,6 +109,32 @@ class TestScheduleCall(tests.LimitedTestCase):
             eventlet.sleep(DELAY)
         self.assertEqual(lst, [1, 2, 3])
 
+    def test_call_soon(self):
+        lst = []
+        hub = hubs.get_hub()
+        hub.call_soon(lst.append, 1)
+        hub.call_soon(lst.append, 0).cancel()
+        hub.call_soon(lst.append, 2)
+        eventlet.sleep(0)
+        self.assertEqual(lst, [1, 2])
+
+    def test_call_soon_batch(self):
+        # callbacks added while running wait for the next run of the loop
+        lst = []
+        hub = hubs.get_hub()
+
+        def again():
+            lst.append(1)
+            hub.call_soon(again)
+        hub.call_soon(again)
+        eventlet.sleep(0)
+        eventlet.sleep(0)
+        assert 1 <= len(lst) <= 2, lst
+        del lst[:]
+        eventlet.sleep(DELAY)
+        assert lst, lst
+        hub.ready.clear()
+
 
 class TestDebug(tests.LimitedTestCase):
 
@@ -305,6 +331,42 @@ def test_fork_simple():
     tests.run_isolated('hub_fork_simple.py')
 
 
+def test_timerfd_single():
+    tests.run_isolated('hub_timerfd_single.py')
+
+
+def test_timer_wheel():
+    tests.run_isolated('hub_timer_wheel.py')
+
+
+def test_epoll_edge():
+    tests.run_isolated('hub_epoll_edge.py')
+
+
+def test_iouring():
+    tests.run_isolated('hub_iouring.py')
+
+
+def test_per_thread():
+    tests.run_isolated('hub_per_thread.py')
+
+
+def test_call_soon_threadsafe():
+    tests.run_isolated('hub_call_soon_threadsafe.py')
+
+
+def test_busy_poll():
+    tests.run_isolated('hub_busy_poll.py')
+
+
+def test_threaded_handoff():
+    tests.run_isolated('hub_threaded_handoff.py')
+
+
+def test_fd_table():
+    tests.run_isolated('hub_fd_table.py')
+
+
 class TestDeadRunLoop(tests.LimitedTestCase):
     TEST_TIMEOUT = 2
 
@@ -401,3 +463,7 @@ print('ok')
         self.write_to_tempfile('newmod', module_source)
         output, _ = self.launch_subprocess('newmod.py')
         self.assertEqual(output, 'kqueue tried\nok\n')
+
+
+def test_threaded_handoff_stop():
+    tests.run_isolated('hub_threaded_handoff_stop.py')
@@ -0,0 +1,72 @@
+__test__ = False
+
+if __name__ == '__main__':
+    import eventlet
+    from eventlet import hubs
+    from eventlet.hubs.busy_poll import BusyPoll, GROW_BUDGET
+    threading = eventlet.patcher.original('threading')
+    time = eventlet.patcher.original('time')
+
+    try:
+        BusyPoll(time.time, -1)
+        assert False, 'expected ValueError'
+    except ValueError:
+        pass
+
+    # the budget adapts to the idle time of the blocking waits
+    bp = BusyPoll(time.time, 0.0001)
+    bp.adapt(0.5)
+    assert bp.budget == 0.00005, bp.budget
+    while bp.budget:
+        bp.adapt(0.5)
+    bp.adapt(0.00005)
+    assert bp.budget == GROW_BUDGET, bp.budget
+    for _ in range(10):
+        bp.adapt(0.00005)
+    assert bp.budget == 0.0001, bp.budget
+
+    # a spin catches the events, spun no longer than the timeout
+    results = iter([[], [], [(3, 1)]])
+    assert bp.poll(lambda timeout: next(results)) == [(3, 1)]
+    stats = bp.stats()
+    assert stats['spins'] == 1 and stats['hits'] == 1 and stats['blocks'] == 0, stats
+    timeouts = []
+
+    def poll(timeout):
+        timeouts.append(timeout)
+        return []
+    bp.budget = 1.0
+    assert bp.poll(poll, 0.01) == []
+    assert timeouts[-1] == 0 and bp.stats()['blocks'] == 1, timeouts[-1]
+    assert bp.poll(poll, 0) == [] and timeouts[-1] == 0
+
+    for hub_name in ('v1_epolls_linuxfd', 'standalone_epolls'):
+        hubs.use_hub(hub_name)
+        assert hubs.get_hub().busy_poll is None
+        hubs.use_hub(hub_name, busy_poll=0.0002)
+        hub = hubs.get_hub()
+        assert hub.busy_poll.max_budget == 0.0002
+
+        # events from another thread, timers and the cross-thread calls wake the spinning hub
+        a, b = eventlet.green.socket.socketpair()
+
+        def peer():
+            for _ in range(100):
+                time.sleep(0.0001)
+                b.fd.sendall(b'x')
+            hub.call_soon_threadsafe(lambda: None)
+        t = threading.Thread(target=peer)
+        t.start()
+        n = 0
+        while n < 100:
+            n += len(a.recv(100))
+        t.join()
+        start = time.time()
+        eventlet.sleep(0.01)
+        assert time.time() - start >= 0.01
+        stats = hub.busy_poll.stats()
+        assert stats['spins'] and stats['hits'] <= stats['spins'], stats
+        assert stats['blocks'] >= stats['spins'] - stats['hits'], stats
+        a.close()
+        b.close()
+    print('pass')
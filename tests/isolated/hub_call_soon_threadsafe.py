@@ -0,0 +1,57 @@
+__test__ = False
+
+if __name__ == '__main__':
+    import eventlet
+    from eventlet import hubs
+    threading = eventlet.patcher.original('threading')
+
+    hub = hubs.get_hub()
+    wakeups = []
+    hub_class = type(hub)
+    wakeup = hub_class.wakeup
+
+    def counted_wakeup(self):
+        wakeups.append(1)
+        wakeup(self)
+    hub_class.wakeup = counted_wakeup
+
+    N = 10000
+    done = []
+    finished = eventlet.event.Event()
+
+    def producer():
+        for i in range(N):
+            hub.call_soon_threadsafe(done.append, i)
+        hub.call_soon_threadsafe(finished.send, True)
+
+    eventlet.sleep(0)  # the hub runs, the wakeup channel is open
+    t = threading.Thread(target=producer)
+    t.start()
+    with eventlet.Timeout(10):
+        finished.wait()
+    t.join()
+    assert done == list(range(N)), len(done)
+    # a burst is coalesced, one wakeup until the hub takes it
+    assert 0 < len(wakeups) < N, len(wakeups)
+
+    # the calls made from the hub's own thread do not need the channel
+    lst = []
+    hub.call_soon_threadsafe(lst.append, 1)
+    eventlet.sleep(0)
+    assert lst == [1]
+
+    # a sleeping hub is woken up
+    results = []
+
+    def late():
+        eventlet.patcher.original('time').sleep(0.05)
+        hub.call_soon_threadsafe(results.append, 'late')
+    t = threading.Thread(target=late)
+    t.start()
+    with eventlet.Timeout(5):
+        while not results:
+            eventlet.sleep(0.01)
+    t.join()
+    assert results == ['late']
+    hub_class.wakeup = wakeup
+    print('pass')
@@ -0,0 +1,77 @@
+__test__ = False
+
+if __name__ == '__main__':
+    import eventlet
+    from eventlet import hubs
+    from eventlet.green import select, socket
+
+    hubs.use_hub('v1_epolls_linuxfd', epoll_mode='edge')
+    hub = hubs.get_hub()
+    assert hub.edge_triggered
+
+    def echo(sock):
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            sock.sendall(data)
+        sock.close()
+
+    def serve(server):
+        while True:
+            sock, _ = server.accept()
+            eventlet.spawn(echo, sock)
+
+    server = eventlet.listen(('127.0.0.1', 0))
+    eventlet.spawn(serve, server)
+    client = eventlet.connect(server.getsockname())
+
+    # small and large writes, with partial reads & writes
+    for size in (1, 100, 65536, 4 << 20):
+        data = b'x' * size
+        eventlet.spawn(client.sendall, data)
+        got = []
+        n = 0
+        while n < size:
+            chunk = client.recv(size - n)
+            assert chunk
+            got.append(chunk)
+            n += len(chunk)
+        assert b''.join(got) == data, size
+
+    # the registration is kept without listeners
+    assert client.fileno() in hub.fds
+
+    # select reports readiness known before it was called
+    client.sendall(b'y')
+    eventlet.sleep(0.05)
+    rs, ws, _ = select.select([client], [], [], 1)
+    assert rs == [client], rs
+    assert client.recv(1) == b'y'
+
+    # a fileno above FD_SETSIZE
+    import os
+    import resource
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or hard > 1200:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (max(soft, 1200), hard))
+        high = os.dup2(client.fileno(), 1100)
+        client.sendall(b'z')
+        eventlet.sleep(0.05)
+        rs, ws, _ = select.select([high], [high], [], 1)
+        assert rs == [high] and ws == [high], (rs, ws)
+        assert client.recv(1) == b'z'
+        os.close(high)
+
+    # a timeout when nothing becomes ready
+    client.settimeout(0.05)
+    try:
+        client.recv(1)
+    except socket.timeout:
+        pass
+    else:
+        assert False, 'expected timeout'
+
+    client.close()
+    server.close()
+    print('pass')
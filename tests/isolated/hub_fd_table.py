@@ -0,0 +1,57 @@
+__test__ = False
+
+if __name__ == '__main__':
+    import eventlet
+    import eventlet.debug
+    from eventlet import hubs
+    from eventlet.green import socket
+    from eventlet.hubs.v1_skeleton import FdListener, FdTable
+
+    def noop(fileno):
+        pass
+
+    fds = FdTable(size=4)
+    r1, r2, r3 = [FdListener(0, 9, noop, noop, None) for _ in range(3)]
+    w = FdListener(1, 9, noop, noop, None)
+    assert 9 not in fds and 'x' not in fds and -1 not in fds
+    assert fds.add(9, r1, True, True)
+    assert 9 in fds and len(fds) == 1 and len(fds.rs) >= 10
+    assert not fds.add(9, w, False, True)
+    try:
+        fds.add(9, r2, True, True)
+        assert False, 'expected RuntimeError'
+    except RuntimeError:
+        pass
+    # the secondary readers overflow, a removed primary is replaced by the first
+    fds.add(9, r2, True, False)
+    fds.add(9, r3, True, False)
+    assert fds.rs[9] is r1 and fds.readers(9) == [r1, r2, r3]
+    assert fds.remove(9, r2, True) and fds.readers(9) == [r1, r3]
+    assert fds.remove(9, r1, True) and fds.rs[9] is r3 and 9 not in fds.overflow
+    assert not fds.remove(9, r1, True)
+    # close returns the listeners, the fileno is kept stale until cleared
+    assert fds.close(9) == [r3, w] and 9 not in fds and len(fds) == 0
+    assert 9 in fds.stale and fds.close(9) is None
+    assert fds.rs[9] is None and fds.ws[9] is None and fds.filenos() == []
+
+    for hub_name in ('v1_epolls_linuxfd', 'v1_epolls_linuxfd_one_map'):
+        hubs.use_hub(hub_name)
+        hub = hubs.get_hub()
+        eventlet.debug.hub_prevent_multiple_readers(False)
+        a, b = socket.socketpair()
+        got = []
+
+        def reader(i):
+            got.append((i, a.recv(1)))
+        gts = [eventlet.spawn(reader, i) for i in range(3)]
+        eventlet.sleep(0)
+        assert len(hub.fds.readers(a.fileno())) == 3
+        for _ in range(3):
+            b.sendall(b'x')
+            eventlet.sleep(0.01)
+        assert sorted(got) == [(0, b'x'), (1, b'x'), (2, b'x')], got
+        assert not hub.fds.readers(a.fileno()) and not hub.fds.overflow
+        eventlet.debug.hub_prevent_multiple_readers(True)
+        a.close()
+        b.close()
+    print('pass')
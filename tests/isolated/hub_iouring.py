@@ -0,0 +1,89 @@
+__test__ = False
+
+if __name__ == '__main__':
+    import eventlet
+    from eventlet import hubs
+    from eventlet.green import socket
+    from eventlet.greenio.ultra import UltraGreenSocket
+    from eventlet.hubs import iouring
+
+    if not iouring.is_available():
+        print('pass')
+        raise SystemExit()
+
+    hubs.use_hub('iouring')
+    hub = hubs.get_hub()
+    assert hub.completion_io
+    orig_socket = eventlet.patcher.original('socket')
+
+    def echo(sock):
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            sock.sendall(data)
+        sock.close()
+
+    def serve(server):
+        while True:
+            sock, _ = server.accept()
+            eventlet.spawn(echo, sock)
+
+    server = eventlet.listen(('127.0.0.1', 0))
+    eventlet.spawn(serve, server)
+    addr = server.getsockname()
+
+    # green sockets, polls for readiness, small and large writes
+    client = eventlet.connect(addr)
+    for size in (1, 100, 65536, 4 << 20):
+        data = b'x' * size
+        eventlet.spawn(client.sendall, data)
+        got = []
+        n = 0
+        while n < size:
+            chunk = client.recv(size - n)
+            assert chunk
+            got.append(chunk)
+            n += len(chunk)
+        assert b''.join(got) == data, size
+    client.close()
+
+    # ultra green sockets, recv_into & sendall completed by io_uring
+    client = UltraGreenSocket(orig_socket.AF_INET, orig_socket.SOCK_STREAM)
+    client.connect(addr)
+    buff = bytearray(65536)
+    for size in (1, 100, 65536, 4 << 20):
+        data = b'y' * size
+        eventlet.spawn(client.sendall, data)
+        n = 0
+        while n < size:
+            got = client.recv_into(buff)
+            assert got and buff[:got] == data[:got]
+            n += got
+        assert n == size, size
+
+    # a timeout cancels the recv
+    client.settimeout(0.05)
+    try:
+        client.recv_into(buff)
+    except socket.timeout:
+        pass
+    else:
+        assert False, 'expected timeout'
+    assert not [op for op in hub.ops.values() if op[0] is not None], hub.ops
+    client.settimeout(None)
+    client.sendall(b'z')
+    assert client.recv_into(buff) == 1 and buff[:1] == b'z'
+
+    # the peer closing ends the recv
+    client.shutdown(orig_socket.SHUT_WR)
+    assert client.recv_into(buff) == 0
+    client.close()
+
+    # timers
+    start = hub.clock()
+    eventlet.sleep(0.05)
+    assert 0.045 < hub.clock() - start < 0.5
+
+    server.close()
+    print('pass')
@@ -0,0 +1,71 @@
+__test__ = False
+
+if __name__ == '__main__':
+    import eventlet
+    from eventlet import hubs
+    threading = eventlet.patcher.original('threading')
+
+    shared = hubs.get_hub()
+    hubs.use_hub(per_thread=True)
+    main_hub = hubs.get_hub()
+    assert main_hub is not shared
+    assert hubs.active_hub.inst is main_hub
+
+    results = {}
+
+    def worker(n):
+        hub = hubs.get_hub()
+        assert hubs.active_hub.inst is hub
+        done = []
+        gts = [eventlet.spawn(lambda i: (eventlet.sleep(0.01), done.append(i)), i) for i in range(10)]
+        for gt in gts:
+            gt.wait()
+        assert sorted(done) == list(range(10))
+        results[n] = hub
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    eventlet.sleep(0.01)  # the main thread's hub runs meanwhile
+    for t in threads:
+        t.join()
+    hubs_seen = set(id(h) for h in results.values())
+    assert len(hubs_seen) == 4, results
+    assert id(main_hub) not in hubs_seen
+    assert hubs.get_hub() is main_hub
+
+    # use_hub in a thread replaces only its hub
+    def replace():
+        hubs.use_hub('v1_epolls')
+        results['replaced'] = hubs.get_hub()
+    t = threading.Thread(target=replace)
+    t.start()
+    t.join()
+    assert type(results['replaced']).__module__ == 'eventlet.hubs.v1_epolls'
+    assert hubs.get_hub() is main_hub
+
+    # a thread without its hub fails, not a hub of another object
+    def missing():
+        del hubs.HubHolder.thread_hubs.hub
+        try:
+            hubs.active_hub.inst
+        except AttributeError:
+            results['missing'] = True
+    t = threading.Thread(target=missing)
+    t.start()
+    t.join()
+    assert results.get('missing')
+
+    # back to one hub of the process
+    hubs.use_hub(per_thread=False)
+    hub = hubs.get_hub()
+    assert hubs.active_hub.inst is hub and hub is not main_hub
+
+    def check():
+        results['shared'] = hubs.get_hub()
+    t = threading.Thread(target=check)
+    t.start()
+    t.join()
+    assert results['shared'] is hub
+    eventlet.sleep(0)
+    print('pass')
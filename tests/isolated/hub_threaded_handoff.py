@@ -0,0 +1,37 @@
+__test__ = False
+
+if __name__ == '__main__':
+    import eventlet
+    from eventlet import hubs
+    from eventlet.green import socket
+
+    hubs.use_hub('v1_epolls_threaded')
+    hub = hubs.get_hub()
+
+    def echo(sock):
+        while True:
+            data = sock.recv(64)
+            if not data:
+                break
+            sock.sendall(data)
+        sock.close()
+
+    def client(sock):
+        for i in range(20):
+            sock.sendall(b'%d' % i)
+            assert sock.recv(64) == b'%d' % i
+            eventlet.sleep(0)
+        sock.close()
+
+    # batches of many sockets' events, each handed over once the previous is consumed
+    with eventlet.Timeout(30):
+        pool = eventlet.GreenPool()
+        for _ in range(200):
+            a, b = socket.socketpair()
+            pool.spawn(echo, b)
+            pool.spawn(client, a)
+        pool.waitall()
+        eventlet.sleep(0.01)
+    assert not hub.handoff.pending
+    assert not hub.listeners_events
+    print('pass')
@@ -0,0 +1,70 @@
+__test__ = False
+
+if __name__ == '__main__':
+    import os
+
+    import eventlet
+    from eventlet import hubs
+    from eventlet.green import socket
+    from eventlet.hubs.batch_handoff import BatchHandoff
+
+    orig_threading = eventlet.patcher.original('threading')
+
+    # a waiter blocked at post is released when the hub stops, later posts return at once
+    handoff = BatchHandoff()
+    waiter = orig_threading.Thread(target=handoff.post)
+    waiter.start()
+    while not handoff.pending:
+        eventlet.patcher.original('time').sleep(0.01)
+    handoff.stop()
+    waiter.join(5)
+    assert not waiter.is_alive()
+    handoff.post()
+    assert not handoff.pending
+    fds = [handoff.ready.fileno(), handoff.consumed_fileno]
+    handoff.close()
+    for fd in fds:
+        try:
+            os.fstat(fd)
+        except OSError:
+            pass
+        else:
+            assert False, 'fd {0} not closed'.format(fd)
+
+    hubs.use_hub('v1_epolls_threaded')
+    hub = hubs.get_hub()
+
+    def ping():
+        a, b = socket.socketpair()
+        a.sendall(b'x')
+        assert b.recv(1) == b'x'
+        a.close()
+        b.close()
+
+    with eventlet.Timeout(10):
+        ping()
+        eventlet.sleep(0)
+        first = hub.handoff
+        waiter = hub.events_waiter
+        assert first is not None
+        # a reader registered at the hub's epoll, woken after the stop
+        a, b = socket.socketpair()
+        eventlet.spawn_n(b.recv, 1)
+        eventlet.sleep(0)
+        # the loop waits up to the next timer before it sees stopping
+        hub.abort()
+        hub.wakeup()
+        hub.switch()
+    assert hub.handoff is None
+    assert first.stopping and not first.pending
+    a.fd.send(b'x')
+    # the waiter exits at its poll result and closes the handoff
+    waiter.join(5)
+    assert not waiter.is_alive()
+    try:
+        os.fstat(first.consumed_fileno)
+    except OSError:
+        pass
+    else:
+        assert False, 'handoff not closed'
+    print('pass')
@@ -0,0 +1,46 @@
+__test__ = False
+
+if __name__ == '__main__':
+    import eventlet
+    from eventlet import hubs
+
+    hubs.use_hub('v1_poll', timer_backend='wheel')
+    hub = hubs.get_hub()
+    assert hub.timer_wheel is not None
+
+    lst = []
+    hub.schedule_call_global(0.02, lst.append, 3)
+    hub.schedule_call_global(0.01, lst.append, 1)
+    hub.schedule_call_global(0.005, lst.append, 0).cancel()
+    hub.schedule_call_global(0.01, lst.append, 2)
+    hub.schedule_call_global(0, lst.append, 0.5)
+    eventlet.sleep(0.05)
+    assert lst == [0.5, 1, 2, 3], lst
+
+    # timers beyond the first level are cascaded down on time
+    del lst[:]
+    hub.schedule_call_global(0.3, lst.append, 2)
+    hub.schedule_call_global(0.1, lst.append, 1)
+    eventlet.sleep(0.2)
+    assert lst == [1], lst
+    eventlet.sleep(0.15)
+    assert lst == [1, 2], lst
+
+    # canceled timers are cleaned out of the wheel
+    timers = [hub.schedule_call_global(60, lst.append, 4) for _ in range(3000)]
+    assert hub.get_timers_count() == 3000, hub.get_timers_count()
+    for t in timers:
+        t.cancel()
+    assert hub.get_timers_count() <= 1000, hub.get_timers_count()
+
+    with eventlet.Timeout(0.01, False):
+        eventlet.sleep(1)
+        assert False, 'expected timeout'
+
+    try:
+        hubs.use_hub('v1_poll', timer_backend='list')
+    except ValueError:
+        pass
+    else:
+        assert False, 'expected ValueError'
+    print('pass')
@@ -0,0 +1,32 @@
+__test__ = False
+
+if __name__ == '__main__':
+    import eventlet
+    from eventlet import hubs
+
+    hubs.use_hub('v1_epolls_linuxfd', timerfd_mode='single')
+    hub = hubs.get_hub()
+
+    lst = []
+    hub.schedule_call_global(0.02, lst.append, 3)
+    hub.schedule_call_global(0.01, lst.append, 1)
+    hub.schedule_call_global(0.005, lst.append, 0).cancel()
+    hub.schedule_call_global(0.01, lst.append, 2)
+    eventlet.sleep(0.05)
+    assert lst == [1, 2, 3], lst
+
+    # pending timers share the one timerfd
+    fds = len(hub.fds)
+    timers = [hub.schedule_call_global(60, lst.append, 4) for _ in range(3000)]
+    assert len(hub.fds) == fds, (fds, len(hub.fds))
+
+    # canceled timers are cleaned out of the heap
+    for t in timers:
+        t.cancel()
+    assert hub.get_timers_count() <= 1000, hub.get_timers_count()
+    assert hub.timers_canceled <= hub.get_timers_count()
+
+    with eventlet.Timeout(0.01, False):
+        eventlet.sleep(1)
+        assert False, 'expected timeout'
+    print('pass')
@@ -0,0 +1,35 @@
+__test__ = False
+
+if __name__ == '__main__':
+    import eventlet
+    eventlet.monkey_patch()
+    from eventlet import pools
+
+    server = eventlet.listen(('127.0.0.1', 0))
+    port = server.getsockname()[1]
+    accepted = []
+
+    def accept():
+        while True:
+            accepted.append(server.accept()[0])
+    eventlet.spawn(accept)
+
+    pool = pools.SocketPool(max_size=2, max_idle=None, max_age=None)
+    with pool.item('127.0.0.1', port) as sock:
+        first = sock
+    # the checkout peek neither blocks nor yields on an idle socket
+    with eventlet.Timeout(1):
+        with pool.item('127.0.0.1', port) as sock:
+            assert sock is first
+    # a socket closed by the peer is stale
+    eventlet.sleep(0.01)
+    accepted[0].close()
+    eventlet.sleep(0.01)
+    with eventlet.Timeout(1):
+        with pool.item('127.0.0.1', port) as sock:
+            assert sock is not first
+    stats = pool.stats()
+    assert (stats['hits'], stats['stale']) == (1, 1), stats
+    pool.clear()
+    server.close()
+    print('pass')
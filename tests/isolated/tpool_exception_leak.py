@@ -20,7 +20,7 @@ if __name__ == '__main__':
 
     # case 1 no exception
     assert eventlet.tpool.Proxy(a).ok() == 'ok'
-    # yield to tpool_trampoline(), otherwise e.send(rv) have a reference
+    # yield to the hub run-queue, otherwise e.send(rv) have a reference
     eventlet.sleep(0.1)
     gc.collect()
     refs = gc.get_referrers(a)
@@ -34,7 +34,7 @@ if __name__ == '__main__':
         except RequiredException:
             pass
     test_exception()
-    # yield to tpool_trampoline(), otherwise e.send(rv) have a reference
+    # yield to the hub run-queue, otherwise e.send(rv) have a reference
     eventlet.sleep(0.1)
     gc.collect()
     refs = gc.get_referrers(a)
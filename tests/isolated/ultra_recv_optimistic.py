@@ -0,0 +1,97 @@
+__test__ = False
+
+if __name__ == '__main__':
+    import eventlet
+    from eventlet import hubs
+    from eventlet.greenio import ultra
+    from eventlet.greenio.ultra import UltraGreenSocket
+    from eventlet.hubs import iouring
+
+    orig_socket = eventlet.patcher.original('socket')
+
+    trampolines = []
+    trampoline = ultra.trampoline
+
+    def counted_trampoline(*args, **kw):
+        trampolines.append(kw)
+        return trampoline(*args, **kw)
+    ultra.trampoline = counted_trampoline
+
+    def pair():
+        a, b = orig_socket.socketpair()
+        return UltraGreenSocket(fd=a), UltraGreenSocket(fd=b)
+
+    def check(hub_name):
+        hubs.use_hub(hub_name)
+        a, b = pair()
+
+        # data already received is read without a trampoline
+        b.sendall(b'queued')
+        del trampolines[:]
+        assert a.recv(6) == b'queued'
+        b.sendall(b'queued')
+        buff = bytearray(6)
+        assert a.recv_into(buff) == 6 and buff == b'queued'
+        assert not trampolines, trampolines
+
+        # nothing received, the recv trampolines once on EAGAIN
+        eventlet.spawn_after(0.01, b.sendall, b'later')
+        assert a.recv(5) == b'later'
+        assert len(trampolines) == 1, trampolines
+        assert trampolines[0].get('read'), trampolines
+
+        # the timeout is of the wait, not of the first attempt
+        a.settimeout(0.01)
+        try:
+            a.recv(1)
+        except orig_socket.timeout:
+            pass
+        else:
+            assert False, 'timeout expected'
+
+        # zero bytes to read still waits the readability, for the timeout
+        del trampolines[:]
+        try:
+            a.recv(0)
+        except orig_socket.timeout:
+            pass
+        else:
+            assert False, 'timeout expected'
+        assert len(trampolines) == 1, trampolines
+
+        # the peer closed, the data then the end of file
+        a.settimeout(None)
+        b.sendall(b'last')
+        b.close()
+        assert a.recv(10) == b'last'
+        assert a.recv(10) == b''
+        a.close()
+
+    check('v1_epolls_linuxfd')
+    check('v1_epolls')
+
+    if iouring.is_available():
+        hubs.use_hub('iouring')
+        hub = hubs.get_hub()
+        submitted = []
+        io = hub.io
+
+        def counted_io(*args):
+            submitted.append(args[0])
+            return io(*args)
+        hub.io = counted_io
+
+        a, b = pair()
+        b.sendall(b'queued')
+        buff = bytearray(6)
+        # data already received does not submit a recv operation
+        assert a.recv_into(buff) == 6 and buff == b'queued'
+        assert not submitted, submitted
+        # nothing received, the recv is completed by the hub
+        eventlet.spawn_after(0.01, b.sendall, b'later')
+        assert a.recv_into(buff) == 5 and buff[:5] == b'later'
+        assert submitted == [iouring.IORING_OP_RECV], submitted
+        a.close()
+        b.close()
+
+    print('pass')
@@ -0,0 +1,41 @@
+__test__ = False
+
+if __name__ == '__main__':
+    import struct
+
+    import eventlet
+    from eventlet import websocket, wsgi
+
+    def handle(ws):
+        ws.send(ws.wait())
+
+    server = eventlet.listen(('127.0.0.1', 0))
+    eventlet.spawn(wsgi.server, server, websocket.WebSocketWSGI(handle), log_output=False)
+
+    request = (
+        b'GET /echo HTTP/1.1\r\n'
+        b'Upgrade: websocket\r\n'
+        b'Connection: Upgrade\r\n'
+        b'Host: localhost\r\n'
+        b'Sec-WebSocket-Version: 13\r\n'
+        b'Sec-WebSocket-Key: d9MXuOzlVQ0h+qRllvSCIg==\r\n\r\n')
+    mask = b'\x01\x02\x03\x04'
+    payload = b'hello'
+    masked = bytes(bytearray(c ^ mask[i % 4] for i, c in enumerate(bytearray(payload))))
+    frame = struct.pack('!BB', 0x81, 0x80 | len(payload)) + mask + masked
+
+    sock = eventlet.connect(server.getsockname())
+    # the frame in the same segment as the handshake request, read by the server
+    # with the request, the websocket goes on with the bytes buffered by wsgi
+    sock.sendall(request + frame)
+    with eventlet.Timeout(5):
+        response = b''
+        while b'\r\n\r\n' not in response:
+            response += sock.recv(1024)
+        assert response.startswith(b'HTTP/1.1 101'), response
+        data = response.split(b'\r\n\r\n', 1)[1]
+        while len(data) < 2 + len(payload):
+            data += sock.recv(1024)
+    assert data.startswith(b'\x81' + struct.pack('!B', len(payload)) + payload), data
+    sock.close()
+    print('pass')
@@ -21,6 +21,7 @@ server / client accept() conn - ExplodingConnectionWrap
     |  |  |   (1 - many)
     V  V  V
 connection makefile() file objects - ExplodingSocketFile <-- these raise
+connection recv_into(), of the GreenStreamReader rfile <-- this raises
 """
 import socket
 
@@ -82,18 +83,37 @@ class ExplodingConnectionWrap(object):
         self.conn = conn
         self.conn._really_makefile = self.conn.makefile
         self.conn.makefile = self
+        # wsgi reads the requests with a GreenStreamReader of the connection
+        self.conn._really_recv_into = self.conn.recv_into
+        self.conn.recv_into = self.recv_into
         self.armed = False
         self.file_reg = []
 
     def unwrap(self):
         self.conn.makefile = self.conn._really_makefile
         del self.conn._really_makefile
+        self.conn.recv_into = self.conn._really_recv_into
+        del self.conn._really_recv_into
 
     def arm(self):
         output_buffer.append("tick")
+        self.armed = True
         for i in self.file_reg:
             i.arm()
 
+    def _fuse(self):
+        if self.armed:
+            output_buffer.append(TAG_BOOM)
+            raise socket.timeout("timed out")
+
+    def recv_into(self, *args, **kwargs):
+        output_buffer.append(self.__class__.__name__ + ".recv_into")
+        self._fuse()
+        n = self.conn._really_recv_into(*args, **kwargs)
+        # armed while waiting, the timeout of the wait
+        self._fuse()
+        return n
+
     def __call__(self, mode='r', bufsize=-1):
         output_buffer.append(self.__class__.__name__ + ".__call__")
         # file_obj = self.conn._really_makefile(*args, **kwargs)
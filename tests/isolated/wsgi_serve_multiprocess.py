@@ -0,0 +1,96 @@
+# eventlet.wsgi.serve_multiprocess: forked workers, restarted after a crash & at SIGHUP
+import os
+import signal
+import socket
+import time
+
+__test__ = False
+
+
+def request(port):
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.sendall(b'GET / HTTP/1.0\r\n\r\n')
+    data = b''
+    while True:
+        got = sock.recv(1024)
+        if not got:
+            break
+        data += got
+    sock.close()
+    return int(data.split(b'\r\n\r\n', 1)[1])
+
+
+def workers(port, tries=200):
+    """ The pids of the workers answering, each connection is of another source port """
+    pids = set()
+    for _ in range(tries):
+        try:
+            pids.add(request(port))
+        except socket.error:
+            time.sleep(0.05)
+    return pids
+
+
+def wait_for(port, check, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        pids = workers(port, 40)
+        if check(pids):
+            return pids
+        time.sleep(0.1)
+    raise AssertionError('workers {0} after {1}s'.format(pids, timeout))
+
+
+if __name__ == '__main__':
+    import eventlet
+    from eventlet import wsgi
+
+    def app(environ, start_response):
+        if environ['PATH_INFO'] == '/slow':
+            eventlet.sleep(0.5)
+        start_response('200 OK', [])
+        return [str(os.getpid()).encode()]
+
+    for reuse_port in (True, False):
+        probe = socket.socket()
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+        probe.close()
+
+        supervisor = os.fork()
+        if supervisor == 0:
+            wsgi.serve_multiprocess(app, ('127.0.0.1', port), workers=2, reuse_port=reuse_port,
+                                    graceful_timeout=5, restart_delay=0, log_output=False)
+            os._exit(0)
+
+        first = wait_for(port, lambda pids: len(pids) == 2)
+        assert supervisor not in first
+
+        # a crashed worker is started again
+        crashed = min(first)
+        os.kill(crashed, signal.SIGKILL)
+        wait_for(port, lambda pids: len(pids) == 2 and crashed not in pids)
+
+        # rolling restart, all the workers are replaced
+        before = wait_for(port, lambda pids: len(pids) == 2)
+        os.kill(supervisor, signal.SIGHUP)
+        wait_for(port, lambda pids: len(pids) == 2 and not pids & before)
+
+        # the requests in progress are finished
+        slow = socket.create_connection(('127.0.0.1', port))
+        slow.sendall(b'GET /slow HTTP/1.0\r\n\r\n')
+        time.sleep(0.1)
+        os.kill(supervisor, signal.SIGTERM)
+        got = slow.recv(1024)
+        assert got.startswith(b"HTTP/1.1 200 OK"), got
+        slow.close()
+        pid, status = os.waitpid(supervisor, 0)
+        assert status == 0, status
+        try:
+            request(port)
+        except socket.error:
+            pass
+        else:
+            assert False, 'served after the supervisor exited'
+
+    print('pass')
@@ -5,6 +5,7 @@ from eventlet import Queue
 from eventlet import hubs
 from eventlet import pools
 import six
+import tests
 
 
 class IntPool(pools.Pool):
@@ -248,5 +249,108 @@ SOMETIMES = RuntimeError('I fail half the time')
 class TestTookTooLong(Exception):
     pass
 
+
+class TestSocketPool(TestCase):
+    mode = 'static'
+
+    def setUp(self):
+        self.server = eventlet.listen(('127.0.0.1', 0))
+        self.port = self.server.getsockname()[1]
+        self.accepted = []
+        self.acceptor = eventlet.spawn(self.accept)
+        self.pool = pools.SocketPool(max_size=2, max_idle=None, max_age=None)
+
+    def tearDown(self):
+        self.pool.clear()
+        self.acceptor.kill()
+        self.server.close()
+        for conn in self.accepted:
+            conn.close()
+
+    def accept(self):
+        while True:
+            conn, _ = self.server.accept()
+            self.accepted.append(conn)
+
+    def test_reuse(self):
+        with self.pool.item('127.0.0.1', self.port) as sock:
+            first = sock
+        with self.pool.item('127.0.0.1', self.port) as sock:
+            assert sock is first
+        stats = self.pool.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['free']), (1, 1, 1))
+
+    def test_discard_on_error(self):
+        try:
+            with self.pool.item('127.0.0.1', self.port) as sock:
+                raise RuntimeError()
+        except RuntimeError:
+            pass
+        assert sock.fileno() == -1
+        self.assertEqual(self.pool.stats()['size'], 0)
+
+    def test_stale_at_checkout(self):
+        with self.pool.item('127.0.0.1', self.port) as sock:
+            first = sock
+        eventlet.sleep(0.01)
+        self.accepted[0].close()
+        eventlet.sleep(0.01)
+        with self.pool.item('127.0.0.1', self.port) as sock:
+            assert sock is not first
+        # unread data of a plain socket makes it stale
+        eventlet.sleep(0.01)
+        self.accepted[1].sendall(b'junk')
+        eventlet.sleep(0.01)
+        with self.pool.item('127.0.0.1', self.port) as sock:
+            assert sock.fileno() != -1
+        stats = self.pool.stats()
+        self.assertEqual((stats['stale'], stats['misses'], stats['size']), (2, 3, 1))
+
+    def test_max_size_waits(self):
+        one = self.pool.get('127.0.0.1', self.port)
+        two = self.pool.get('127.0.0.1', self.port)
+        self.assertEqual(self.pool.free('127.0.0.1', self.port), 0)
+
+        def release():
+            eventlet.sleep(0.05)
+            self.pool.put(one)
+        eventlet.spawn(release)
+        assert self.pool.get('127.0.0.1', self.port) is one
+        # a discarded socket lets the waiter connect a new one
+        eventlet.spawn(self.pool.put, two, True)
+        three = self.pool.get('127.0.0.1', self.port)
+        assert three is not two and two.fileno() == -1
+        stats = self.pool.stats()
+        self.assertEqual((stats['waits'], stats['size']), (2, 2))
+        assert 0.04 < stats['max_wait_time'] <= stats['wait_time']
+        # another key is not limited by the first
+        with self.pool.item('localhost', self.port):
+            pass
+        self.assertEqual(self.pool.stats()['keys'], 2)
+
+    def test_idle_eviction_one_timer(self):
+        self.pool = pools.SocketPool(max_size=4, min_size=3, max_idle=0.05, max_age=None)
+        hub = hubs.get_hub()
+        timers = hub.get_timers_count()
+        self.pool.warm('127.0.0.1', self.port)
+        self.assertEqual(self.pool.free('127.0.0.1', self.port), 3)
+        self.assertEqual(hub.get_timers_count(), timers + 1)
+        eventlet.sleep(0.1)
+        stats = self.pool.stats()
+        self.assertEqual((stats['evictions'], stats['size'], stats['keys']), (3, 0, 0))
+
+    def test_max_age(self):
+        self.pool = pools.SocketPool(max_size=2, max_idle=None, max_age=0.02)
+        sock = self.pool.get('127.0.0.1', self.port)
+        eventlet.sleep(0.03)
+        self.pool.put(sock)
+        assert sock.fileno() == -1
+        self.assertEqual(self.pool.stats()['size'], 0)
+
+
+def test_socket_pool_monkey_patched():
+    tests.run_isolated('pools_socket_pool_patched.py')
+
+
 if __name__ == '__main__':
     main()
@@ -23,6 +23,7 @@ from eventlet.green import ssl
 from eventlet.support import bytes_to_str
 import six
 import tests
+import tests.mock as mock
 
 
 certificate_file = os.path.join(os.path.dirname(__file__), 'test_server.crt')
@@ -276,6 +277,20 @@ class TestHttpd(_TestBase):
         assert result.startswith(b'HTTP'), result
         assert result.endswith(b'hello world'), result
 
+    def test_001_accept_batch(self):
+        # the backlog drained in batches of accept_batch
+        listener = eventlet.listen(('localhost', 0))
+        clients = [eventlet.connect(listener.getsockname()) for _ in range(5)]
+        stats = eventlet.convenience.AcceptStats()
+        self.spawn_server(sock=listener, accept_batch=4, accept_stats=stats)
+        for sock in clients:
+            sock.sendall(b'GET / HTTP/1.0\r\nHost: localhost\r\n\r\n')
+        for sock in clients:
+            assert recvall(sock).endswith(b'hello world')
+        result = stats.stats()
+        assert result['accepted'] == 5 and result['batches'] == 2, result
+        assert result['max_depth'] == 4 and result['full_batches'] == 1, result
+
     def test_002_keepalive(self):
         sock = eventlet.connect(self.server_addr)
 
@@ -1091,6 +1106,119 @@ class TestHttpd(_TestBase):
         read_http(sock)
         sock.close()
 
+    def test_027_response_single_send(self):
+        # the status line, the headers and the body of a sendmsg
+        sends = []
+        sendmsg_all = greenio.GreenSocket.sendmsg_all
+
+        def counted(sock, buffers, flags=0):
+            sends.append(list(buffers))
+            return sendmsg_all(sock, buffers, flags)
+
+        def wsgi_app(environ, start_response):
+            start_response('200 OK', [('content-type', 'application/json'), ('x-REQUEST-id', '7')])
+            return [b'{"ok": true}']
+        self.site.application = wsgi_app
+        with mock.patch.object(greenio.GreenSocket, 'sendmsg_all', counted):
+            sock = eventlet.connect(self.server_addr)
+            sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            result = read_http(sock)
+        assert result.body == b'{"ok": true}'
+        assert result.headers_original['Content-Type'] == 'application/json'
+        assert result.headers_original['X-Request-Id'] == '7'
+        assert 'Date' in result.headers_original
+        assert len(sends) == 1 and len(sends[0]) == 2, sends
+
+    def test_027_chunked_framing(self):
+        # chunks of buffers framed as they are
+        def wsgi_app(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return iter([b'abc', bytearray(b'defgh'), b'i' * 300])
+        self.spawn_server(site=wsgi_app, minimum_chunk_size=1)
+        sock = eventlet.connect(self.server_addr)
+        sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n')
+        result = read_http(sock)
+        assert result.headers_lower['transfer-encoding'] == 'chunked'
+        assert result.body == b'3\r\nabc\r\n5\r\ndefgh\r\n12c\r\n' + b'i' * 300 + b'\r\n0\r\n\r\n'
+        sock.close()
+
+    def test_027_keepalive_timeout(self):
+        self.spawn_server(keepalive_timeout=0.1)
+        sock = eventlet.connect(self.server_addr)
+        for _ in range(3):
+            # active within the timeout
+            eventlet.sleep(0.02)
+            sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            assert read_http(sock).body == b'hello world'
+        eventlet.sleep(0.3)
+        with eventlet.Timeout(1):
+            assert sock.recv(1) == b''
+
+    def test_027_header_timeout(self):
+        self.spawn_server(header_timeout=0.1)
+        # a trickle of the head
+        slow = eventlet.connect(self.server_addr)
+        slow.sendall(b'GET / HTTP/1.1\r\n')
+        eventlet.sleep(0.05)
+        slow.sendall(b'Host: localhost\r\n')
+        # nothing sent
+        silent = eventlet.connect(self.server_addr)
+        with eventlet.Timeout(1):
+            assert slow.recv(1) == b''
+            assert silent.recv(1) == b''
+        # a prompt head, then idle without a keepalive_timeout
+        sock = eventlet.connect(self.server_addr)
+        sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        assert read_http(sock).body == b'hello world'
+        eventlet.sleep(0.2)
+        sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        assert read_http(sock).body == b'hello world'
+
+    def test_027_evict_idle(self):
+        pool = eventlet.GreenPool(2)
+        self.spawn_server(custom_pool=pool, evict_idle=True)
+        idle = []
+        for _ in range(2):
+            sock = eventlet.connect(self.server_addr)
+            sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            read_http(sock)
+            idle.append(sock)
+            eventlet.sleep(0.01)
+        # the second one active again
+        idle[1].sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        read_http(idle[1])
+        sock = eventlet.connect(self.server_addr)
+        sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        with eventlet.Timeout(1):
+            assert read_http(sock).body == b'hello world'
+            # the least recently active was closed
+            assert idle[0].recv(1) == b''
+        idle[1].sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        assert read_http(idle[1]).body == b'hello world'
+
+    def test_027_connection_timeouts(self):
+        # the deadlines of one timer, the least recently active idle connection evicted
+        timeouts = wsgi.ConnectionTimeouts(keepalive_timeout=0.05, header_timeout=0.1)
+        pairs = [greensocket.socketpair() for _ in range(3)]
+        conns = [[i, a, wsgi.STATE_IDLE] for i, (a, _b) in enumerate(pairs)]
+        timeouts.set_idle(conns[0])
+        timeouts.set_idle(conns[1])
+        timeouts.set_reading(conns[2])
+        timeouts.set_idle(conns[0])
+        assert list(timeouts.idle) == [id(conns[1]), id(conns[0])]
+        assert timeouts.evict()
+        assert timeouts.evicted == 1 and list(timeouts.idle) == [id(conns[0])]
+        assert pairs[1][1].recv(1) == b''
+        eventlet.sleep(0.07)
+        assert timeouts.expired == 1 and not timeouts.idle
+        assert list(timeouts.reading) == [id(conns[2])]
+        eventlet.sleep(0.07)
+        assert timeouts.expired == 2 and not timeouts.reading and timeouts._timer is None
+        assert not timeouts.evict()
+        for a, b in pairs:
+            a.close()
+            b.close()
+
     @tests.skip_if_no_ssl
     def test_028_ssl_handshake_errors(self):
         errored = [False]
@@ -1659,6 +1787,154 @@ class TestHttpd(_TestBase):
             assert False, self.logfile.getvalue()
 
 
+class TestHttpdFastParser(TestHttpd):
+    """TestHttpd of the requests read by the fast parser"""
+
+    def spawn_server(self, **kwargs):
+        kwargs.setdefault('parser', 'fast')
+        super(TestHttpdFastParser, self).spawn_server(**kwargs)
+
+    def test_fast_parser_environ(self):
+        # the same environ as of the stdlib parser
+        environs = []
+
+        def wsgi_app(environ, start_response):
+            environs.append(dict((k, v) for k, v in environ.items()
+                                 if k not in ('wsgi.input', 'eventlet.input', 'eventlet.set_idle',
+                                              'SERVER_PORT', 'REMOTE_PORT')))
+            start_response('200 OK', [('Content-Length', '0')])
+            return []
+
+        request = (b'POST /a%20b/c?x=1&y=2 HTTP/1.1\r\nHost: localhost\r\n'
+                   b'Content-Type: text/html\r\ncontent-length: 0\r\nX-Many: 1\r\n'
+                   b'x-many:  2 \r\nX-Folded: one\r\n\ttwo\r\nX_Under: u\r\n'
+                   b'Connection: close\r\n\r\n')
+        for parser in ('stdlib', 'fast'):
+            self.spawn_server(site=wsgi_app, parser=parser)
+            sock = eventlet.connect(self.server_addr)
+            sock.sendall(request)
+            result = read_http(sock)
+            assert result.status == 'HTTP/1.1 200 OK'
+            sock.close()
+        stdlib, fast = environs
+        assert fast['PATH_INFO'] == '/a b/c' and fast['QUERY_STRING'] == 'x=1&y=2'
+        assert fast['CONTENT_TYPE'] == 'text/html' and fast['CONTENT_LENGTH'] == '0'
+        assert fast['HTTP_X_MANY'] == '1,2' and fast['HTTP_X_UNDER'] == 'u'
+        assert 'HTTP_CONTENT_TYPE' not in fast
+        stdlib_folded = stdlib.pop('HTTP_X_FOLDED')
+        assert ' '.join(stdlib_folded.split()) == fast.pop('HTTP_X_FOLDED') == 'one two'
+        stdlib_raw = [(k, ' '.join(v.split())) for k, v in stdlib.pop('headers_raw')]
+        assert stdlib_raw == [(k, ' '.join(v.split())) for k, v in fast.pop('headers_raw')]
+        assert stdlib == fast
+
+    def test_fast_parser_line_ends(self):
+        # LF line ends, an empty line before the request line
+        sock = eventlet.connect(self.server_addr)
+        for request in (b'GET / HTTP/1.1\nHost: localhost\n\n',
+                        b'\r\nGET / HTTP/1.1\r\nHost: localhost\n\r\n',
+                        b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n'):
+            sock.sendall(request)
+            result = read_http(sock)
+            assert result.status == 'HTTP/1.1 200 OK'
+            assert result.body == b'hello world'
+
+    def test_fast_parser_bad_requests(self):
+        for request, status in ((b'GET / HTTP/1.x\r\n\r\n', b'400'),
+                                (b'GET / HTTP/2.0\r\n\r\n', b'505'),
+                                (b'GET / HTTP/1.1 x\r\n\r\n', b'400'),
+                                (b'GET / HTTP/1.1\r\nContent-Length: x\r\n\r\n', b'400')):
+            sock = eventlet.connect(self.server_addr)
+            send_expect_close(sock, request)
+            # the stdlib error pages of the request line errors
+            assert status in recvall(sock), request
+
+    def test_fast_parser_long_url_unterminated(self):
+        # no end of the request line within the limits
+        self.spawn_server(url_length_limit=100)
+        sock = eventlet.connect(self.server_addr)
+        # all read before the response, the close sends no reset
+        send_expect_close(sock, b'GET /' + b'x' * (100 + wsgi.MAX_TOTAL_HEADER_SIZE - 2))
+        assert recvall(sock).split(b' ')[1] == b'414'
+
+    def test_parser_option(self):
+        self.assertRaises(ValueError, wsgi.Server, None, None, None, parser='http-parser')
+
+
+class TestHttpdParkIdle(TestHttpd):
+    """TestHttpd of the idle keepalive connections parked"""
+
+    def spawn_server(self, **kwargs):
+        kwargs.setdefault('park_idle', True)
+        super(TestHttpdParkIdle, self).spawn_server(**kwargs)
+
+    def test_park_idle_releases_greenthread(self):
+        pool = eventlet.GreenPool()
+        self.spawn_server(custom_pool=pool)
+        sock = eventlet.connect(self.server_addr)
+        for _ in range(3):
+            sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            result = read_http(sock)
+            assert result.body == b'hello world'
+            eventlet.sleep(0.01)
+            # parked, no green thread of the connection
+            assert pool.running() == 0
+        sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n')
+        assert read_http(sock).body == b'hello world'
+        self.assertRaises(ConnectionClosed, read_http, sock)
+
+    def test_park_idle_timeout(self):
+        self.spawn_server(socket_timeout=0.05)
+        sock = eventlet.connect(self.server_addr)
+        sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        read_http(sock)
+        eventlet.sleep(0.2)
+        assert sock.recv(1) == b''
+        assert 'timed out' in self.logfile.getvalue()
+
+    def test_027_evict_idle(self):
+        # parked connections hold no green thread of the pool, none is evicted
+        pool = eventlet.GreenPool(1)
+        self.spawn_server(custom_pool=pool, evict_idle=True)
+        socks = [eventlet.connect(self.server_addr) for _ in range(3)]
+        for _ in range(2):
+            for sock in socks:
+                sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+                assert read_http(sock).body == b'hello world'
+
+    def test_park_idle_keepalive_timeout(self):
+        pool = eventlet.GreenPool()
+        self.spawn_server(custom_pool=pool, keepalive_timeout=0.05)
+        sock = eventlet.connect(self.server_addr)
+        sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        read_http(sock)
+        eventlet.sleep(0.01)
+        assert pool.running() == 0
+        with eventlet.Timeout(1):
+            assert sock.recv(1) == b''
+
+    def test_park_idle_server_exit(self):
+        sock = eventlet.connect(self.server_addr)
+        sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        read_http(sock)
+        eventlet.sleep(0.01)
+        self.killer.kill()
+        with eventlet.Timeout(1):
+            assert sock.recv(1) == b''
+
+    def test_park_idle_client_close(self):
+        pool = eventlet.GreenPool()
+        self.spawn_server(custom_pool=pool)
+        sock = eventlet.connect(self.server_addr)
+        sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        read_http(sock)
+        eventlet.sleep(0.01)
+        sock.close()
+        with eventlet.Timeout(1):
+            pool.waitall()
+            eventlet.sleep(0.01)
+        assert pool.running() == 0
+
+
 def read_headers(sock):
     fd = sock.makefile('rb')
     try:
@@ -1917,3 +2193,7 @@ class TestChunkedInput(_TestBase):
             signal.signal(signal.SIGALRM, signal.SIG_DFL)
 
         assert not got_signal, "caught alarm signal. infinite loop detected."
+
+
+def test_serve_multiprocess():
+    tests.run_isolated('wsgi_serve_multiprocess.py')